@@ -1,18 +1,25 @@
 import streamlit as st
-from googleapiclient.discovery import build
+import warmup
+from warmup import BackgroundModel
 from googleapiclient.errors import HttpError
-import re
-import emoji
-from transformers import pipeline
-import plotly.express as px
-from io import BytesIO
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import pandas as pd
-from datetime import datetime
-from collections import Counter
 import random
-from sklearn.feature_extraction.text import TfidfVectorizer  # Tambah buat TF-IDF kata berpengaruh
+import threading
+import time
+import uuid
+from packaging.version import Version
+import charts
+import jobs
+import metrics
+import out_of_core
+import pdf_report
+from comment_store import CommentStore
+from jobs import JobManager, QueueFull
+from result_cache import SingleFlightCache
+from fetch_scheduler import QuotaExceeded, get_quota_tracker
+from sentiment_cache import SentimentCache
+import sentiment_core as core
+from sharded_inference import DEFAULT_WORKERS, load_classifier
+from sentiment_core import MODEL_NAME, extract_video_id
 
 # ================== API KEY ==================
 API_KEY = st.secrets["YOUTUBE_API_KEY"]
@@ -170,251 +177,253 @@ st.markdown("""
         border: 1.5px solid #333333;
         padding: 10px 12px;
     }
-
-    /* --- Loading Overlay --- */
-    .overlay-container {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100vw;
-        height: 100vh;
-        background-color: rgba(0, 0, 0, 0.7);
-        backdrop-filter: blur(8px);
-        -webkit-backdrop-filter: blur(8px);
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        z-index: 9999;
-        flex-direction: column;
-    }
-    .loader {
-        border: 8px solid #f3f3f3;
-        border-radius: 50%;
-        border-top: 8px solid #3498db;
-        width: 60px;
-        height: 60px;
-        -webkit-animation: spin 2s linear infinite;
-        animation: spin 2s linear infinite;
-    }
-    .loader-text {
-        color: #e0e0e0;
-        margin-top: 20px;
-        font-size: 16px;
-        font-weight: 500;
-    }
-    @-webkit-keyframes spin {
-        0% { -webkit-transform: rotate(0deg); }
-        100% { -webkit-transform: rotate(360deg); }
-    }
-    @keyframes spin {
-        0% { transform: rotate(0deg); }
-        100% { transform: rotate(360deg); }
-    }
 </style>
 """, unsafe_allow_html=True)
 
+# download_button menerima callable untuk data (dibuat saat diklik) mulai Streamlit 1.52
+DEFERRED_DOWNLOAD = Version(st.__version__) >= Version('1.52')
+
 # Load model
+# Backend inference bisa diganti lewat secrets/env SENTIMENT_BACKEND: pytorch, quantized, onnx
+SENTIMENT_BACKEND = st.secrets.get("SENTIMENT_BACKEND", core.DEFAULT_BACKEND)
+# SENTIMENT_WORKERS > 0: inference dibagi ke beberapa proses (lihat sharded_inference.py)
+SENTIMENT_WORKERS = int(st.secrets.get("SENTIMENT_WORKERS", DEFAULT_WORKERS))
+
 @st.cache_resource
-def load_sentiment_model():
-    return pipeline("sentiment-analysis",
-                    model="w11wo/indonesian-roberta-base-sentiment-classifier",
-                    truncation=True, max_length=512)
+def get_model_loader(backend, workers):
+    # Load + warm-up di background, jadi halaman langsung tampil sambil user mengetik URL
+    return BackgroundModel(lambda: load_classifier(backend, workers), warmup=warmup.warm_up_model)
 
-nlp = load_sentiment_model()
+model_loader = get_model_loader(SENTIMENT_BACKEND, SENTIMENT_WORKERS)
 
-# ================== FUNGSI ==================
-# Indonesian stopwords untuk visualisasi saja
-INDO_STOPWORDS = {
-    'yang', 'dan', 'di', 'ke', 'dari', 'untuk', 'adalah', 'pada', 'atau', 'tidak',
-    'ini', 'itu', 'dengan', 'oleh', 'akan', 'telah', 'sudah', 'dapat', 'juga',
-    'lebih', 'pula', 'dalam', 'ada', 'karena', 'bagian', 'anda', 'saya', 'dia',
-    'mereka', 'kami', 'kalian', 'aku', 'kamu', 'dia', 'ia', 'nya',
-    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-    'should', 'may', 'might', 'can', 'it', 'its', 'of', 'in', 'on', 'at',
-    'to', 'as', 'by', 'or', 'but', 'if', 'because', 'so'
-}
+# METRICS_PORT: endpoint Prometheus (/metrics) untuk seluruh proses Streamlit
+METRICS_PORT = int(st.secrets.get("METRICS_PORT", 0))
 
-def extract_video_id(url):
-    match = re.search(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*', url)
-    return match.group(1) if match else None
+@st.cache_resource
+def start_metrics_server(port):
+    return metrics.start_http_server(port)
 
-def create_overlay_html(text):
-    return f"""
-    <div class="overlay-container">
-        <div class="loader"></div>
-        <div class="loader-text">{text}</div>
-    </div>
-    """
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
+@st.cache_resource
+def get_sentiment_caches():
+    # SentimentCache per versi model. Versi baru diketahui setelah model siap di worker job,
+    # dan worker tidak boleh memanggil fungsi st.cache_*, jadi yang dibagikan fungsi lookup biasa;
+    # lock-nya menjaga dua job yang bersamaan tidak membuat dua SentimentCache untuk versi yang sama
+    caches = {}
+    lock = threading.Lock()
+
+    def for_version(version):
+        with lock:
+            if version not in caches:
+                caches[version] = SentimentCache(MODEL_NAME, version)
+            return caches[version]
+    return for_version
+
+@st.cache_resource
+def get_comment_store():
+    return CommentStore()
+
+@st.cache_resource
+def get_result_cache():
+    # Dibagi semua sesi: URL yang sama dianalisis sekali, sesi lain memakai hasilnya.
+    # Hasil parsial (kuota habis) tidak disimpan supaya run berikutnya melanjutkan fetch.
+    # Job yang dibatalkan tidak ikut membatalkan job sesi lain yang menunggu kunci yang sama.
+    return SingleFlightCache(size_of=lambda value: value[0].memory_usage(),
+                             cache_if=lambda value: value[0] is not None and not value[0].partial,
+                             retry_on=(jobs.JobCancelled,))
+
+# JOB_WORKERS / JOB_QUEUE_LIMIT: jumlah analisis yang boleh berjalan bersamaan dan yang boleh antre
+JOB_WORKERS = int(st.secrets.get("JOB_WORKERS", jobs.DEFAULT_MAX_WORKERS))
+JOB_QUEUE_LIMIT = int(st.secrets.get("JOB_QUEUE_LIMIT", jobs.DEFAULT_MAX_QUEUED))
+
+@st.cache_resource
+def get_job_manager(max_workers, max_queued):
+    # Dibagi semua sesi; analisis berjalan di worker, bukan di thread script, jadi tetap
+    # jalan walaupun browser di-refresh atau koneksi terputus
+    return JobManager(max_workers=max_workers, max_queued=max_queued)
+
+comment_store = get_comment_store()
+job_manager = get_job_manager(JOB_WORKERS, JOB_QUEUE_LIMIT)
+
+# ================== FUNGSI ==================
+def render_live_results(aggregate):
+    """Kartu, pie dan tren dari ``RunningAggregate`` job yang sedang berjalan."""
+    counts, percentages = aggregate.counts, aggregate.percentages
+    st.markdown("<h3>⏱️ Hasil Sementara</h3>", unsafe_allow_html=True)
+    cols = st.columns(3, gap="medium")
+    for col, sent in zip(cols, charts.SENTIMENT_LABELS):
+        col.markdown(charts.sentiment_card_html(sent, counts[sent], percentages[sent]), unsafe_allow_html=True)
+    st.caption(f"{aggregate.total} komentar dianalisis dari {aggregate.fetched} yang sudah diambil")
+    if aggregate.total:
+        col_pie, col_trend = st.columns(2, gap="medium")
+        col_pie.plotly_chart(charts.pie_figure(percentages), use_container_width=True, key="live_pie")
+        timeseries = aggregate.timeseries()
+        frame, bucket = timeseries[st.session_state.get('ts_resolution') or '6h']
+        col_trend.plotly_chart(charts.trend_figure(frame, core.format_bucket(bucket)), use_container_width=True,
+                               key="live_trend")
 
 def fetch_video_info(video_id):
-    youtube = build('youtube', 'v3', developerKey=API_KEY)
     try:
-        res = youtube.videos().list(part="snippet", id=video_id).execute()
-        if res['items']:
-            item = res['items'][0]['snippet']
-            return {'title': item['title'], 'thumbnail_url': item['thumbnails']['high']['url']}
+        return core.fetch_video_info(API_KEY, video_id)
+    except QuotaExceeded as e:
+        st.error(f"{e}.")
     except HttpError:
         st.error("Quota habis atau error API.")
     return None
 
-def fetch_comments(video_id, max_comments, order_by, placeholder):
-    youtube = build('youtube', 'v3', developerKey=API_KEY)
-    all_comments = []
-    next_page = None
-    fetched = 0
-
-    while fetched < max_comments:
-        try:
-            # Update overlay
-            status_text = f"Mengambil komentar: {fetched}/{max_comments}"
-            placeholder.markdown(create_overlay_html(status_text), unsafe_allow_html=True)
-            
-            res = youtube.commentThreads().list(
-                part="snippet",
-                videoId=video_id,
-                maxResults=min(100, max_comments - fetched),
-                pageToken=next_page,
-                order=order_by
-            ).execute()
-            
-            for item in res['items']:
-                snippet = item['snippet']['topLevelComment']['snippet']
-                all_comments.append({
-                    'text': snippet['textDisplay'],
-                    'timestamp': snippet['publishedAt'],
-                    'like_count': snippet['likeCount']
-                })
-                fetched += 1
-                if fetched >= max_comments: break
-            
-            next_page = res.get('nextPageToken')
-            if not next_page: break
-        except HttpError:
-            st.error("Gagal mengambil komentar. Kuota API mungkin habis atau komentar dinonaktifkan.")
-            placeholder.empty()
-            return []
-
-    status_text = f"Berhasil mengambil {len(all_comments)} komentar!"
-    placeholder.markdown(create_overlay_html(status_text), unsafe_allow_html=True)
-    return all_comments
-
-def clean_comment(text):
-    # Hapus HTML tags dan entities
-    text = re.sub(r'<[^>]+>', '', text)  # Hapus HTML tags
-    text = re.sub(r'&nbsp;|&lt;|&gt;|&amp;|&quot;|&#39;|&.*?;', '', text)  # Hapus HTML entities
-    
-    # Hapus emoji
-    text = emoji.replace_emoji(text, "")
-    
-    # Hapus URL
-    text = re.sub(r'http[s]?://\S+', '', text)
-    text = re.sub(r'www\.\S+', '', text)
-    
-    # Hapus newline dan carriage return
-    text = re.sub(r'[\n\r\t]+', ' ', text)
-    
-    # Hapus multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Strip whitespace di awal dan akhir, lowercase
-    text = text.strip().lower()
-    
-    # Hapus special characters tapi jaga huruf, angka, dan spasi
-    text = re.sub(r'[^a-z0-9\s]', '', text)
-    
-    return text
-
-def clean_for_visualization(text):
-    """Hapus stopwords dari teks untuk kepentingan visualisasi saja"""
-    words = text.split()
-    filtered = [w for w in words if w not in INDO_STOPWORDS and len(w) > 2]
-    return ' '.join(filtered)
-
-def analyze_sentiment(comment_data, placeholder):
-    cleaned = []
-    valid_timestamps = []
-    original_comments_data = []
-
-    for item in comment_data:
-        cleaned_text = clean_comment(item['text'])
-        if len(cleaned_text) > 10:
-            cleaned.append(cleaned_text)
-            valid_timestamps.append(item['timestamp'])
-            original_comments_data.append(item['text'])
-
-    if not cleaned:
-        placeholder.empty()
-        return {}, {}, 0, {}, {}, {}, [], [], {}
-
-    sentiments = {"positive": 0, "negative": 0, "neutral": 0}
-    samples = {"positive": [], "negative": [], "neutral": []}
-    texts_original = {"positive": [], "negative": [], "neutral": []}
-    texts_clean = {"positive": [], "negative": [], "neutral": []}
-    data = []
-    scores = {"positive": [], "negative": [], "neutral": []}
-
-    total = len(cleaned)
-    batch_size = 64
-    
-    placeholder.markdown(create_overlay_html(f"Menganalisis {total} komentar..."), unsafe_allow_html=True)
+# Urutan untuk API; urutan lain diterapkan setelah pengambilan data
+ORDER_MAP = {
+    'Relevansi (Bawaan)': 'relevance', 'Terbaru': 'time', 'Terlama': 'time',
+    'Paling Populer (Like Terbanyak)': 'relevance', 'Acak': 'relevance'
+}
+# Padanan sorting di mode data besar: baris di disk diurutkan saat export/contoh komentar
+EXPORT_ORDER = {
+    'Relevansi (Bawaan)': 'fetch', 'Terbaru': 'fetch', 'Terlama': 'reverse',
+    'Paling Populer (Like Terbanyak)': 'likes', 'Acak': 'random'
+}
 
-    for i in range(0, total, batch_size):
-        # Update status di dalam loop
-        if (i // batch_size) % 2 == 0:
-            status_text = f"Menganalisis komentar: {min(i + batch_size, total)}/{total}"
-            placeholder.markdown(create_overlay_html(status_text), unsafe_allow_html=True)
+def analysis_key(video_id, max_comments, order_key, include_replies, large=False):
+    return (video_id, max_comments, order_key, include_replies, large, MODEL_NAME, SENTIMENT_BACKEND)
+
+def run_analysis_job(job, video_id, max_comments, order_key, include_replies, large, loader, sentiment_caches,
+                     result_cache):
+    """Analisis satu video di worker ``job_manager``. Berjalan di luar thread script, jadi semua
+    resource diterima sebagai argumen dan tidak ada pemanggilan ``st.*``; progress dan hasil
+    sementara dilaporkan lewat ``job``."""
+    def compute_analysis():
+        if not loader.ready:
+            job.report("Menyiapkan model...")
+        nlp = loader.get()
+        version = core.model_version(nlp, SENTIMENT_BACKEND)
+        sentiment_cache = sentiment_caches(version)
+
+        if large:
+            # Mode data besar: komentar dan hasil per chunk ke disk, di memori hanya agregat + sampel
+            stats = core.new_inference_stats()
+            result = out_of_core.analyze_out_of_core(
+                API_KEY, comment_store, nlp, sentiment_cache, video_id, max_comments, ORDER_MAP[order_key],
+                progress=job.report, include_replies=include_replies,
+                on_update=lambda aggregate: job.update(aggregate.copy()), stats=stats,
+                export_order=EXPORT_ORDER[order_key]
+            )
+            return (result, stats, uuid.uuid4().hex) if result.fetched else (None, None, None)
+
+        # Step 1: Scrape comments sambil langsung menjalankan model per batch
+        comment_data, precomputed = core.run_analysis_pipeline(
+            API_KEY, comment_store, nlp, sentiment_cache, video_id, max_comments, ORDER_MAP[order_key],
+            progress=job.report, include_replies=include_replies,
+            on_update=lambda aggregate: job.update(aggregate.copy())
+        )
+        if not comment_data:
+            return None, None, None
+
+        # Step 2: Lakukan sorting setelah pengambilan data
+        if order_key == 'Terlama':
+            comment_data.reverse()
+        elif order_key == 'Paling Populer (Like Terbanyak)':
+            comment_data.sort(key=lambda x: x['like_count'], reverse=True)
+        elif order_key == 'Acak':
+            random.shuffle(comment_data)
+
+        # Step 3: Run analysis; hanya tabel hasilnya yang disimpan di session
+        stats = precomputed.pop('stats', None) or core.new_inference_stats()
+        result = core.analyze_sentiment(nlp, sentiment_cache, comment_data, progress=job.report, stats=stats,
+                                        **precomputed)
+        # Id run: membedakan hasil ini dari analisis ulang dengan kunci yang sama (mis. setelah TTL)
+        return result, stats, uuid.uuid4().hex
+
+    # Permintaan yang sama dari beberapa sesi dihitung sekali (lihat result_cache.py)
+    cache_key = analysis_key(video_id, max_comments, order_key, include_replies, large)
+    if result_cache.inflight(cache_key):
+        job.report("Menunggu analisis video yang sama dari sesi lain...")
+    # Span job ini saja; job lain yang berjalan bersamaan punya Collector sendiri
+    with metrics.Collector() as run_metrics:
+        (analysis, stats, run_id), source = result_cache.get_or_compute(cache_key, compute_analysis)
+    return {'analysis': analysis, 'inference_stats': stats, 'analysis_source': (source, result_cache.age(cache_key)),
+            'run_metrics': run_metrics.snapshot(), 'report_key': (cache_key, run_id)}
+
+# Setelan yang ikut disimpan di job, supaya bisa dipulihkan saat menyambung lagi setelah refresh
+JOB_SETTINGS = ['video_id', 'video_info', 'max_comments', 'comment_order', 'show_wc', 'include_replies', 'live_results',
+                'out_of_core']
+
+def submit_analysis():
+    order_key = st.session_state.get('comment_order') or 'Relevansi (Bawaan)'
+    include_replies = st.session_state.get('include_replies', False)
+    large = st.session_state.get('out_of_core', False)
+    video_id, max_comments = st.session_state.video_id, st.session_state['max_comments']
+    try:
+        job = job_manager.submit(run_analysis_job, video_id, max_comments, order_key, include_replies, large,
+                                 model_loader, get_sentiment_caches(), get_result_cache(),
+                                 key=analysis_key(video_id, max_comments, order_key, include_replies, large),
+                                 meta={k: st.session_state.get(k) for k in JOB_SETTINGS},
+                                 viewer=st.session_state.viewer_id)
+    except QueueFull as e:
+        st.warning(f"⚠️ Server sedang sibuk: {e}. Coba lagi beberapa saat lagi.")
+        return
+    st.session_state['job_id'] = job.id
+    st.query_params['job'] = job.id
+    st.query_params['viewer'] = st.session_state.viewer_id
+    st.rerun()
+
+def collect_job(job):
+    """Pindahkan hasil job yang sudah selesai ke session; kembalikan pesan untuk ditampilkan."""
+    st.session_state['job_id'] = None
+    st.query_params.pop('job', None)
+    if job is None:
+        return ('warning', "Analisis tidak ditemukan lagi di server (mungkin server di-restart). Silakan jalankan ulang.")
+    if job.state == jobs.CANCELLED:
+        return ('info', "Analisis dibatalkan.")
+    if job.state == jobs.FAILED:
+        if model_loader.error is not None:
+            # Jangan simpan loader yang gagal, run berikutnya coba load ulang
+            get_model_loader.clear()
+        if isinstance(job.error, QuotaExceeded):
+            return ('error', f"Gagal mengambil komentar: {job.error}.")
+        if isinstance(job.error, HttpError):
+            return ('error', "Gagal mengambil komentar. Kuota API mungkin habis atau komentar dinonaktifkan.")
+        return ('error', f"Terjadi kesalahan saat proses: {job.error}")
+    if job.result['analysis'] is None:
+        return ('warning', "Tidak ada komentar yang bisa dianalisis.")
+    for k, v in job.result.items():
+        st.session_state[k] = v
+    return None
 
-        batch_cleaned = cleaned[i:i+batch_size]
-        batch_originals = original_comments_data[i:i+batch_size]
-        batch_ts = valid_timestamps[i:i+batch_size]
-        
-        results = nlp(batch_cleaned)
-        
-        for r, com_orig, com_clean, ts in zip(results, batch_originals, batch_cleaned, batch_ts):
-            label = r['label'].lower()
-            sentiments[label] += 1
-            texts_original[label].append(com_orig)
-            vis_clean_text = clean_for_visualization(com_clean)
-            if vis_clean_text:
-                texts_clean[label].append(vis_clean_text)
-            scores[label].append(r['score'])
-            if len(samples[label]) < 5:
-                samples[label].append(com_orig)
-            data.append({'date': datetime.fromisoformat(ts.replace('Z','+00:00')), 'sentimen': label})
-
-    percentages = {k: round(v/total*100, 2) if total > 0 else 0 for k, v in sentiments.items()}
-    
-    placeholder.markdown(create_overlay_html("Menyelesaikan visualisasi..."), unsafe_allow_html=True)
-    
-    # Step 2: Hitung TF-IDF menggunakan teks bersih untuk visualisasi
-    tfidf = TfidfVectorizer(max_features=20)
-    tfidf_docs = [' '.join(texts_clean[sent]) for sent in ['positive', 'negative', 'neutral']]
-    if all(doc.strip() for doc in tfidf_docs):
-        tfidf.fit(tfidf_docs)
-        tfidf_words = {}
-        for i, sent in enumerate(['positive', 'negative', 'neutral']):
-            feature_names = tfidf.get_feature_names_out()
-            scores_vec = tfidf.transform([tfidf_docs[i]]).toarray()[0]
-            tfidf_words[sent] = sorted([(feature_names[j], scores_vec[j]) for j in range(len(scores_vec))], key=lambda x: x[1], reverse=True)
+@st.fragment(run_every=1)
+def job_panel(job_id):
+    """Status job yang sedang berjalan; digambar ulang tiap detik tanpa menjalankan ulang seluruh halaman."""
+    job = job_manager.get(job_id)
+    if job is None or not job.active:
+        # Selesai: rerun penuh supaya hasilnya diambil dan ditampilkan
+        st.rerun()
+    info = job.meta.get('video_info') or {}
+    st.markdown(f"<h3>⏳ Menganalisis: {info.get('title', job.meta.get('video_id'))}</h3>", unsafe_allow_html=True)
+    position = job_manager.queue_position(job)
+    if job.cancel_requested:
+        status = "Membatalkan..."
+    elif position:
+        status = f"Menunggu giliran (antrean ke-{position}, {job_manager.max_workers} analisis berjalan bersamaan)"
     else:
-        tfidf_words = {"positive": [], "negative": [], "neutral": []}
-
-    return sentiments, percentages, total, samples, texts_clean, data, scores, tfidf_words, texts_original
-
-def generate_wordcloud(text):
-    if not text: return None
-    wc = WordCloud(width=800, height=400, background_color='#0f0f23', colormap='viridis').generate(text)
-    fig, ax = plt.subplots(figsize=(10,5), facecolor='#0f0f23')
-    ax.imshow(wc, interpolation='bilinear')
-    ax.axis('off')
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', facecolor='#0f0f23', dpi=150)
-    buf.seek(0); plt.close()
-    return buf
+        status = job.message
+    elapsed = time.time() - job.created_at
+    st.markdown(f"<p style='color: #999999; font-size: 13px; margin: 0;'>⏳ {status} • {elapsed:.0f}s</p>", unsafe_allow_html=True)
+    st.caption(f"ID job: {job.id} • analisis tetap berjalan di server walaupun halaman di-refresh atau ditutup")
+    if st.button("⏹️ Batalkan Analisis", disabled=job.cancel_requested):
+        # Job bisa dipakai bersama sesi lain (video + setelan sama): sesi ini cukup berhenti
+        # menunggu, dan job baru dibatalkan kalau tidak ada sesi lain yang menunggu
+        if job_manager.detach(job.id, st.session_state.viewer_id):
+            st.session_state['job_notice'] = ('info', "Analisis dibatalkan.")
+        else:
+            st.session_state['job_notice'] = ('info', "Berhenti menunggu. Analisis tetap berjalan untuk sesi lain yang meminta video yang sama.")
+        st.session_state['job_id'] = None
+        st.query_params.pop('job', None)
+        st.rerun()
+    if st.session_state.get('live_results', True) and job.aggregate is not None:
+        render_live_results(job.aggregate)
 
 # ================== SESSION STATE ==================
-for k in ['video_info','video_id','comments','timestamps','counts','percentages','valid_comments','samples','sentiment_texts','sentiment_data','scores','tfidf_words','sentiment_texts_original','comments_raw','timestamps_raw','scraped','is_running', 'comment_order', 'raw_comment_data']:
+for k in ['video_info','video_id','analysis','is_running', 'comment_order', 'inference_stats', 'run_metrics', 'analysis_source', 'report_key', 'job_id']:
     if k not in st.session_state:
         st.session_state[k] = None
 
@@ -428,6 +437,28 @@ if 'show_wc' not in st.session_state:
 if 'max_comments' not in st.session_state:
     st.session_state['max_comments'] = 500
 
+# ================== JOB ==================
+# Id penunggu job; ikut disimpan di URL supaya sesi setelah refresh dihitung sebagai penunggu yang sama
+if 'viewer_id' not in st.session_state:
+    st.session_state['viewer_id'] = st.query_params.get('viewer') or uuid.uuid4().hex[:12]
+
+# Setelah refresh, session baru menyambung lagi ke job lewat id di URL (?job=...)
+if st.session_state.job_id is None and st.query_params.get('job'):
+    job = job_manager.attach(st.query_params['job'], st.session_state.viewer_id)
+    if job is not None:
+        st.session_state['job_id'] = job.id
+        for k, v in job.meta.items():
+            st.session_state[k] = v
+    else:
+        st.query_params.pop('job', None)
+
+active_job = job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+job_notice = st.session_state.pop('job_notice', None)
+if st.session_state.job_id and (active_job is None or not active_job.active):
+    job_notice = collect_job(active_job)
+    active_job = None
+st.session_state['is_running'] = active_job is not None
+
 # ================== UI ==================
 # Header Section dengan styling menarik
 col_header1, col_header2 = st.columns([1, 1])
@@ -448,14 +479,15 @@ with col_header2:
 
 st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 20px 0;'>", unsafe_allow_html=True)
 
-# Placeholder for the loading overlay
-overlay_placeholder = st.empty()
+if job_notice:
+    getattr(st, job_notice[0])(job_notice[1])
 
 # Main UI
 if not st.session_state.get('is_running'):
     url = st.text_input("Link YouTube", placeholder="https://www.youtube.com/watch?v=...", help="Masukkan URL video YouTube yang ingin dianalisis")
+    warmup.mark_first_paint()
 
-    if not st.session_state.comments:
+    if st.session_state.analysis is None:
         col_btn1, col_btn2, col_placeholder = st.columns([2, 3, 2])
         
         with col_btn1:
@@ -480,7 +512,7 @@ if not st.session_state.get('is_running'):
                     </div>
                     """, unsafe_allow_html=True)
 
-        if st.session_state.video_info and not st.session_state.comments:
+        if st.session_state.video_info and st.session_state.analysis is None:
             # Persistent preview: show title + thumbnail so it doesn't disappear on reruns
             with col_btn2:
                 info = st.session_state.get('video_info')
@@ -499,6 +531,15 @@ if not st.session_state.get('is_running'):
                 if 'manual_max_comments' not in st.session_state:
                     st.session_state['manual_max_comments'] = st.session_state.get('max_comments', 500)
 
+                st.session_state['out_of_core'] = st.checkbox(
+                    "🗄️ Mode data besar (hingga 500.000 komentar)", value=st.session_state.get('out_of_core', False),
+                    help="Komentar dan hasil disimpan di disk per chunk; yang ditahan di memori hanya ringkasan dan sampel"
+                )
+                comment_limit = out_of_core.MAX_COMMENTS if st.session_state['out_of_core'] else 5000
+                if st.session_state['max_comments'] > comment_limit:
+                    for k in ('max_comments', 'slider_max_comments', 'manual_max_comments'):
+                        st.session_state[k] = comment_limit
+
                 def _sync_slider():
                     val = st.session_state.get('slider_max_comments')
                     st.session_state['max_comments'] = val
@@ -511,9 +552,10 @@ if not st.session_state.get('is_running'):
 
                 c1, c2 = st.columns(2)
                 with c1:
-                    st.slider("Jumlah Komentar (100-5000)", 100, 5000, key='slider_max_comments', step=100, on_change=_sync_slider)
+                    st.slider(f"Jumlah Komentar (100-{comment_limit:,})".replace(',', '.'), 100, comment_limit,
+                              key='slider_max_comments', step=100, on_change=_sync_slider)
                 with c2:
-                    st.number_input("Manual", 100, 5000, key='manual_max_comments', step=100, on_change=_sync_manual)
+                    st.number_input("Manual", 100, comment_limit, key='manual_max_comments', step=100, on_change=_sync_manual)
 
                 st.session_state['comment_order'] = st.selectbox(
                     'Urutkan berdasarkan',
@@ -528,59 +570,37 @@ if not st.session_state.get('is_running'):
 
                 st.markdown("---")
                 st.session_state['show_wc'] = st.checkbox("☁️ Tampilkan Word Cloud", value=st.session_state.get('show_wc', True))
+                st.session_state['include_replies'] = st.checkbox(
+                    "💬 Sertakan balasan komentar", value=st.session_state.get('include_replies', False),
+                    help="Balasan ikut dihitung dalam jumlah komentar di atas"
+                )
+                st.session_state['live_results'] = st.checkbox(
+                    "⏱️ Tampilkan hasil sementara", value=st.session_state.get('live_results', True),
+                    help="Ringkasan, pie dan tren diperbarui tiap batch selama analisis berjalan"
+                )
 
                 if st.button("▶️ Mulai Analisis Sentimen", type="primary", use_container_width=True):
-                    st.session_state['is_running'] = True
-                    st.rerun()
+                    submit_analysis()
 
-# This block runs when the "Mulai Analisis" button is clicked
+# Job analisis sedang berjalan: tampilkan progress, hasil sementara dan tombol batal
 if st.session_state.get('is_running'):
-    try:
-        overlay_placeholder.markdown(create_overlay_html("Mempersiapkan analisis..."), unsafe_allow_html=True)
-        
-        # Tentukan urutan untuk API
-        order_map = {
-            'Relevansi (Bawaan)': 'relevance', 'Terbaru': 'time', 'Terlama': 'time',
-            'Paling Populer (Like Terbanyak)': 'relevance', 'Acak': 'relevance'
-        }
-        selected_order_key = st.session_state.get('comment_order', 'Relevansi (Bawaan)')
-        api_order = order_map[selected_order_key]
-
-        # Step 1: Scrape comments
-        comment_data = fetch_comments(st.session_state.video_id, st.session_state['max_comments'], order_by=api_order, placeholder=overlay_placeholder)
-        
-        if comment_data:
-            # Step 2: Lakukan sorting setelah pengambilan data
-            if selected_order_key == 'Terlama':
-                comment_data.reverse()
-            elif selected_order_key == 'Paling Populer (Like Terbanyak)':
-                comment_data.sort(key=lambda x: x['like_count'], reverse=True)
-            elif selected_order_key == 'Acak':
-                random.shuffle(comment_data)
-            
-            st.session_state['raw_comment_data'] = comment_data
-            
-            # Step 3: Run analysis
-            result = analyze_sentiment(st.session_state['raw_comment_data'], placeholder=overlay_placeholder)
-            c, p, v, s, texts, data, scores, tfidf_words, texts_original = result
-            
-            # Simpan semua hasil
-            st.session_state.update({
-                'comments': [item['text'] for item in st.session_state['raw_comment_data']],
-                'timestamps': [item['timestamp'] for item in st.session_state['raw_comment_data']],
-                'counts': c, 'percentages': p, 'valid_comments': v, 'samples': s, 
-                'sentiment_texts': texts, 'sentiment_data': data, 'scores': scores, 
-                'tfidf_words': tfidf_words, 'sentiment_texts_original': texts_original
-            })
-    except Exception as e:
-        st.error(f"Terjadi kesalahan saat proses: {e}")
-    finally:
-        # Apapun yang terjadi, matikan overlay dan rerun
-        st.session_state['is_running'] = False
-        overlay_placeholder.empty()
-        st.rerun()
+    job_panel(st.session_state.job_id)
+
+# Span render sesi ini saja (lihat metrics.Collector), dibaca di panel Performa
+render_metrics = metrics.Collector().start()
+if st.session_state.analysis is not None:
+    # Library grafik baru di-import saat hasil pertama kali ditampilkan (plotly di dalam charts)
+    import pandas as pd
+
+    analysis = st.session_state.analysis
+    counts, percentages = analysis.counts, analysis.percentages
+
+    # Word cloud dirender di background sementara bagian lain halaman digambar
+    wc_futures = {}
+    if st.session_state.get('show_wc', True):
+        wc_futures = core.render_wordclouds_async({sent: analysis.word_counts(sent) for sent in core.SENTIMENTS})
+    wc_slots = {}
 
-if st.session_state.comments:
     st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 30px 0;'>", unsafe_allow_html=True)
     st.markdown("<h2 style='margin-bottom: 30px;'>📊 Hasil Analisis Sentimen</h2>", unsafe_allow_html=True)
     
@@ -590,66 +610,57 @@ if st.session_state.comments:
         # Metrics dengan styling modern
         col1, col2, col3 = st.columns(3, gap="medium")
         
-        with col1:
-            st.markdown("""
-            <div style='background: linear-gradient(135deg, #1a3a1a, #2a5a2a); padding: 20px; border-radius: 12px; border: 1px solid #3a7a3a; text-align: center;'>
-                <p style='color: #88dd88; font-size: 12px; margin: 0 0 8px 0;'>POSITIF</p>
-                <p style='color: #00ff00; font-size: 32px; font-weight: 700; margin: 0;'>""" + str(st.session_state.percentages['positive']) + """%</p>
-                <p style='color: #66cc66; font-size: 12px; margin: 8px 0 0 0;'>""" + str(st.session_state.counts['positive']) + """ komentar</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div style='background: linear-gradient(135deg, #3a3a1a, #5a5a2a); padding: 20px; border-radius: 12px; border: 1px solid #7a7a3a; text-align: center;'>
-                <p style='color: #dddd88; font-size: 12px; margin: 0 0 8px 0;'>NETRAL</p>
-                <p style='color: #ffff00; font-size: 32px; font-weight: 700; margin: 0;'>""" + str(st.session_state.percentages['neutral']) + """%</p>
-                <p style='color: #cccc66; font-size: 12px; margin: 8px 0 0 0;'>""" + str(st.session_state.counts['neutral']) + """ komentar</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-            <div style='background: linear-gradient(135deg, #3a1a1a, #5a2a2a); padding: 20px; border-radius: 12px; border: 1px solid #7a3a3a; text-align: center;'>
-                <p style='color: #dd8888; font-size: 12px; margin: 0 0 8px 0;'>NEGATIF</p>
-                <p style='color: #ff4488; font-size: 32px; font-weight: 700; margin: 0;'>""" + str(st.session_state.percentages['negative']) + """%</p>
-                <p style='color: #cc6666; font-size: 12px; margin: 8px 0 0 0;'>""" + str(st.session_state.counts['negative']) + """ komentar</p>
-            </div>
-            """, unsafe_allow_html=True)
+        for col, sent in zip((col1, col2, col3), charts.SENTIMENT_LABELS):
+            with col:
+                st.markdown(charts.sentiment_card_html(sent, counts[sent], percentages[sent]), unsafe_allow_html=True)
         
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown("""
         <div style='background: linear-gradient(135deg, #2a2a2a, #3a3a3a); padding: 15px; border-radius: 10px; border: 1px solid #444444;'>
-            <p style='color: #cccccc; font-size: 13px; margin: 0;'><strong>📝 Total Komentar Dianalisis:</strong> """ + str(st.session_state.valid_comments) + """ (dari total """ + str(len(st.session_state.comments)) + """ yang diambil)</p>
+            <p style='color: #cccccc; font-size: 13px; margin: 0;'><strong>📝 Total Komentar Dianalisis:</strong> """ + str(analysis.total) + """ (dari total """ + str(analysis.fetched) + """ yang diambil)</p>
         </div>
         """, unsafe_allow_html=True)
 
+        if analysis.partial:
+            fetch_status = analysis.fetch_status
+            reason = "kuota API habis" if fetch_status['status'] == 'quota_exhausted' else "error API"
+            st.warning(
+                f"⚠️ Hasil parsial: pengambilan berhenti di {fetch_status['fetched']} komentar ({reason}: "
+                f"{fetch_status['message']}). Jalankan analisis lagi nanti untuk melanjutkan dari titik ini."
+            )
+
+        reply_split = analysis.sentiment_by_reply()
+        n_replies = sum(reply_split['reply'].values())
+        if n_replies:
+            n_top = sum(reply_split['top_level'].values())
+            def _pct(counts, n):
+                return " • ".join(f"{sent} {counts[sent] / n * 100:.1f}%" for sent in core.SENTIMENTS) if n else "-"
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.markdown(f"""
+        <div style='background: linear-gradient(135deg, #2a2a2a, #3a3a3a); padding: 15px; border-radius: 10px; border: 1px solid #444444;'>
+            <p style='color: #cccccc; font-size: 13px; margin: 0 0 6px 0;'><strong>💬 Komentar utama ({n_top}):</strong> {_pct(reply_split['top_level'], n_top)}</p>
+            <p style='color: #cccccc; font-size: 13px; margin: 0;'><strong>↪️ Balasan ({n_replies}):</strong> {_pct(reply_split['reply'], n_replies)}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        stats = st.session_state.get('inference_stats')
+        source, age = st.session_state.get('analysis_source') or (None, None)
+        # Statistik inference milik run yang mengisi cache, bukan run ini, jadi tidak ditampilkan
+        if source == 'hit':
+            st.caption(f"♻️ Hasil dari cache bersama (dianalisis {age / 60:.0f} menit lalu), tanpa panggilan API atau model baru")
+        elif source == 'coalesced':
+            st.caption("🤝 Hasil dibagi dari analisis video yang sama yang sedang berjalan di sesi lain")
+        elif stats:
+            st.caption(
+                f"⚡ Inference: {stats['model_calls']} teks diproses model dari {stats['unique']} teks unik "
+                f"({stats['comments']} komentar) • cache hit {stats['cache_hits']}/{stats['unique']} "
+                f"• hit rate kumulatif {stats['cache_hit_rate']:.0%}"
+            )
+
     with tab2:
         st.markdown("<p style='color: #999999; font-size: 13px; margin-bottom: 20px;'>Pie chart distribusi sentimen dari seluruh komentar yang dianalisis</p>", unsafe_allow_html=True)
         
-        # Persiapan data untuk pie chart
-        pie_data = {
-            "Sentimen": ["Positif", "Netral", "Negatif"],
-            "Jumlah": [st.session_state.percentages.get('positive', 0), st.session_state.percentages.get('neutral', 0), st.session_state.percentages.get('negative', 0)]
-        }
-        pie_df = pd.DataFrame(pie_data)
-        
-        # Pemetaan warna yang diinginkan
-        color_map = {
-            "Positif": "#00ff88",
-            "Netral": "#ffff88",
-            "Negatif": "#C62828"
-        }
-
-        fig = px.pie(pie_df,
-                     values='Jumlah',
-                     names='Sentimen',
-                     color='Sentimen',
-                     color_discrete_map=color_map,
-                     template="plotly_dark",
-                     hole=0.3)
-        fig.update_layout(height=450, font=dict(size=12))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(charts.pie_figure(percentages), use_container_width=True)
 
     with tab3:
         if st.session_state.get('show_wc', True):
@@ -657,10 +668,7 @@ if st.session_state.comments:
             st.markdown("<p style='color: #999999; font-size: 12px; margin-top: -15px;'>Visualisasi kata-kata yang paling sering muncul (sudah dibersihkan dari stopwords)</p>", unsafe_allow_html=True)
             cols = st.columns(3, gap="medium")
             for i, sent in enumerate(["positive", "negative", "neutral"]):
-                wc = generate_wordcloud(' '.join(st.session_state.sentiment_texts[sent]))
-                if wc:
-                    with cols[i]:
-                        st.image(wc, caption=f"Sentimen: {sent.upper()}", use_container_width=True)
+                wc_slots[sent] = cols[i].empty()
             st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 30px 0;'>", unsafe_allow_html=True)
 
         st.markdown("<h3>🏆 Top 10 Kata Paling Sering Muncul Per Sentimen</h3>", unsafe_allow_html=True)
@@ -668,14 +676,9 @@ if st.session_state.comments:
         cols = st.columns(3, gap="medium")
         for i, sent in enumerate(["positive", "negative", "neutral"]):
             with cols[i]:
-                top = Counter(' '.join(st.session_state.sentiment_texts[sent]).split()).most_common(10)
+                top = analysis.terms.top(sent, 10)
                 if top:
-                    df = pd.DataFrame(top, columns=['Kata', 'Frekuensi'])
-                    fig_top = px.bar(df, x='Frekuensi', y='Kata', orientation='h', 
-                                    template="plotly_dark", title=f"{sent.upper()}",
-                                    color='Frekuensi', color_continuous_scale='Viridis')
-                    fig_top.update_layout(height=400, showlegend=False, font=dict(size=11))
-                    st.plotly_chart(fig_top, use_container_width=True)
+                    st.plotly_chart(charts.top_words_figure(top, sent), use_container_width=True)
         
         st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 30px 0;'>", unsafe_allow_html=True)
         st.markdown("<h3>⭐ Kata Berpengaruh (TF-IDF) Per Sentimen</h3>", unsafe_allow_html=True)
@@ -683,47 +686,35 @@ if st.session_state.comments:
         cols = st.columns(3, gap="medium")
         for i, sent in enumerate(["positive", "negative", "neutral"]):
             with cols[i]:
-                top_tfidf = st.session_state.tfidf_words[sent]
+                top_tfidf = analysis.tfidf_words[sent]
                 if top_tfidf:
-                    df_tfidf = pd.DataFrame(top_tfidf, columns=['Kata', 'Score'])
-                    fig_tfidf = px.bar(df_tfidf, x='Score', y='Kata', orientation='h', 
-                                      template="plotly_dark", title=f"{sent.upper()}",
-                                      color='Score', color_continuous_scale='Turbo')
-                    fig_tfidf.update_layout(height=400, showlegend=False, font=dict(size=11))
-                    st.plotly_chart(fig_tfidf, use_container_width=True)
+                    st.plotly_chart(charts.tfidf_figure(top_tfidf, sent), use_container_width=True)
         
         st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 30px 0;'>", unsafe_allow_html=True)
         st.markdown("<h3>📊 Distribusi Confidence Score Per Sentimen</h3>", unsafe_allow_html=True)
         st.markdown("<p style='color: #999999; font-size: 12px; margin-top: -15px;'>Tingkat kepercayaan prediksi model IndoBERT</p>", unsafe_allow_html=True)
-        score_df = pd.DataFrame()
-        for sent in ["positive", "negative", "neutral"]:
-            if st.session_state.scores[sent]:
-                temp_df = pd.DataFrame({'Sentimen': sent, 'Score': st.session_state.scores[sent]})
-                score_df = pd.concat([score_df, temp_df])
-        fig_box = px.box(score_df, x='Sentimen', y='Score', template="plotly_dark", 
-                        title="Box Plot Distribusi Score", color='Sentimen',
-                        color_discrete_map={'positive': '#00ff88', 'neutral': '#ffff88', 'negative': '#ff4488'})
-        fig_box.update_layout(height=450, font=dict(size=12))
-        st.plotly_chart(fig_box, use_container_width=True)
+        st.plotly_chart(charts.box_figure(analysis.analyzed), use_container_width=True)
+        if analysis.out_of_core:
+            st.caption(f"Mode data besar: box plot dari sampel acak {len(analysis.analyzed)} komentar.")
         
         st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 30px 0;'>", unsafe_allow_html=True)
         st.markdown("<h3>📈 Tren Sentimen Over Time</h3>", unsafe_allow_html=True)
-        st.markdown("<p style='color: #999999; font-size: 12px; margin-top: -15px;'>Perubahan sentimen komentar setiap 6 jam</p>", unsafe_allow_html=True)
-        if st.session_state.sentiment_data:
-            df = pd.DataFrame(st.session_state.sentiment_data)
-            df['date'] = pd.to_datetime(df['date']).dt.floor('H')
-            dfg = df.groupby([pd.Grouper(key='date', freq='6H'), 'sentimen']).size().unstack(fill_value=0)
-            fig = px.line(dfg, template="plotly_dark", title="Tren Sentimen per 6 Jam",
-                         markers=True, line_shape='spline')
-            fig.update_layout(height=450, font=dict(size=12), hovermode='x unified')
-            st.plotly_chart(fig, use_container_width=True)
+        st.markdown("<p style='color: #999999; font-size: 12px; margin-top: -15px;'>Perubahan jumlah komentar per sentimen dari waktu ke waktu</p>", unsafe_allow_html=True)
+        if analysis.timeseries:
+            resolution = st.radio("Resolusi", list(core.TIME_RESOLUTIONS), index=1, horizontal=True,
+                                  format_func=core.TIME_RESOLUTIONS.get, key='ts_resolution')
+            dfg, bucket = analysis.timeseries[resolution]
+            if bucket != pd.to_timedelta(resolution):
+                st.caption(f"Rentang waktu panjang: titik digabung per {core.format_bucket(bucket)} (maks {core.MAX_TIME_POINTS} titik).")
+            st.plotly_chart(charts.trend_figure(dfg, core.format_bucket(bucket)), use_container_width=True)
 
     with tab4:
         st.markdown("<p style='color: #999999; font-size: 12px; margin-bottom: 20px;'>Contoh komentar dari setiap kategori sentimen</p>", unsafe_allow_html=True)
         for sent in ["positive", "neutral", "negative"]:
-            with st.expander(f"💬 {sent.upper()} - {len(st.session_state.samples[sent])} Contoh", expanded=False):
-                if st.session_state.samples[sent]:
-                    for idx, c in enumerate(st.session_state.samples[sent], 1):
+            samples = analysis.samples(sent)
+            with st.expander(f"💬 {sent.upper()} - {len(samples)} Contoh", expanded=False):
+                if samples:
+                    for idx, c in enumerate(samples, 1):
                         st.markdown(f"""
                         <div style='background: #1a1a1a; padding: 12px; border-radius: 8px; margin-bottom: 10px; border-left: 3px solid {'#00ff88' if sent == 'positive' else '#ffff88' if sent == 'neutral' else '#ff4488'};'>
                             <p style='color: #cccccc; font-size: 12px; margin: 0;'><strong>{idx}.</strong> {c}</p>
@@ -735,49 +726,27 @@ if st.session_state.comments:
     col_btn_reset1, col_btn_reset2, col_btn_reset3 = st.columns([2, 2, 3])
     with col_btn_reset1:
         if st.button("🔄 Analisis Video Lain", type="primary", use_container_width=True):
-            keys = ['video_info','video_id','comments','timestamps','counts','percentages','valid_comments','samples','sentiment_texts','sentiment_data','scores','tfidf_words','sentiment_texts_original','comments_raw','timestamps_raw','scraped','is_running', 'comment_order', 'raw_comment_data']
+            keys = ['video_info','video_id','analysis','is_running', 'comment_order', 'inference_stats', 'run_metrics', 'analysis_source', 'report_key', 'job_id']
             for k in keys: st.session_state[k] = None
             st.rerun()
             
     with col_btn_reset2:
         # --- FITUR DOWNLOAD CSV ---
-        if st.session_state.get('raw_comment_data'):
-            
-            # Buat pemetaan dari teks komentar ke sentimen dan skor
-            text_to_sentiment_map = {
-                text: sent 
-                for sent, texts in st.session_state.sentiment_texts_original.items() 
-                for text in texts
-            }
-            text_to_score_map = {
-                text: score 
-                for sent, texts in st.session_state.sentiment_texts_original.items() 
-                for text, score in zip(texts, st.session_state.scores.get(sent, []))
-            }
-
-            # Siapkan data untuk diunduh
-            download_list = []
-            for item in st.session_state.raw_comment_data:
-                original_text = item['text']
-                cleaned_text = clean_comment(original_text)
-                sentiment = text_to_sentiment_map.get(original_text, "N/A (filtered)")
-                score = text_to_score_map.get(original_text, 0.0)
-                download_list.append({
-                    "Timestamp": item['timestamp'],
-                    "Komentar Asli": original_text,
-                    "Komentar Bersih": cleaned_text,
-                    "Sentimen": sentiment,
-                    "Skor Kepercayaan": score,
-                    "Jumlah Like": item['like_count']
-                })
-            
-            df_download = pd.DataFrame(download_list)
-            
-            @st.cache_data
-            def convert_df_to_csv(df):
-                return df.to_csv(index=False).encode('utf-8')
-
-            csv = convert_df_to_csv(df_download)
+        if analysis.fetched:
+            if analysis.out_of_core:
+                # Data lengkap ada di disk; CSV baru ditulis (per chunk) saat tombol pertama kali diklik
+                def csv(result=analysis):
+                    with open(result.export_csv(), 'rb') as f:
+                        return f.read()
+            else:
+                # Siapkan data untuk diunduh
+                df_download = analysis.export_frame()
+
+                @st.cache_data
+                def convert_df_to_csv(df):
+                    return df.to_csv(index=False).encode('utf-8')
+
+                csv = convert_df_to_csv(df_download)
 
             st.download_button(
                 label="📥 Download Data Komentar (.csv)",
@@ -787,5 +756,79 @@ if st.session_state.comments:
                 use_container_width=True
             )
 
+    with col_btn_reset3:
+        # --- FITUR DOWNLOAD PDF ---
+        if analysis.total:
+            # PDF disimpan di cache pdf_report per hasil analisis + setelan, jadi download ulang langsung jadi
+            report_id = (st.session_state.report_key, st.session_state.get('ts_resolution') or '6h',
+                         st.session_state.get('show_wc', True))
+            report_args = (report_id[0], analysis, st.session_state.video_info, st.session_state.video_id,
+                           *report_id[1:])
+            report_data = None
+            if DEFERRED_DOWNLOAD:
+                # PDF baru dibuat saat tombol diklik, di luar script run
+                report_data = lambda args=report_args: pdf_report.build_report(*args)
+            elif (st.session_state.get('pdf_requested') == report_id
+                  or st.button("📄 Siapkan Laporan (.pdf)", use_container_width=True)):
+                # Streamlit lama hanya menerima bytes: PDF dibuat di thread script setelah diminta,
+                # rerun berikutnya mengambilnya dari cache
+                st.session_state.pdf_requested = report_id
+                with st.spinner("Membuat laporan PDF..."):
+                    report_data = pdf_report.build_report(*report_args)
+            if report_data is not None:
+                st.download_button(
+                    label="📄 Download Laporan (.pdf)",
+                    data=report_data,
+                    file_name=f"laporan_{st.session_state.video_id}.pdf",
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+
+    # Isi slot word cloud setelah seluruh halaman hasil tergambar
+    for sent, slot in wc_slots.items():
+        png = wc_futures[sent].result()
+        if png:
+            slot.image(png, caption=f"Sentimen: {sent.upper()}", use_container_width=True)
+
+render_metrics.stop()
+
+# Waktu cold start: first paint dan model siap dilaporkan terpisah
+with st.sidebar:
+    first_paint = warmup.first_paint_seconds()
+    if model_loader.ready:
+        model_status = "gagal dimuat" if model_loader.error else f"{model_loader.ready_seconds:.1f}s"
+    else:
+        model_status = "memuat di background..."
+    st.caption(f"⏱️ First paint: {f'{first_paint:.1f}s' if first_paint is not None else '-'} • Model siap: {model_status}")
+    quota = get_quota_tracker()
+    st.caption(f"🔑 Kuota API hari ini (waktu Pasifik): {quota.used(API_KEY)}/{quota.daily_budget} unit")
+    job_stats = job_manager.stats()
+    st.caption(f"🧵 Analisis berjalan: {job_stats['running']}/{job_stats['max_workers']} • antre: {job_stats['queued']}/{job_stats['max_queued']}")
+
+    # Panel performa: waktu, item dan RSS per tahap (analisis terakhir + render halaman ini)
+    if st.checkbox("📊 Panel Performa", key='show_perf'):
+        import pandas as pd
+
+        def _perf_rows(stages, phase):
+            return [{
+                'Fase': phase, 'Tahap': name, 'Span': stage['calls'], 'Item': stage['items'],
+                'Total (s)': round(stage['seconds'], 3),
+                'Rata-rata (ms)': round(stage['seconds'] / stage['calls'] * 1000, 1),
+                'Item/s': round(stage['items'] / stage['seconds'], 1) if stage['seconds'] else None,
+                'RSS (MB)': round(stage['rss_bytes'] / 2**20, 1) if stage['rss_bytes'] is not None else None,
+            } for name, stage in sorted(stages.items(), key=lambda x: -x[1]['seconds'])]
+
+        rows = _perf_rows(st.session_state.get('run_metrics') or {}, 'analisis')
+        rows += _perf_rows(render_metrics.snapshot(), 'render')
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Belum ada data; jalankan analisis dulu.")
+        rss = metrics.current_rss()
+        if rss is not None:
+            st.caption(f"RSS proses saat ini: {rss / 2**20:.0f} MB")
+        with st.expander("Format Prometheus"):
+            st.code(metrics.prometheus_text(), language='text')
+
 st.markdown("<hr style='border: none; border-top: 1px solid #333333; margin: 40px 0 20px 0;'>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; color: #666666; font-size: 11px; margin: 0;'>© 2025 • YouTube Sentiment Analyzer • Dark Mode Modern Edition v1.0</p>", unsafe_allow_html=True)
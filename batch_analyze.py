@@ -0,0 +1,162 @@
+"""Analisis sentimen banyak video sekaligus tanpa Streamlit.
+
+Contoh:
+    python batch_analyze.py videos.txt --out-dir hasil --max-comments 1000 --workers 8
+
+``videos.txt`` berisi satu URL atau video ID per baris (baris kosong dan ``#`` diabaikan).
+API key dibaca dari ``--api-key`` atau env ``YOUTUBE_API_KEY``. Hasilnya satu CSV per
+video (``komentar_<video_id>.csv``) plus ``summary.csv``. Video yang fetch-nya berhenti di
+tengah (mis. kuota API habis) tetap dianalisis dengan status ``partial``; menjalankan ulang
+perintah yang sama melanjutkan fetch dari checkpoint terakhir.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import metrics
+import sentiment_core as core
+from comment_store import CommentStore
+from fetch_scheduler import new_fetch_status
+from sentiment_cache import SentimentCache
+from sharded_inference import DEFAULT_SHARD_SIZE, DEFAULT_WORKERS, load_classifier
+
+
+def _fetch_video(api_key, store, video_id, max_comments, order_by, include_replies=False):
+    info = core.fetch_video_info(api_key, video_id)
+    if info is None:
+        raise LookupError("video tidak ditemukan")
+    status = new_fetch_status()
+    comments = core.fetch_comments(api_key, store, video_id, max_comments, order_by, include_replies=include_replies,
+                                   status=status)
+    return info, comments, status
+
+
+def run_batch(video_ids, api_key, out_dir, max_comments=500, order_by='relevance', workers=4,
+              nlp=None, cache=None, store=None, progress=core.stderr_progress, batch_size=64, chunk_size=256,
+              backend=core.DEFAULT_BACKEND, include_replies=False, inference_workers=DEFAULT_WORKERS):
+    """Fetch semua video secara paralel (maks ``workers``) dan klasifikasi komentarnya dengan
+    satu model bersama. Komentar dari video yang berbeda digabung ke batch yang sama.
+    ``inference_workers`` > 0 membagi inference ke beberapa proses (``sharded_inference``).
+
+    Mengembalikan DataFrame ringkasan (juga ditulis ke ``summary.csv``)."""
+    os.makedirs(out_dir, exist_ok=True)
+    owns_nlp = nlp is None
+    if owns_nlp:
+        nlp = load_classifier(backend, inference_workers)
+        if inference_workers:
+            # Kumpulkan cukup teks supaya tiap worker kebagian satu shard penuh
+            chunk_size = max(chunk_size, DEFAULT_SHARD_SIZE * inference_workers)
+    cache = cache if cache is not None else SentimentCache(core.MODEL_NAME, core.model_version(nlp, backend))
+    store = store if store is not None else CommentStore()
+
+    fetched = {}
+    errors = {}
+    cleaned_by_text = {}
+    predictions = {}
+    stats = core.new_inference_stats()
+    pending = []
+    seen = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_fetch_video, api_key, store, vid, max_comments, order_by, include_replies): vid
+            for vid in video_ids
+        }
+        for future in as_completed(futures):
+            vid = futures[future]
+            try:
+                fetched[vid] = future.result()
+            except Exception as e:
+                errors[vid] = str(e)
+                progress(f"{vid}: gagal ({e})")
+                continue
+
+            # Inference berjalan sementara video lain masih di-fetch
+            with metrics.span('clean', len(fetched[vid][1])):
+                for item in fetched[vid][1]:
+                    cleaned_text = cleaned_by_text.get(item['text'])
+                    if cleaned_text is None:
+                        cleaned_text = cleaned_by_text[item['text']] = core.clean_comment(item['text'])
+                    if len(cleaned_text) > 10 and cleaned_text not in seen:
+                        seen.add(cleaned_text)
+                        pending.append(cleaned_text)
+            while len(pending) >= chunk_size:
+                core.predict_sentiment(nlp, cache, pending[:chunk_size], predictions, stats, batch_size=batch_size)
+                del pending[:chunk_size]
+            progress(f"{vid}: {len(fetched[vid][1])} komentar diambil "
+                     f"({len(fetched) + len(errors)}/{len(video_ids)} video, {len(predictions)} teks dianalisis)")
+
+    core.predict_sentiment(nlp, cache, pending, predictions, stats, batch_size=batch_size)
+
+    summary = []
+    for vid in video_ids:
+        if vid in errors:
+            summary.append({'video_id': vid, 'status': 'error', 'error': errors[vid]})
+            continue
+        info, comments, fetch_status = fetched[vid]
+        result = core.analyze_sentiment(
+            nlp, cache, comments, predictions=predictions, cleaned_by_text=cleaned_by_text,
+            batch_size=batch_size, fetch_status=fetch_status
+        )
+        result.export_frame().to_csv(os.path.join(out_dir, f"komentar_{vid}.csv"), index=False)
+        row = {'video_id': vid, 'status': 'partial' if result.partial else 'ok', 'error': fetch_status['message'],
+               'fetch_status': fetch_status['status'], 'quota_used': fetch_status['quota_used'],
+               'resumed': fetch_status['resumed'], 'title': info['title'],
+               'fetched': result.fetched, 'analyzed': result.total,
+               'replies': int(result.table['is_reply'].sum())}
+        counts, percentages = result.counts, result.percentages
+        for sent in core.SENTIMENTS:
+            row[f'{sent}_count'] = counts[sent]
+            row[f'{sent}_pct'] = percentages[sent]
+        if include_replies:
+            for sent, n in result.sentiment_by_reply()['reply'].items():
+                row[f'reply_{sent}_count'] = n
+        summary.append(row)
+
+    summary_df = pd.DataFrame(summary)
+    summary_df.to_csv(os.path.join(out_dir, 'summary.csv'), index=False)
+    progress(f"Selesai: {len(fetched)} video OK, {len(errors)} gagal • "
+             f"{stats['model_calls']} teks lewat model, {stats['cache_hits']} dari cache")
+    if owns_nlp and hasattr(nlp, 'close'):
+        nlp.close()
+    return summary_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis sentimen komentar banyak video YouTube (headless).")
+    parser.add_argument('input', help="File berisi URL atau video ID, satu per baris")
+    parser.add_argument('--out-dir', default='hasil', help="Folder output (default: hasil)")
+    parser.add_argument('--max-comments', type=int, default=500, help="Maks komentar per video (default: 500)")
+    parser.add_argument('--order', choices=['relevance', 'time'], default='relevance', help="Urutan komentar dari API")
+    parser.add_argument('--workers', type=int, default=4, help="Jumlah video yang di-fetch bersamaan (default: 4)")
+    parser.add_argument('--api-key', default=os.environ.get('YOUTUBE_API_KEY'), help="YouTube API key (default: env YOUTUBE_API_KEY)")
+    parser.add_argument('--backend', choices=core.BACKENDS, default=core.DEFAULT_BACKEND, help="Backend inference model")
+    parser.add_argument('--inference-workers', type=int, default=DEFAULT_WORKERS,
+                        help="Jumlah proses inference (0 = di proses ini; default: env SENTIMENT_WORKERS)")
+    parser.add_argument('--replies', action='store_true', help="Ikut ambil balasan komentar (dihitung dalam --max-comments)")
+    parser.add_argument('--quiet', action='store_true', help="Jangan tampilkan progress")
+    parser.add_argument('--metrics-out', help="Tulis metrik per tahap (format Prometheus) ke file ini di akhir run")
+    parser.add_argument('--metrics-log', help="Tulis satu baris JSON per span ke file ini ('-' = stderr)")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("API key belum diisi (--api-key atau env YOUTUBE_API_KEY)")
+
+    if args.metrics_log:
+        metrics.enable_json_log(args.metrics_log)
+    video_ids = core.read_video_ids(args.input)
+    progress = core.no_progress if args.quiet else core.stderr_progress
+    summary = run_batch(video_ids, args.api_key, args.out_dir, max_comments=args.max_comments,
+                        order_by=args.order, workers=args.workers, progress=progress, backend=args.backend,
+                        include_replies=args.replies, inference_workers=args.inference_workers)
+    if args.metrics_out:
+        with open(args.metrics_out, 'w', encoding='utf-8') as f:
+            f.write(metrics.prometheus_text())
+    return 0 if (summary['status'] == 'ok').any() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Korpus komentar sintetis (campuran Indonesia/Inggris) untuk benchmark offline.
+
+Distribusinya meniru komentar YouTube: kebanyakan pendek, banyak duplikat
+("first", "mantap"), sebagian berisi emoji, HTML dari ``textDisplay``, URL dan
+beberapa komentar panjang.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+_SHORT = [
+    "first", "mantap", "mantap bang", "keren", "nice", "wkwkwk", "gas terus", "hadir",
+    "mantul", "sip", "lanjut bang", "good job", "love it", "nyimak", "setuju",
+]
+_WORDS_ID = (
+    "video ini sangat bagus dan informatif terima kasih bang sudah berbagi ilmu semoga sukses selalu "
+    "jelek banget kualitasnya kecewa tidak sesuai judul clickbait parah buang waktu saja "
+    "menurut saya biasa saja tapi lumayan lah untuk pemula kontennya cukup membantu "
+    "harga naik terus rakyat makin susah pemerintah harus tegas jangan cuma janji "
+    "suaranya kurang jelas tolong diperbaiki editingnya sudah rapi musiknya enak didengar"
+).split()
+_WORDS_EN = (
+    "this video is really great and helpful thanks for sharing keep up the good work "
+    "worst content ever total waste of time misleading title so disappointed "
+    "not bad but could be better audio quality needs improvement nice editing though"
+).split()
+_EMOJI = ["😂", "🔥", "👍", "❤️", "😭", "🙏", "😡", "👏🏽", "🇮🇩"]
+_DECOR = [
+    lambda t, rng: t,
+    lambda t, rng: t,
+    lambda t, rng: t,
+    lambda t, rng: f"{t} {rng.choice(_EMOJI)}{rng.choice(_EMOJI)}",
+    lambda t, rng: f"<b>{t}</b><br>",
+    lambda t, rng: f"{t} &quot;setuju&quot; &amp; lanjut",
+    lambda t, rng: f"{t} cek https://youtu.be/abcdefghijk?t=42",
+    lambda t, rng: f"{t}\n\nwww.contoh.com",
+    lambda t, rng: t.upper() + "!!!",
+]
+
+
+def _sentence(rng, min_words, max_words):
+    words = _WORDS_ID if rng.random() < 0.75 else _WORDS_EN
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(min_words, max_words)))
+
+
+def make_corpus(n, seed=42):
+    """List of dict ``{'text', 'timestamp', 'like_count', 'comment_id', 'thread_id'}`` seperti
+    hasil fetch_comments, dengan ``n`` komentar. Deterministik untuk seed yang sama."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    comments = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < 0.25:
+            text = rng.choice(_SHORT)
+        elif roll < 0.90:
+            text = _sentence(rng, 4, 25)
+        else:
+            # Komentar panjang (curhat/argumen) yang dulu bikin satu batch ikut di-padding panjang
+            text = '. '.join(_sentence(rng, 15, 40) for _ in range(rng.randint(3, 10)))
+        text = rng.choice(_DECOR)(text, rng)
+        ts = start + timedelta(minutes=int(rng.expovariate(1 / 2000)))
+        comments.append({
+            'text': text,
+            'timestamp': ts.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'like_count': int(rng.paretovariate(1.5)) - 1,
+            'comment_id': f"c{i:07d}",
+            'thread_id': f"c{i:07d}",
+        })
+    return comments
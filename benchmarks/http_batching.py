@@ -0,0 +1,121 @@
+"""Throughput dan latensi ``inference_server`` dengan banyak klien bersamaan, dengan dan tanpa
+micro-batching.
+
+    python -m benchmarks.http_batching                                 # stub classifier, 32 klien
+    python -m benchmarks.http_batching --clients 64 --requests 50 --real-model
+
+Tiap klien mengirim ``--requests`` request ``/classify`` berisi ``--texts`` komentar lewat satu
+koneksi keep-alive. Baris ``per-request`` memakai ``max_batch=1`` (satu panggilan model per
+request); baris lain memakai micro-batcher dengan ``--max-batch``/``--max-wait-ms``. Latensi diukur
+di sisi klien. Stub classifier meniru biaya tetap per forward pass (``--call-ms``) ditambah biaya per
+teks (``--text-ms``); dengan ``--real-model`` model asli yang dipakai (butuh download model).
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+
+import sentiment_core as core
+from benchmarks.corpus import make_corpus
+from benchmarks.run import StubClassifier
+from inference_server import MicroBatcher, SentimentService, percentile, start_server
+
+
+class SlowStub(StubClassifier):
+    """Stub dengan biaya waktu: ``call_ms`` per panggilan + ``text_ms`` per teks."""
+
+    def __init__(self, call_ms, text_ms):
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+
+    def __call__(self, texts):
+        time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return super().__call__(texts)
+
+
+def run_clients(port, corpus, clients, requests, texts_per_request):
+    """Jalankan ``clients`` thread klien; kembalikan (latensi per request dalam detik, detik total)."""
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(clients + 1)
+
+    def client(c):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        own = []
+        start_gate.wait()
+        for r in range(requests):
+            offset = ((c * requests + r) * texts_per_request) % max(1, len(corpus) - texts_per_request)
+            body = json.dumps({'texts': corpus[offset:offset + texts_per_request]})
+            t0 = time.perf_counter()
+            conn.request('POST', '/classify', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            own.append(time.perf_counter() - t0)
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+        conn.close()
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return sorted(latencies), time.perf_counter() - t0
+
+
+def run_mode(nlp, corpus, max_batch, max_wait_ms, clients, requests, texts_per_request):
+    # Tanpa cache sentimen: tiap teks benar-benar lewat model
+    batcher = MicroBatcher(nlp, None, max_batch, max_wait_ms)
+    service = SentimentService(batcher)
+    server = start_server(service, 0)
+    try:
+        latencies, elapsed = run_clients(server.server_port, corpus, clients, requests, texts_per_request)
+    finally:
+        server.shutdown()
+        batcher.close()
+    stats = batcher.stats()
+    return {
+        'req_per_s': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'texts_per_batch': stats['texts_per_batch'],
+        'batches': stats['batches'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark micro-batching inference_server.")
+    parser.add_argument('--clients', type=int, default=32, help="Klien bersamaan (default: 32)")
+    parser.add_argument('--requests', type=int, default=20, help="Request per klien (default: 20)")
+    parser.add_argument('--texts', type=int, default=1, help="Komentar per request (default: 1)")
+    parser.add_argument('--max-batch', type=int, default=64, help="max_batch micro-batcher (default: 64)")
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[2.0, 5.0],
+                        help="Satu baris per nilai max_wait_ms (default: 2 5)")
+    parser.add_argument('--call-ms', type=float, default=20.0, help="Biaya stub per forward pass (default: 20)")
+    parser.add_argument('--text-ms', type=float, default=0.5, help="Biaya stub per teks (default: 0.5)")
+    parser.add_argument('--real-model', action='store_true', help="Pakai model asli, bukan stub")
+    args = parser.parse_args(argv)
+
+    nlp = core.load_sentiment_model() if args.real_model else SlowStub(args.call_ms, args.text_ms)
+    # Teks unik supaya deduplikasi di batcher tidak mengecilkan batch
+    corpus = [f"{c['text']} #{i}" for i, c in enumerate(make_corpus(args.clients * args.requests * args.texts + 1))]
+
+    modes = [('per-request', 1, 0.0)] + [(f"batch {args.max_batch}/{w:g}ms", args.max_batch, w) for w in args.max_wait_ms]
+    print(f"{args.clients} klien x {args.requests} request x {args.texts} teks "
+          f"({'model asli' if args.real_model else f'stub {args.call_ms:g} ms/panggilan + {args.text_ms:g} ms/teks'})")
+    print(f"{'mode':<20}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'teks/batch':>12}{'batch':>8}")
+    for label, max_batch, max_wait_ms in modes:
+        r = run_mode(nlp, corpus, max_batch, max_wait_ms, args.clients, args.requests, args.texts)
+        print(f"{label:<20}{r['req_per_s']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['texts_per_batch']:>12.1f}{r['batches']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Scaling inference multi-proses: komentar/detik untuk 1..N worker ``ShardedClassifier``.
+
+    python -m benchmarks.inference_scaling                                  # 1, 2, 4, ... sampai jumlah core
+    python -m benchmarks.inference_scaling --workers 1 2 4 8 16 --comments 5000 --backend quantized
+
+Butuh model asli (download pertama kali). Baris ``in-process`` adalah model biasa di proses ini
+dengan jumlah thread torch bawaan, sebagai pembanding; ``agreement`` membandingkan label tiap
+mode dengan baris itu.
+"""
+import argparse
+import os
+import sys
+import time
+
+import sentiment_core as core
+import warmup
+from benchmarks.corpus import make_corpus
+from sharded_inference import ShardedClassifier, default_threads_per_worker
+
+
+def default_worker_counts():
+    cores = os.cpu_count() or 1
+    counts = []
+    n = 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def classify(nlp, texts, batch_size=64):
+    """Label semua teks lewat jalur inference yang sama dengan analisis, urut sesuai input."""
+    labels = [None] * len(texts)
+    for indices, results in core.iter_classified(nlp, texts, batch_size=batch_size):
+        for j, r in zip(indices, results):
+            labels[j] = r['label']
+    return labels
+
+
+def run_scaling(texts, worker_counts, backend=core.DEFAULT_BACKEND, threads_per_worker=None, loader=None,
+                batch_size=64):
+    """Satu baris per mode: workers, threads, load_s, seconds, comments_per_s, speedup, agreement."""
+    import torch
+
+    rows = []
+    start = time.perf_counter()
+    nlp = loader() if loader else core.load_sentiment_model(backend)
+    warmup.warm_up_model(nlp)
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    baseline = classify(nlp, texts, batch_size)
+    baseline_s = time.perf_counter() - start
+    rows.append({'mode': 'in-process', 'workers': 0, 'threads': torch.get_num_threads(), 'load_s': load_s,
+                 'seconds': baseline_s, 'agreement': 1.0})
+    del nlp
+
+    for workers in worker_counts:
+        threads = threads_per_worker or default_threads_per_worker(workers)
+        start = time.perf_counter()
+        with ShardedClassifier(backend, workers=workers, threads_per_worker=threads, loader=loader) as clf:
+            # Satu shard kecil per worker supaya semua proses sudah hidup dan model ter-load sebelum diukur
+            classify(clf, texts[:workers * 4], batch_size)
+            load_s = time.perf_counter() - start
+            start = time.perf_counter()
+            labels = classify(clf, texts, batch_size)
+            seconds = time.perf_counter() - start
+        agreement = sum(a == b for a, b in zip(labels, baseline)) / len(texts)
+        rows.append({'mode': 'sharded', 'workers': workers, 'threads': threads, 'load_s': load_s,
+                     'seconds': seconds, 'agreement': agreement})
+
+    for row in rows:
+        row['comments_per_s'] = len(texts) / row['seconds'] if row['seconds'] else 0.0
+        row['speedup'] = baseline_s / row['seconds'] if row['seconds'] else 0.0
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur scaling inference dari 1 sampai N worker process.")
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts())
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help="Default: jumlah core dibagi jumlah worker")
+    parser.add_argument('--comments', type=int, default=5000)
+    parser.add_argument('--backend', choices=core.BACKENDS, default=core.DEFAULT_BACKEND)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    texts = [c for c in dict.fromkeys(core.clean_comment(c['text']) for c in make_corpus(args.comments * 2))
+             if len(c) > 10][:args.comments]
+    print(f"{len(texts)} komentar unik, {os.cpu_count()} core", file=sys.stderr)
+    rows = run_scaling(texts, args.workers, args.backend, args.threads_per_worker, batch_size=args.batch_size)
+    print(f"{'mode':<11} {'workers':>7} {'threads':>7} {'load_s':>8} {'seconds':>9} {'komentar/s':>11} "
+          f"{'speedup':>8} {'agreement':>9}")
+    for r in rows:
+        print(f"{r['mode']:<11} {r['workers']:>7} {r['threads']:>7} {r['load_s']:>8.2f} {r['seconds']:>9.2f} "
+              f"{r['comments_per_s']:>11.1f} {r['speedup']:>8.2f} {r['agreement']:>9.4f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Micro-benchmark jalur panas: cleaning, inference, agregasi, TF-IDF dan word cloud.
+
+Jalankan dari root repo:
+    python -m benchmarks.run                               # 100, 1k, 5k, 50k komentar, stub classifier
+    python -m benchmarks.run --sizes 1000 --real-model     # tambah model asli (butuh download model)
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # exit 1 kalau ada regresi
+
+Tiap stage melaporkan waktu (terbaik dari ``--repeat``), throughput (item/detik) dan
+peak memori alokasi Python (tracemalloc; memori tensor torch tidak ikut terhitung).
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import zlib
+
+import cleaning
+import sentiment_core as core
+import term_index
+from benchmarks.corpus import make_corpus
+
+DEFAULT_SIZES = [100, 1000, 5000, 50000]
+DEFAULT_THRESHOLD = 0.20
+
+
+class StubClassifier:
+    """Pengganti pipeline tanpa model: label deterministik dari hash teks, format output sama."""
+
+    def __call__(self, texts):
+        results = []
+        for text in texts:
+            h = zlib.crc32(text.encode('utf-8'))
+            results.append({'label': core.SENTIMENTS[h % 3], 'score': 0.5 + (h % 500) / 1000})
+        return results
+
+
+def measure(fn, repeat=1):
+    """Jalankan ``fn`` ``repeat`` kali untuk waktu terbaik, lalu sekali lagi di bawah tracemalloc
+    (tracemalloc memperlambat eksekusi, jadi tidak dicampur dengan pengukuran waktu).
+    Kembalikan (hasil, detik terbaik, peak byte)."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def run_size(n, models, repeat=1, wordcloud=True):
+    """Semua stage untuk korpus ``n`` komentar; ``models`` berisi ``(label, classifier)``."""
+    comments = make_corpus(n)
+    texts = [c['text'] for c in comments]
+    rows = []
+
+    def record(stage, items, seconds, peak):
+        rows.append({
+            'size': n, 'stage': stage, 'items': items, 'seconds': round(seconds, 6),
+            'items_per_s': round(items / seconds, 1) if seconds else 0.0,
+            'peak_mb': round(peak / 1e6, 2),
+        })
+
+    _, s, p = measure(lambda: [cleaning.clean_comment_reference(t) for t in texts], repeat)
+    record('clean_reference', n, s, p)
+
+    def _clean_cold():
+        cleaning.clean_comment.cache_clear()
+        return cleaning.clean_many(texts)
+    cleaned, s, p = measure(_clean_cold, repeat)
+    record('clean', n, s, p)
+
+    valid = [c for c in cleaned if len(c) > 10]
+    _, s, p = measure(lambda: [core.clean_for_visualization(c) for c in valid], repeat)
+    record('clean_for_visualization', len(valid), s, p)
+
+    for label, nlp in models:
+        result, s, p = measure(lambda: core.analyze_sentiment(nlp, None, comments), repeat)
+        record(f'analyze[{label}]', n, s, p)
+    # Teks per sentimen dari model terakhir dipakai untuk stage TF-IDF dan word cloud
+    texts_clean = {sent: result.texts_clean(sent) for sent in core.SENTIMENTS}
+
+    n_texts = sum(len(v) for v in texts_clean.values())
+    reference, s, p = measure(lambda: term_index.tfidf_words_reference(texts_clean), repeat)
+    record('tfidf_reference', n_texts, s, p)
+
+    def _term_index():
+        terms = term_index.TermIndex(core.SENTIMENTS)
+        for sent in core.SENTIMENTS:
+            for text in texts_clean[sent]:
+                terms.add(sent, text)
+        return terms.tfidf_words()
+    tfidf, s, p = measure(_term_index, repeat)
+    record('term_index', n_texts, s, p)
+    if [[w for w, _ in tfidf[sent]] for sent in core.SENTIMENTS] != [[w for w, _ in reference[sent]] for sent in core.SENTIMENTS]:
+        print(f"PERINGATAN: TF-IDF TermIndex beda dari referensi sklearn ({n} komentar)", file=sys.stderr)
+
+    if wordcloud:
+        frequencies = {sent: result.word_counts(sent) for sent in core.SENTIMENTS}
+
+        def _wordclouds():
+            core._wordcloud_cache.clear()
+            futures = core.render_wordclouds_async(frequencies)
+            return [f.result() for f in futures.values()]
+        _, s, p = measure(_wordclouds, repeat)
+        record('wordcloud', len(core.SENTIMENTS), s, p)
+
+        _, s, p = measure(lambda: [core.render_wordcloud(frequencies[sent]) for sent in core.SENTIMENTS], repeat)
+        record('wordcloud_cached', len(core.SENTIMENTS), s, p)
+    return rows
+
+
+def compare(rows, baseline, threshold):
+    """Stage yang throughput-nya turun lebih dari ``threshold`` dibanding baseline."""
+    base = {(r['size'], r['stage']): r for r in baseline}
+    regressions = []
+    for r in rows:
+        b = base.get((r['size'], r['stage']))
+        if b and b['items_per_s'] and r['items_per_s'] < b['items_per_s'] * (1 - threshold):
+            regressions.append((r, b))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cleaning, inference dan agregasi.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--real-model', action='store_true', help="Ikut ukur model asli (selain stub)")
+    parser.add_argument('--backend', choices=core.BACKENDS, default=core.DEFAULT_BACKEND)
+    parser.add_argument('--no-wordcloud', action='store_true')
+    parser.add_argument('--output', help="Simpan hasil ke file JSON")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Simpan hasil sebagai baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="Bandingkan dengan baseline, exit 1 kalau regresi")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Batas penurunan throughput yang dianggap regresi (default 0.20)")
+    args = parser.parse_args(argv)
+
+    mismatches = cleaning.verify_against_reference(
+        cleaning.REGRESSION_CORPUS + [c['text'] for c in make_corpus(2000, seed=7)]
+    )
+    if mismatches:
+        print(f"PERINGATAN: clean_comment beda dari referensi di {len(mismatches)} teks", file=sys.stderr)
+
+    models = [('stub', StubClassifier())]
+    if args.real_model:
+        models.append((args.backend, core.load_sentiment_model(args.backend)))
+
+    rows = []
+    for n in args.sizes:
+        for r in run_size(n, models, repeat=args.repeat, wordcloud=not args.no_wordcloud):
+            rows.append(r)
+            print(f"{r['size']:>6} {r['stage']:<26} {r['seconds']:>10.4f}s "
+                  f"{r['items_per_s']:>12.1f}/s {r['peak_mb']:>9.2f} MB", flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(rows, json.load(f), args.threshold)
+        for r, b in regressions:
+            print(f"REGRESI {r['size']} {r['stage']}: {r['items_per_s']}/s (baseline {b['items_per_s']}/s)",
+                  file=sys.stderr)
+        return 1 if regressions or mismatches else 0
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
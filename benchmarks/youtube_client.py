@@ -0,0 +1,64 @@
+"""Latency per panggilan YouTube API: build client per panggilan (cara lama) vs client pool.
+
+    python -m benchmarks.youtube_client                       # offline: biaya build client saja
+    python -m benchmarks.youtube_client --live VIDEO_ID       # + panggilan videos().list sungguhan
+
+Mode ``--live`` butuh env ``YOUTUBE_API_KEY`` dan memakai 1 unit kuota per panggilan.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import sentiment_core as core
+
+
+def _timings(fn, calls):
+    out = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<28} p50 {statistics.median(timings):>8.2f} ms   p95 {p95:>8.2f} ms   "
+          f"total {sum(timings):>9.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan latency client YouTube per panggilan.")
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--live', metavar='VIDEO_ID', help="Ikut ukur panggilan videos().list sungguhan")
+    args = parser.parse_args(argv)
+    api_key = os.environ.get('YOUTUBE_API_KEY', 'dummy-key')
+
+    _report("build per panggilan", _timings(lambda: core._build_youtube(api_key), args.calls))
+
+    def _pooled():
+        with core.youtube_client(api_key):
+            pass
+    _report("client pool", _timings(_pooled, args.calls))
+
+    if args.live:
+        if 'YOUTUBE_API_KEY' not in os.environ:
+            parser.error("--live butuh env YOUTUBE_API_KEY")
+
+        def _fresh_call():
+            core._build_youtube(api_key).videos().list(part="snippet", id=args.live).execute()
+
+        def _pooled_call():
+            with core.youtube_client(api_key) as youtube:
+                youtube.videos().list(part="snippet", id=args.live).execute()
+
+        _report("live: build per panggilan", _timings(_fresh_call, args.calls))
+        _report("live: client pool", _timings(_pooled_call, args.calls))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
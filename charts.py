@@ -0,0 +1,103 @@
+"""Grafik dan kartu ringkasan sentimen yang dipakai bersama oleh hasil akhir, tampilan sementara
+dan laporan PDF.
+
+Kartu, pie dan tren hanya menerima angka agregat (jumlah, persentase, frame tren), jadi bisa diisi
+dari ``AnalysisResult`` maupun ``RunningAggregate`` dan tampilannya identik.
+"""
+import metrics
+
+# Urutan kartu dan warna mengikuti tampilan Overview
+SENTIMENT_LABELS = {'positive': 'Positif', 'neutral': 'Netral', 'negative': 'Negatif'}
+PIE_COLORS = {"Positif": "#00ff88", "Netral": "#ffff88", "Negatif": "#C62828"}
+
+_CARD_STYLES = {
+    'positive': ('#1a3a1a, #2a5a2a', '#3a7a3a', '#88dd88', '#00ff00', '#66cc66', 'POSITIF'),
+    'neutral': ('#3a3a1a, #5a5a2a', '#7a7a3a', '#dddd88', '#ffff00', '#cccc66', 'NETRAL'),
+    'negative': ('#3a1a1a, #5a2a2a', '#7a3a3a', '#dd8888', '#ff4488', '#cc6666', 'NEGATIF'),
+}
+
+
+def sentiment_card_html(sent, count, percentage):
+    """Kartu persentase + jumlah komentar untuk satu sentimen."""
+    gradient, border, title_color, value_color, count_color, title = _CARD_STYLES[sent]
+    return f"""
+            <div style='background: linear-gradient(135deg, {gradient}); padding: 20px; border-radius: 12px; border: 1px solid {border}; text-align: center;'>
+                <p style='color: {title_color}; font-size: 12px; margin: 0 0 8px 0;'>{title}</p>
+                <p style='color: {value_color}; font-size: 32px; font-weight: 700; margin: 0;'>{percentage}%</p>
+                <p style='color: {count_color}; font-size: 12px; margin: 8px 0 0 0;'>{count} komentar</p>
+            </div>
+            """
+
+
+def pie_figure(percentages):
+    import pandas as pd
+    import plotly.express as px
+
+    with metrics.span('plotly_pie', len(SENTIMENT_LABELS)):
+        pie_df = pd.DataFrame({
+            "Sentimen": [SENTIMENT_LABELS[sent] for sent in SENTIMENT_LABELS],
+            "Jumlah": [percentages[sent] for sent in SENTIMENT_LABELS]
+        })
+        fig = px.pie(pie_df,
+                     values='Jumlah',
+                     names='Sentimen',
+                     color='Sentimen',
+                     color_discrete_map=PIE_COLORS,
+                     template="plotly_dark",
+                     hole=0.3)
+        fig.update_layout(height=450, font=dict(size=12))
+    return fig
+
+
+def trend_figure(frame, bucket_label):
+    """Garis jumlah komentar per sentimen; ``frame`` dari ``build_timeseries``/``RunningAggregate``."""
+    import plotly.express as px
+
+    with metrics.span('plotly_trend', len(frame)):
+        fig = px.line(frame, template="plotly_dark", title=f"Tren Sentimen per {bucket_label}",
+                      markers=True, line_shape='spline')
+        fig.update_layout(height=450, font=dict(size=12), hovermode='x unified')
+    return fig
+
+
+def top_words_figure(top, sent):
+    """Bar horizontal frekuensi kata; ``top`` list ``(kata, jumlah)`` dari ``TermIndex.top``."""
+    import pandas as pd
+    import plotly.express as px
+
+    with metrics.span('plotly_top_words', len(top)):
+        df = pd.DataFrame(top, columns=['Kata', 'Frekuensi'])
+        fig = px.bar(df, x='Frekuensi', y='Kata', orientation='h',
+                     template="plotly_dark", title=f"{sent.upper()}",
+                     color='Frekuensi', color_continuous_scale='Viridis')
+        fig.update_layout(height=400, showlegend=False, font=dict(size=11))
+    return fig
+
+
+def tfidf_figure(top_tfidf, sent):
+    """Bar horizontal skor TF-IDF; ``top_tfidf`` list ``(kata, skor)`` dari ``tfidf_words``."""
+    import pandas as pd
+    import plotly.express as px
+
+    with metrics.span('plotly_tfidf', len(top_tfidf)):
+        df = pd.DataFrame(top_tfidf, columns=['Kata', 'Score'])
+        fig = px.bar(df, x='Score', y='Kata', orientation='h',
+                     template="plotly_dark", title=f"{sent.upper()}",
+                     color='Score', color_continuous_scale='Turbo')
+        fig.update_layout(height=400, showlegend=False, font=dict(size=11))
+    return fig
+
+
+def box_figure(analyzed):
+    """Box plot confidence score per sentimen; ``analyzed`` baris berlabel dari ``AnalysisResult``."""
+    import pandas as pd
+    import plotly.express as px
+
+    with metrics.span('plotly_box', len(analyzed)):
+        analyzed = analyzed.sort_values('sentiment', kind='stable')
+        score_df = pd.DataFrame({'Sentimen': analyzed['sentiment'].astype(str), 'Score': analyzed['score']})
+        fig = px.box(score_df, x='Sentimen', y='Score', template="plotly_dark",
+                     title="Box Plot Distribusi Score", color='Sentimen',
+                     color_discrete_map={'positive': '#00ff88', 'neutral': '#ffff88', 'negative': '#ff4488'})
+        fig.update_layout(height=450, font=dict(size=12))
+    return fig
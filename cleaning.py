@@ -0,0 +1,133 @@
+"""Pembersihan teks komentar: pola regex dikompilasi sekali, langkah yang tidak perlu dilewati,
+dan hasil di-memo per teks input.
+
+Output ``clean_comment`` harus identik byte-per-byte dengan implementasi lama
+(``clean_comment_reference``); cek dengan ``verify_against_reference``.
+"""
+import re
+from functools import lru_cache
+
+import emoji
+
+_TAG_RE = re.compile(r'<[^>]+>')
+# &.*?; sudah mencakup &nbsp; &lt; &gt; &amp; &quot; &#39; (match terpendek dari posisi yang sama)
+_ENTITY_RE = re.compile(r'&.*?;')
+_URL_RE = re.compile(r'http[s]?://\S+')
+_WWW_RE = re.compile(r'www\.\S+')
+# Sekali jalan untuk newline/tab + multiple spaces: tiap run whitespace jadi satu spasi
+_SPACE_RE = re.compile(r'\s+')
+_SPECIAL_RE = re.compile(r'[^a-z0-9\s]')
+
+MEMO_SIZE = 100_000
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def clean_comment(text):
+    # Tag dan entity harus dua langkah terpisah (urutan hapusnya berpengaruh, mis. "&<;>")
+    if '<' in text:
+        text = _TAG_RE.sub('', text)
+    if '&' in text:
+        text = _ENTITY_RE.sub('', text)
+
+    # Semua emoji non-ASCII, jadi teks ASCII murni bisa lewat
+    if not text.isascii():
+        text = emoji.replace_emoji(text, "")
+
+    # URL juga dua langkah: "www.http://x" hasilnya beda kalau digabung jadi satu regex
+    if 'http' in text:
+        text = _URL_RE.sub('', text)
+    if 'www.' in text:
+        text = _WWW_RE.sub('', text)
+
+    text = _SPACE_RE.sub(' ', text).strip().lower()
+    return _SPECIAL_RE.sub('', text)
+
+
+def clean_many(texts):
+    """Bersihkan banyak teks sekaligus. Terima list/iterable (hasil list) atau pandas Series
+    (hasil Series dengan index yang sama); teks yang sama hanya dibersihkan sekali."""
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+    if pd is not None and isinstance(texts, pd.Series):
+        codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+        cleaned = [clean_comment(t) for t in uniques]
+        return pd.Series([cleaned[c] for c in codes], index=texts.index, name=texts.name, dtype=object)
+
+    memo = {}
+    out = []
+    for text in texts:
+        cleaned = memo.get(text)
+        if cleaned is None:
+            cleaned = memo[text] = clean_comment(text)
+        out.append(cleaned)
+    return out
+
+
+def clean_comment_reference(text):
+    """Implementasi lama (delapan re.sub berurutan), dipakai sebagai acuan regresi."""
+    # Hapus HTML tags dan entities
+    text = re.sub(r'<[^>]+>', '', text)  # Hapus HTML tags
+    text = re.sub(r'&nbsp;|&lt;|&gt;|&amp;|&quot;|&#39;|&.*?;', '', text)  # Hapus HTML entities
+
+    # Hapus emoji
+    text = emoji.replace_emoji(text, "")
+
+    # Hapus URL
+    text = re.sub(r'http[s]?://\S+', '', text)
+    text = re.sub(r'www\.\S+', '', text)
+
+    # Hapus newline dan carriage return
+    text = re.sub(r'[\n\r\t]+', ' ', text)
+
+    # Hapus multiple spaces
+    text = re.sub(r'\s+', ' ', text)
+
+    # Strip whitespace di awal dan akhir, lowercase
+    text = text.strip().lower()
+
+    # Hapus special characters tapi jaga huruf, angka, dan spasi
+    text = re.sub(r'[^a-z0-9\s]', '', text)
+
+    return text
+
+
+# Kasus-kasus pinggir yang pernah/bisa bikin hasil beda kalau regex digabung sembarangan
+REGRESSION_CORPUS = [
+    "",
+    "   ",
+    "Mantap!!! 🔥🔥🔥",
+    "Videonya <b>bagus</b> banget &amp; informatif 👍",
+    "Keren bgt bang<br><br>lanjutkan &quot;konten&quot; kayak gini",
+    "cek www.contoh.com dan https://youtu.be/abcdefghijk?t=10 ya",
+    "www.http://x sisa",
+    "&<;> aneh",
+    "&a<b>; nested",
+    "<a href=\"https://x.com\">link</a> &#39;kutip&#39;",
+    "baris1\nbaris2\r\nbaris3\t\ttab",
+    "Spasi    banyak   nbsp unicode em",
+    "İstanbul ÇOK güzel",
+    "Ｆｕｌｌｗｉｄｔｈ ａｂｃ １２３",
+    "Emoji keycap #️⃣ 1️⃣ dan bendera 🇮🇩 serta ZWJ 👨‍👩‍👧",
+    "harga 10.000, diskon 50% -- #promo @admin",
+    "&nbsp;&lt;&gt;&amp;&quot;&#39;",
+    "& tanpa titik koma",
+    "akhir dengan http://",
+    "MiXeD CaSe 123 ABC",
+    "😀",
+    "<<>> <> < >",
+    "first",
+]
+
+
+def verify_against_reference(texts=None):
+    """Kembalikan daftar ``(teks, hasil_lama, hasil_baru)`` yang berbeda (kosong = identik)."""
+    texts = REGRESSION_CORPUS if texts is None else texts
+    mismatches = []
+    for text in texts:
+        expected = clean_comment_reference(text)
+        actual = clean_comment(text)
+        if expected.encode('utf-8') != actual.encode('utf-8'):
+            mismatches.append((text, expected, actual))
+    return mismatches
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+# Lokasi default database komentar (bisa diganti lewat env COMMENT_STORE_PATH)
+DEFAULT_STORE_PATH = os.environ.get('COMMENT_STORE_PATH', os.path.join('.cache', 'comments.sqlite3'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id   TEXT PRIMARY KEY,
+    video_id     TEXT NOT NULL,
+    thread_id    TEXT NOT NULL,
+    text         TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    like_count   INTEGER NOT NULL DEFAULT 0,
+    fetched_at   TEXT NOT NULL,
+    parent_id    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_video_time ON comments (video_id, published_at);
+
+CREATE TABLE IF NOT EXISTS videos (
+    video_id         TEXT PRIMARY KEY,
+    high_water       TEXT,
+    low_water        TEXT,
+    resume_token     TEXT,
+    history_complete INTEGER NOT NULL DEFAULT 0,
+    updated_at       TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fetch_checkpoints (
+    video_id    TEXT NOT NULL,
+    fetch_key   TEXT NOT NULL,
+    page_token  TEXT,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (video_id, fetch_key)
+);
+
+CREATE TABLE IF NOT EXISTS checkpoint_comments (
+    video_id   TEXT NOT NULL,
+    fetch_key  TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    comment_id TEXT NOT NULL,
+    PRIMARY KEY (video_id, fetch_key, seq)
+);
+"""
+
+# Checkpoint lebih tua dari ini tidak dilanjutkan (token halaman dan urutan relevansi sudah basi)
+CHECKPOINT_MAX_AGE = timedelta(hours=6)
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _comment(row):
+    return {
+        'text': row['text'],
+        'timestamp': row['published_at'],
+        'like_count': row['like_count'],
+        'comment_id': row['comment_id'],
+        'thread_id': row['thread_id'],
+        'parent_id': row['parent_id'],
+        'is_reply': row['parent_id'] is not None,
+    }
+
+
+class CommentStore:
+    """Penyimpanan komentar per video di SQLite.
+
+    Untuk tiap video disimpan rentang waktu yang tersambung (tanpa lubang) dari
+    komentar terbaru (``high_water``) sampai komentar terlama yang sudah diambil
+    (``low_water``), plus ``resume_token`` untuk melanjutkan paging ``order=time``.
+
+    Fetch urutan lain menyimpan checkpoint (token halaman berikutnya + id komentar yang sudah
+    diambil) supaya fetch yang terputus (kuota habis, error, app ditutup) bisa dilanjutkan.
+    Balasan ikut disimpan (``parent_id`` terisi) tapi tidak pernah dibaca jalur ``order=time``.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # Koneksi baru per operasi supaya aman dipakai dari beberapa thread/sesi
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_state(self, video_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_state(self, video_id, high_water, low_water, resume_token, history_complete):
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO videos (video_id, high_water, low_water, resume_token, history_complete, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(video_id) DO UPDATE SET
+                       high_water = excluded.high_water, low_water = excluded.low_water,
+                       resume_token = excluded.resume_token, history_complete = excluded.history_complete,
+                       updated_at = excluded.updated_at""",
+                (video_id, high_water, low_water, resume_token, int(bool(history_complete)), _now())
+            )
+
+    def upsert_comments(self, video_id, comments):
+        if not comments:
+            return
+        fetched_at = _now()
+        rows = [
+            (c['comment_id'], video_id, c['thread_id'], c['text'], c['timestamp'], c['like_count'], fetched_at,
+             c.get('parent_id'))
+            for c in comments
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                """INSERT INTO comments (comment_id, video_id, thread_id, text, published_at, like_count, fetched_at,
+                                         parent_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(comment_id) DO UPDATE SET
+                       text = excluded.text, like_count = excluded.like_count, fetched_at = excluded.fetched_at""",
+                rows
+            )
+
+    def iter_comments(self, video_id, limit, low_water=None, page_size=1000):
+        """Komentar utama terbaru dulu (sama seperti urutan ``order=time`` dari API), per halaman
+        (keyset pagination): memori tidak tergantung jumlah komentar, dan tiap halaman query sendiri
+        supaya tidak menahan lock baca."""
+        last = None
+        while limit > 0:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"""SELECT comment_id, thread_id, text, published_at, like_count, parent_id FROM comments
+                        WHERE video_id = ? AND published_at >= ? AND parent_id IS NULL
+                        {'AND (published_at < ? OR (published_at = ? AND comment_id > ?))' if last else ''}
+                        ORDER BY published_at DESC, comment_id LIMIT ?""",
+                    (video_id, low_water or '', *((last[0], last[0], last[1]) if last else ()), min(page_size, limit))
+                ).fetchall()
+            if not rows:
+                return
+            limit -= len(rows)
+            last = (rows[-1]['published_at'], rows[-1]['comment_id'])
+            yield [_comment(r) for r in rows]
+
+    def get_checkpoint(self, video_id, fetch_key, max_age=CHECKPOINT_MAX_AGE):
+        """``{'page_token', 'count'}`` dari fetch yang belum selesai, atau None. ``count`` = jumlah
+        komentar yang sudah diambil (dibaca lewat ``iter_checkpoint_comments``)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM fetch_checkpoints WHERE video_id = ? AND fetch_key = ?", (video_id, fetch_key)
+            ).fetchone()
+            count = conn.execute(
+                "SELECT COUNT(*) FROM checkpoint_comments WHERE video_id = ? AND fetch_key = ?", (video_id, fetch_key)
+            ).fetchone()[0]
+        if not row:
+            return None
+        updated = datetime.strptime(row['updated_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - updated > max_age:
+            self.clear_checkpoint(video_id, fetch_key)
+            return None
+        return {'page_token': row['page_token'], 'count': count}
+
+    def save_checkpoint(self, video_id, fetch_key, page_token, comment_ids, start=0):
+        """Catat token halaman berikutnya dan id komentar halaman terakhir (urutan ke-``start`` dst).
+        Hanya id baru yang ditulis, jadi biaya per halaman tetap walaupun fetch sudah ratusan ribu komentar."""
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO fetch_checkpoints (video_id, fetch_key, page_token, updated_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(video_id, fetch_key) DO UPDATE SET
+                       page_token = excluded.page_token, updated_at = excluded.updated_at""",
+                (video_id, fetch_key, page_token, _now())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint_comments (video_id, fetch_key, seq, comment_id) VALUES (?, ?, ?, ?)",
+                [(video_id, fetch_key, seq, cid) for seq, cid in enumerate(comment_ids, start)]
+            )
+
+    def iter_checkpoint_comments(self, video_id, fetch_key, limit, page_size=100):
+        """Komentar checkpoint sesuai urutan fetch, per halaman; id yang tidak ada dilewati."""
+        for start in range(0, limit, page_size):
+            with self._connect() as conn:
+                rows = conn.execute(
+                    """SELECT c.comment_id, c.thread_id, c.text, c.published_at, c.like_count, c.parent_id
+                       FROM checkpoint_comments k JOIN comments c ON c.comment_id = k.comment_id
+                       WHERE k.video_id = ? AND k.fetch_key = ? AND k.seq >= ? AND k.seq < ?
+                       ORDER BY k.seq""",
+                    (video_id, fetch_key, start, min(start + page_size, limit))
+                ).fetchall()
+            if rows:
+                yield [_comment(r) for r in rows]
+
+    def clear_checkpoint(self, video_id, fetch_key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM fetch_checkpoints WHERE video_id = ? AND fetch_key = ?", (video_id, fetch_key))
+            conn.execute("DELETE FROM checkpoint_comments WHERE video_id = ? AND fetch_key = ?", (video_id, fetch_key))
@@ -0,0 +1,86 @@
+"""Bandingkan backend inference (pytorch, quantized, onnx) terhadap baseline fp32.
+
+Contoh:
+    python compare_backends.py hasil/komentar_xxxxxxxxxxx.csv --backends pytorch quantized onnx
+
+Input bisa CSV hasil export (kolom ``Komentar Bersih``) atau file teks satu komentar per
+baris. Laporan berisi waktu load, throughput (komentar/detik) dan label agreement rate
+setiap backend dibanding ``pytorch`` fp32.
+"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+import sentiment_core as core
+
+
+def read_texts(path, limit=None):
+    if path.endswith('.csv'):
+        texts = pd.read_csv(path)['Komentar Bersih'].dropna().astype(str).tolist()
+    else:
+        with open(path, encoding='utf-8') as f:
+            texts = [core.clean_comment(line) for line in f]
+    texts = [t for t in texts if len(t) > 10]
+    return texts[:limit] if limit else texts
+
+
+def run_backend(nlp, texts, batch_size=64):
+    """Jalankan model di semua teks; kembalikan (hasil, detik)."""
+    nlp(texts[:batch_size])  # warm-up supaya waktu load/JIT tidak ikut terhitung
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(texts), batch_size):
+        results.extend(nlp(texts[i:i+batch_size]))
+    return results, time.perf_counter() - start
+
+
+def compare_backends(texts, backends=core.BACKENDS, batch_size=64):
+    """Laporan per backend: load_s, infer_s, comments_per_s, speedup, agreement (vs pytorch fp32)."""
+    baseline = None
+    baseline_s = None
+    report = []
+    for backend in ['pytorch'] + [b for b in backends if b != 'pytorch']:
+        start = time.perf_counter()
+        try:
+            nlp = core.load_sentiment_model(backend)
+        except ImportError as e:
+            report.append({'backend': backend, 'error': str(e)})
+            continue
+        load_s = time.perf_counter() - start
+
+        results, infer_s = run_backend(nlp, texts, batch_size)
+        labels = [r['label'].lower() for r in results]
+        if baseline is None:
+            baseline, baseline_s = labels, infer_s
+        agreement = sum(a == b for a, b in zip(labels, baseline)) / len(labels) if labels else 0.0
+        report.append({
+            'backend': backend, 'error': '',
+            'load_s': round(load_s, 2), 'infer_s': round(infer_s, 2),
+            'comments_per_s': round(len(texts) / infer_s, 1) if infer_s else 0.0,
+            'speedup': round(baseline_s / infer_s, 2) if infer_s else 0.0,
+            'agreement': round(agreement, 4),
+        })
+        del nlp
+    return pd.DataFrame(report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parity check dan throughput backend inference sentimen.")
+    parser.add_argument('input', help="CSV export (kolom 'Komentar Bersih') atau file teks satu komentar per baris")
+    parser.add_argument('--backends', nargs='+', choices=core.BACKENDS, default=list(core.BACKENDS))
+    parser.add_argument('--limit', type=int, default=None, help="Maks jumlah komentar yang dipakai")
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    texts = read_texts(args.input, args.limit)
+    if not texts:
+        parser.error("Tidak ada komentar valid di input")
+    print(f"{len(texts)} komentar", file=sys.stderr)
+    print(compare_backends(texts, args.backends, args.batch_size).to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Penjadwal request YouTube Data API: kuota per API key, retry dengan backoff, status fetch.
+
+Kuota harian YouTube (default 10.000 unit) direset tengah malam waktu Pasifik, jadi pemakaian
+dicatat per (API key, tanggal Pasifik) di SQLite dan bertahan antar run/proses. Tiap request
+``list`` memakan 1 unit, termasuk yang gagal.
+
+``execute_request`` adalah pengganti ``request.execute()``:
+
+* 5xx, 429 dan 403 ``rateLimitExceeded`` diulang dengan exponential backoff + jitter;
+* kuota habis (403 ``quotaExceeded`` dari API, atau catatan lokal sudah mencapai budget)
+  menjadi ``QuotaExceeded`` supaya pemanggil bisa mengembalikan hasil parsial;
+* error lain diteruskan apa adanya.
+"""
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+
+# Lokasi default catatan kuota (bisa diganti lewat env YOUTUBE_QUOTA_PATH)
+DEFAULT_QUOTA_PATH = os.environ.get('YOUTUBE_QUOTA_PATH', os.path.join('.cache', 'youtube_quota.sqlite3'))
+DEFAULT_DAILY_QUOTA = int(os.environ.get('YOUTUBE_DAILY_QUOTA', '10000'))
+
+# Biaya unit per method yang dipakai aplikasi ini (commentThreads/comments/videos.list)
+LIST_COST = 1
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0   # detik
+BACKOFF_MAX = 32.0
+
+_RETRY_STATUSES = {500, 502, 503, 504, 429}
+_RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+_QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_usage (
+    key_hash   TEXT NOT NULL,
+    day        TEXT NOT NULL,
+    units_used INTEGER NOT NULL DEFAULT 0,
+    exhausted  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (key_hash, day)
+);
+"""
+
+
+class QuotaExceeded(Exception):
+    """Kuota harian API key sudah habis (menurut API atau catatan lokal)."""
+
+
+def pacific_day(now=None):
+    """Tanggal kuota YouTube (waktu Pasifik, mengikuti daylight saving kalau tzdata ada)."""
+    now = now or datetime.now(timezone.utc)
+    try:
+        from zoneinfo import ZoneInfo
+        return now.astimezone(ZoneInfo('America/Los_Angeles')).date().isoformat()
+    except Exception:
+        # Tanpa tzdata (mis. Windows): PST tetap, paling jauh meleset satu jam saat PDT
+        return now.astimezone(timezone(timedelta(hours=-8))).date().isoformat()
+
+
+class QuotaTracker:
+    """Pemakaian unit per API key per hari Pasifik. API key tidak disimpan, hanya hash-nya."""
+
+    def __init__(self, path=DEFAULT_QUOTA_PATH, daily_budget=DEFAULT_DAILY_QUOTA):
+        self.path = path
+        self.daily_budget = daily_budget
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key_hash(api_key):
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+    def used(self, api_key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT units_used, exhausted FROM quota_usage WHERE key_hash = ? AND day = ?",
+                (self._key_hash(api_key), pacific_day())
+            ).fetchone()
+        if not row:
+            return 0
+        return self.daily_budget if row[1] else row[0]
+
+    def remaining(self, api_key):
+        return max(0, self.daily_budget - self.used(api_key))
+
+    def charge(self, api_key, units=LIST_COST):
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO quota_usage (key_hash, day, units_used) VALUES (?, ?, ?)
+                   ON CONFLICT(key_hash, day) DO UPDATE SET units_used = units_used + excluded.units_used""",
+                (self._key_hash(api_key), pacific_day(), units)
+            )
+
+    def mark_exhausted(self, api_key):
+        """Dipanggil saat API sendiri menolak karena kuota (mis. key juga dipakai aplikasi lain)."""
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO quota_usage (key_hash, day, units_used, exhausted) VALUES (?, ?, 0, 1)
+                   ON CONFLICT(key_hash, day) DO UPDATE SET exhausted = 1""",
+                (self._key_hash(api_key), pacific_day())
+            )
+
+
+_default_tracker = None
+_default_tracker_lock = threading.Lock()
+
+
+def get_quota_tracker():
+    """Tracker bersama satu proses (catatan di disk dibagi juga antar proses)."""
+    global _default_tracker
+    with _default_tracker_lock:
+        if _default_tracker is None:
+            _default_tracker = QuotaTracker()
+        return _default_tracker
+
+
+def error_reason(error):
+    """``reason`` pertama dari body error API (mis. ``quotaExceeded``), atau string kosong."""
+    try:
+        return json.loads(error.content.decode('utf-8'))['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return ''
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full jitter: acak di [0, min(cap, base * 2^attempt)] supaya klien tidak retry serempak."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def new_fetch_status():
+    """``status``: 'complete', 'quota_exhausted' (hasil parsial) atau 'error' (hasil parsial)."""
+    return {'status': 'complete', 'fetched': 0, 'quota_used': 0, 'retries': 0, 'resumed': 0, 'message': ''}
+
+
+# Satu status fetch bisa dibaca/ditulis beberapa thread (UI, fetch balasan paralel), jadi semua
+# penulisan lewat dua helper ini
+_status_lock = threading.Lock()
+
+
+def count_status(status, key, n=1):
+    """Tambah counter ``key`` di ``status`` (boleh None)."""
+    if status is not None:
+        with _status_lock:
+            status[key] += n
+
+
+def set_status(status, /, **values):
+    """Isi beberapa field ``status`` sekaligus (mis. ``status``+``message``) secara atomik."""
+    if status is not None:
+        with _status_lock:
+            status.update(values)
+
+
+def execute_request(request, api_key, status=None, cost=LIST_COST, max_retries=MAX_RETRIES, tracker=None,
+                    sleep=time.sleep):
+    """``request.execute()`` dengan pencatatan kuota dan retry untuk error sementara.
+
+    ``status`` (dict dari ``new_fetch_status``, opsional) menghitung unit dan retry fetch ini."""
+    tracker = tracker or get_quota_tracker()
+    for attempt in range(max_retries + 1):
+        if tracker.remaining(api_key) < cost:
+            raise QuotaExceeded(f"Kuota harian API habis ({tracker.daily_budget} unit, reset tengah malam waktu Pasifik)")
+        tracker.charge(api_key, cost)
+        count_status(status, 'quota_used', cost)
+        try:
+            return request.execute()
+        except HttpError as e:
+            reason = error_reason(e)
+            if reason in _QUOTA_REASONS:
+                tracker.mark_exhausted(api_key)
+                raise QuotaExceeded(f"Kuota harian API habis (ditolak API: {reason})") from e
+            transient = e.resp.status in _RETRY_STATUSES or (e.resp.status == 403 and reason in _RATE_LIMIT_REASONS)
+            if not transient or attempt == max_retries:
+                raise
+        except (ConnectionError, TimeoutError):
+            if attempt == max_retries:
+                raise
+        count_status(status, 'retries')
+        sleep(backoff_delay(attempt))
@@ -0,0 +1,398 @@
+"""HTTP API lokal untuk klasifikasi sentimen, tanpa Streamlit.
+
+Contoh:
+    python inference_server.py --port 8600 --max-batch 64 --max-wait-ms 5
+
+Endpoint:
+
+* ``POST /classify`` body ``{"texts": ["...", ...]}``: teks mentah dibersihkan dengan
+  ``clean_comment`` lalu diklasifikasi; hasil ``{"results": [{"text", "clean", "label", "score"}]}``
+  dengan urutan sama seperti input (``label`` null kalau teks bersihnya kosong).
+* ``GET /analyze/<video_id>?max_comments=500&order=relevance&replies=0``: fetch + analisis satu
+  video (butuh ``--api-key``/env ``YOUTUBE_API_KEY``); permintaan yang sama dalam ``--result-ttl``
+  detik dilayani dari cache, dan yang datang bersamaan hanya dihitung sekali.
+* ``GET /stats``: jumlah request dan latensi p50/p99 per endpoint, serta ukuran batch model.
+* ``GET /metrics``: metrik per tahap format Prometheus (lihat ``metrics``).
+
+Model hanya dipanggil dari satu thread ``MicroBatcher``: request yang datang dalam ``max_wait_ms``
+digabung ke satu batch (maks ``max_batch`` teks), jadi banyak klien bersamaan berbagi forward pass
+alih-alih masing-masing satu panggilan model. Analisis video juga lewat batcher yang sama.
+"""
+import argparse
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from googleapiclient.errors import HttpError
+
+import metrics
+import sentiment_core as core
+from comment_store import CommentStore
+from fetch_scheduler import QuotaExceeded
+from result_cache import SingleFlightCache
+from sentiment_cache import SentimentCache
+from sharded_inference import DEFAULT_WORKERS, load_classifier
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+MAX_TEXTS_PER_REQUEST = 1000
+MAX_BODY_BYTES = 4 * 2**20
+MAX_ANALYZE_COMMENTS = 5000
+LATENCY_WINDOW = 10000  # jumlah latensi terakhir per endpoint untuk p50/p99
+
+
+def percentile(sorted_values, q):
+    """Persentil nearest-rank dari list yang sudah terurut."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[rank - 1]
+
+
+class LatencyStats:
+    """Latensi per endpoint (jendela ``window`` request terakhir) untuk p50/p99."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, error=False):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if error:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = {endpoint: sorted(values) for endpoint, values in self._samples.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+        return {
+            endpoint: {
+                'requests': counts[endpoint], 'errors': errors.get(endpoint, 0),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+            }
+            for endpoint, values in samples.items()
+        }
+
+
+class MicroBatcher:
+    """Gabungkan request klasifikasi yang datang berdekatan ke satu batch model.
+
+    ``classify(texts)`` memblok sampai hasilnya ada. Thread batcher mengambil request pertama di
+    antrean, lalu menunggu request berikutnya paling lama ``max_wait_ms`` atau sampai terkumpul
+    ``max_batch`` teks; teks duplikat dan yang sudah ada di ``cache`` tidak masuk model."""
+
+    def __init__(self, nlp, cache=None, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.nlp = nlp
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._stats = core.new_inference_stats()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        """Antrekan ``texts`` (teks bersih); kembalikan Future berisi list ``{'label', 'score'}``."""
+        future = Future()
+        if not texts:
+            future.set_result([])
+        else:
+            self._queue.put((list(texts), future))
+        return future
+
+    def classify(self, texts, timeout=None):
+        return self.submit(texts).result(timeout)
+
+    def iter_classified(self, texts, batch_size=64, max_batch_tokens=core.MAX_BATCH_TOKENS):
+        """Antarmuka yang dikenali ``core.iter_classified``, supaya pipeline analisis video juga
+        lewat batcher (berbagi batch dengan ``/classify``)."""
+        results = self.classify(texts)
+        yield list(range(len(texts))), results
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            predictions = {}
+            try:
+                core.predict_sentiment(self.nlp, self.cache, texts, predictions, self._stats,
+                                       batch_size=self.max_batch)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.texts += len(texts)
+            for item_texts, future in batch:
+                future.set_result([predictions[t] for t in item_texts])
+
+    def stats(self):
+        with self._lock:
+            return {'batches': self.batches, 'requests': self.requests, 'texts': self.texts,
+                    'requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                    'texts_per_batch': round(self.texts / self.batches, 2) if self.batches else 0.0,
+                    'model_calls': self._stats['model_calls'], 'cache_hits': self._stats['cache_hits'],
+                    'max_batch': self.max_batch, 'max_wait_ms': self.max_wait * 1000}
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+class RequestError(Exception):
+    """Error yang dikembalikan ke klien sebagai ``{"error": ...}`` dengan status ``status``."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SentimentService:
+    """Logika endpoint, terpisah dari HTTP supaya bisa dipanggil langsung."""
+
+    def __init__(self, batcher, api_key=None, store=None, result_ttl=15 * 60, max_analyses=2):
+        self.batcher = batcher
+        self.api_key = api_key
+        self.store = store if store is not None else CommentStore()
+        self.results = SingleFlightCache(ttl=result_ttl)
+        self._analyses = threading.BoundedSemaphore(max_analyses)
+        self.latency = LatencyStats()
+
+    def classify(self, texts):
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise RequestError(400, "'texts' harus berupa list string")
+        if len(texts) > MAX_TEXTS_PER_REQUEST:
+            raise RequestError(413, f"Maksimal {MAX_TEXTS_PER_REQUEST} teks per request")
+        cleaned = [core.clean_comment(t) for t in texts]
+        results = dict(zip([c for c in cleaned if c], self.batcher.classify([c for c in cleaned if c])))
+        return {'model': core.MODEL_NAME, 'results': [
+            {'text': text, 'clean': clean,
+             'label': results[clean]['label'].lower() if clean else None,
+             'score': round(float(results[clean]['score']), 4) if clean else None}
+            for text, clean in zip(texts, cleaned)
+        ]}
+
+    def analyze(self, video_id, max_comments=500, order='relevance', include_replies=False):
+        if not core.VIDEO_ID_RE.match(video_id):
+            raise RequestError(400, "Video ID tidak valid")
+        if order not in ('relevance', 'time'):
+            raise RequestError(400, "'order' harus relevance atau time")
+        if not 0 < max_comments <= MAX_ANALYZE_COMMENTS:
+            raise RequestError(400, f"'max_comments' harus 1..{MAX_ANALYZE_COMMENTS}")
+        if not self.api_key:
+            raise RequestError(503, "Server berjalan tanpa YouTube API key")
+        key = (video_id, max_comments, order, include_replies)
+        summary, source = self.results.get_or_compute(
+            key, lambda: self._analyze(video_id, max_comments, order, include_replies))
+        return {**summary, 'cache': source}
+
+    def _analyze(self, video_id, max_comments, order, include_replies):
+        with self._analyses:
+            try:
+                info = core.fetch_video_info(self.api_key, video_id)
+                if info is None:
+                    raise RequestError(404, "Video tidak ditemukan")
+                # Cache sentimen dipegang batcher, jadi tidak dicek dua kali di sini
+                comment_data, precomputed = core.run_analysis_pipeline(
+                    self.api_key, self.store, self.batcher, None, video_id, max_comments, order,
+                    include_replies=include_replies
+                )
+            except QuotaExceeded as e:
+                raise RequestError(503, str(e))
+            except HttpError as e:
+                raise RequestError(502, f"YouTube API error: {e}")
+            result = core.analyze_sentiment(self.batcher, None, comment_data, **precomputed)
+        return {
+            'video_id': video_id, 'title': info['title'],
+            'status': 'partial' if result.partial else 'ok', 'fetch_status': result.fetch_status['status'],
+            'message': result.fetch_status['message'], 'fetched': result.fetched, 'analyzed': result.total,
+            'counts': result.counts, 'percentages': result.percentages,
+            'top_words': {sent: [word for word, _ in words[:10]] for sent, words in result.tfidf_words.items()},
+        }
+
+    def stats(self):
+        return {'endpoints': self.latency.snapshot(), 'batcher': self.batcher.stats(),
+                'results': self.results.stats()}
+
+
+def _int_param(params, name, default):
+    try:
+        return int(params.get(name, [default])[0])
+    except ValueError:
+        raise RequestError(400, f"'{name}' harus bilangan bulat")
+
+
+def make_handler(service):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, payload, content_type='application/json'):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, endpoint, fn):
+            start = time.perf_counter()
+            error = False
+            try:
+                status, payload = 200, fn()
+            except RequestError as e:
+                error, status, payload = True, e.status, {'error': str(e)}
+            except Exception as e:
+                error, status, payload = True, 500, {'error': f"{type(e).__name__}: {e}"}
+            self._send(status, payload)
+            service.latency.record(endpoint, time.perf_counter() - start, error)
+
+        def do_POST(self):
+            if urlsplit(self.path).path != '/classify':
+                self.close_connection = True
+                self._send(404, {'error': 'Not found'})
+                return
+
+            def classify():
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # Panjang body tidak diketahui, jadi sisa request tidak bisa dilewati
+                    self.close_connection = True
+                    raise RequestError(400, "Content-Length tidak valid")
+                if length > MAX_BODY_BYTES:
+                    # Body tidak dibaca, jadi koneksi tidak bisa dipakai ulang
+                    self.close_connection = True
+                    raise RequestError(413, "Body terlalu besar")
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    raise RequestError(400, "Body harus JSON")
+                return service.classify(body.get('texts') if isinstance(body, dict) else None)
+
+            self._handle('/classify', classify)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            match = re.fullmatch(r'/analyze/([^/]+)', url.path)
+            if match:
+                params = parse_qs(url.query)
+                self._handle('/analyze', lambda: service.analyze(
+                    match.group(1), _int_param(params, 'max_comments', 500), params.get('order', ['relevance'])[0],
+                    params.get('replies', ['0'])[0] in ('1', 'true')
+                ))
+            elif url.path == '/stats':
+                self._send(200, service.stats())
+            elif url.path == '/metrics':
+                self._send(200, metrics.prometheus_text().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+            elif url.path == '/health':
+                self._send(200, {'status': 'ok', 'model': core.MODEL_NAME})
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Backlog default (5) terlalu kecil untuk banyak klien yang connect bersamaan
+    request_queue_size = 128
+
+
+def start_server(service, port, host='127.0.0.1'):
+    """Layani ``service`` di thread daemon; kembalikan server-nya (``shutdown()`` untuk berhenti)."""
+    server = _Server((host, port), make_handler(service))
+    threading.Thread(target=server.serve_forever, name='inference-http', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API lokal untuk klasifikasi sentimen komentar.")
+    parser.add_argument('--host', default='127.0.0.1', help="Alamat bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8600, help="Port (default: 8600)")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help=f"Maks teks per batch model (default: {DEFAULT_MAX_BATCH})")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help=f"Maks waktu menunggu request lain sebelum batch dijalankan (default: {DEFAULT_MAX_WAIT_MS:g})")
+    parser.add_argument('--max-analyses', type=int, default=2, help="Analisis video yang berjalan bersamaan (default: 2)")
+    parser.add_argument('--result-ttl', type=float, default=15 * 60, help="Detik hasil /analyze disimpan (default: 900)")
+    parser.add_argument('--api-key', default=os.environ.get('YOUTUBE_API_KEY'), help="YouTube API key untuk /analyze (default: env YOUTUBE_API_KEY)")
+    parser.add_argument('--backend', choices=core.BACKENDS, default=core.DEFAULT_BACKEND, help="Backend inference model")
+    parser.add_argument('--inference-workers', type=int, default=DEFAULT_WORKERS,
+                        help="Jumlah proses inference (0 = di proses ini; default: env SENTIMENT_WORKERS)")
+    parser.add_argument('--stats-interval', type=float, default=60, help="Detik antar log latensi ke stderr (0 = mati)")
+    args = parser.parse_args(argv)
+
+    nlp = load_classifier(args.backend, args.inference_workers)
+    cache = SentimentCache(core.MODEL_NAME, core.model_version(nlp, args.backend))
+    batcher = MicroBatcher(nlp, cache, args.max_batch, args.max_wait_ms)
+    service = SentimentService(batcher, args.api_key, result_ttl=args.result_ttl, max_analyses=args.max_analyses)
+    server = start_server(service, args.port, args.host)
+    core.stderr_progress(f"Melayani http://{args.host}:{server.server_port} (max batch {args.max_batch}, "
+                         f"max wait {args.max_wait_ms:g} ms)")
+    try:
+        while True:
+            time.sleep(args.stats_interval or 3600)
+            if args.stats_interval:
+                for endpoint, s in service.latency.snapshot().items():
+                    core.stderr_progress(f"{endpoint}: {s['requests']} request • p50 {s['p50_ms']} ms • p99 {s['p99_ms']} ms")
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.shutdown()
+        batcher.close()
+        if hasattr(nlp, 'close'):
+            nlp.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Antrean job analisis di worker pool lokal, terpisah dari thread script Streamlit.
+
+Job tetap berjalan walaupun browser di-refresh atau koneksi terputus; UI cukup menyimpan
+``job.id`` (mis. di query params) untuk menyambung lagi dan membaca progress/hasilnya.
+Fungsi job menerima objek ``Job`` sebagai argumen pertama dan melaporkan progress lewat
+``job.report(teks)`` / ``job.update(agregat)``; keduanya melempar ``JobCancelled`` begitu job
+dibatalkan, jadi pembatalan berhenti di titik laporan berikutnya (tiap halaman/batch).
+
+``max_workers`` membatasi job yang berjalan bersamaan, ``max_queued`` membatasi antrean; job
+baru di atas batas itu ditolak dengan ``QueueFull``.
+
+Job dengan ``key`` sama dipakai bersama oleh beberapa sesi. Tiap sesi tercatat sebagai ``viewer``
+(``submit``/``attach``); ``detach`` melepas satu sesi, dan job baru benar-benar dibatalkan kalau
+tidak ada sesi lain yang masih menunggu hasilnya.
+"""
+import itertools
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+DEFAULT_MAX_QUEUED = int(os.environ.get('JOB_QUEUE_LIMIT', '8'))
+DEFAULT_RETENTION = 30 * 60  # detik job selesai disimpan supaya hasilnya masih bisa diambil
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+
+class JobCancelled(Exception):
+    """Dilempar dari ``Job.report``/``Job.update`` setelah job dibatalkan."""
+
+
+class QueueFull(Exception):
+    """Antrean job sudah mencapai ``max_queued``."""
+
+
+class Job:
+    def __init__(self, key=None, meta=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.meta = meta or {}
+        self.state = QUEUED
+        self.message = "Menunggu giliran..."
+        self.aggregate = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._seq = None
+        self._cancel = threading.Event()
+        self._viewers = set()
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def _check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, text):
+        """Callback ``progress`` untuk fungsi di ``sentiment_core``."""
+        self._check()
+        self.message = text
+
+    def update(self, aggregate):
+        """Callback ``on_update`` untuk ``run_analysis_pipeline``."""
+        self._check()
+        self.aggregate = aggregate
+
+
+class JobManager:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_queued=DEFAULT_MAX_QUEUED, retention=DEFAULT_RETENTION):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def submit(self, fn, *args, key=None, meta=None, viewer=None, **kwargs):
+        """Jalankan ``fn(job, *args, **kwargs)`` di pool. Kalau job aktif dengan ``key`` yang sama
+        sudah ada, job itu yang dikembalikan (tidak dihitung dua kali). ``viewer`` (id sesi)
+        dicatat sebagai penunggu hasil job."""
+        with self._lock:
+            self._prune()
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.active and not job.cancel_requested:
+                        if viewer is not None:
+                            job._viewers.add(viewer)
+                        return job
+            if sum(job.state == QUEUED for job in self._jobs.values()) >= self.max_queued:
+                raise QueueFull(f"Antrean penuh ({self.max_queued} job menunggu)")
+            job = Job(key, meta)
+            job._seq = next(self._seq)
+            if viewer is not None:
+                job._viewers.add(viewer)
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.state, job.finished_at = CANCELLED, time.time()
+            return
+        job.state, job.started_at = RUNNING, time.time()
+        job.message = "Memulai..."
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.state = DONE
+        except JobCancelled:
+            job.state = CANCELLED
+        except Exception as e:
+            job.error = e
+            job.state = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def attach(self, job_id, viewer):
+        """Catat ``viewer`` sebagai penunggu job (mis. setelah refresh); kembalikan job-nya atau None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job._viewers.add(viewer)
+            return job
+
+    def detach(self, job_id, viewer):
+        """Lepas ``viewer`` dari job. Job dibatalkan hanya kalau tidak ada viewer lain; kembalikan
+        True kalau job dibatalkan."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job._viewers.discard(viewer)
+            if job._viewers:
+                return False
+        return self.cancel(job_id)
+
+    def viewers(self, job):
+        with self._lock:
+            return len(job._viewers)
+
+    def cancel(self, job_id):
+        """Minta job berhenti; job yang masih antre langsung dibatalkan."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job._cancel.set()
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            job.state, job.finished_at = CANCELLED, time.time()
+        return True
+
+    def queue_position(self, job):
+        """Posisi job di antrean (1 = berikutnya), atau 0 kalau sudah berjalan/selesai."""
+        if job.state != QUEUED:
+            return 0
+        with self._lock:
+            return 1 + sum(1 for other in self._jobs.values() if other.state == QUEUED and other._seq < job._seq)
+
+    def stats(self):
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+        return {'running': states.count(RUNNING), 'queued': states.count(QUEUED),
+                'max_workers': self.max_workers, 'max_queued': self.max_queued}
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [i for i, job in self._jobs.items() if not job.active and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
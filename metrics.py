@@ -0,0 +1,251 @@
+"""Instrumentasi per tahap: waktu (wall), jumlah item dan RSS proses.
+
+Kode memanggil ``span(nama)`` di sekitar tahap yang ingin diukur; hasilnya diakumulasi per
+tahap di registry satu proses dan bisa dibaca sebagai:
+
+* teks format Prometheus (``prometheus_text``, atau endpoint ``/metrics`` lewat
+  ``start_http_server``; ``/metrics.json`` untuk JSON);
+* JSON log satu baris per span, kalau env ``METRICS_LOG`` diisi (path file, atau ``-`` untuk stderr);
+* tabel per run di panel Performa aplikasi (``Collector``: hanya span yang tercatat di dalam
+  konteks job atau render itu sendiri, bukan dari sesi/job lain yang berjalan bersamaan).
+
+Tahap yang diukur: ``fetch_page``, ``clean``, ``tokenize``, ``model_forward``, ``build_table``
+(``write_results`` di mode out-of-core), ``tfidf``, ``timeseries``, ``wordcloud``, ``plotly_*``
+(satu per jenis grafik), ``kaleido`` (render grafik ke PNG) dan ``pdf`` (laporan PDF).
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+_stages = {}
+_lock = threading.Lock()
+# Collector aktif di konteks (thread/task) ini; thread yang bekerja untuk run yang sama diberi
+# salinan konteks lewat ``bind``.
+_collector = contextvars.ContextVar('metrics_collector', default=None)
+
+
+def current_rss():
+    """Resident set size proses dalam byte, atau None kalau tidak bisa dibaca."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class Span:
+    """Satu pengukuran; ``items`` boleh diisi di dalam blok ``with``."""
+    __slots__ = ('name', 'items', 'seconds', 'rss_bytes', 'rss_delta', 'discard')
+
+    def __init__(self, name, items=0):
+        self.name = name
+        self.items = items
+        self.seconds = 0.0
+        self.rss_bytes = None
+        self.rss_delta = None
+        self.discard = False
+
+
+def _accumulate(stages, s):
+    stage = stages.get(s.name)
+    if stage is None:
+        stage = stages[s.name] = {'calls': 0, 'items': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                  'rss_bytes': None, 'rss_peak': None}
+    stage['calls'] += 1
+    stage['items'] += s.items
+    stage['seconds'] += s.seconds
+    stage['max_seconds'] = max(stage['max_seconds'], s.seconds)
+    if s.rss_bytes is not None:
+        stage['rss_bytes'] = s.rss_bytes
+        stage['rss_peak'] = max(stage['rss_peak'] or 0, s.rss_bytes)
+
+
+class Collector:
+    """Statistik tahap untuk satu run saja (satu job analisis, satu render halaman).
+
+    Aktif di antara ``start()`` dan ``stop()`` (atau di dalam ``with``) untuk konteks pemanggil;
+    span dari thread lain hanya ikut kalau thread itu dijalankan lewat ``bind``."""
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._token = None
+
+    def start(self):
+        self._token = _collector.set(self)
+        return self
+
+    def stop(self):
+        if self._token is not None:
+            _collector.reset(self._token)
+            self._token = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _record(self, s):
+        with self._lock:
+            _accumulate(self._stages, s)
+
+    def snapshot(self):
+        """Salinan statistik tahap run ini, bentuknya sama dengan ``snapshot()`` modul."""
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._stages.items()}
+
+
+def bind(fn):
+    """Bungkus ``fn`` supaya berjalan di salinan konteks pemanggil (termasuk ``Collector`` aktif);
+    untuk target thread atau ``pool.submit`` yang bekerja atas nama run ini."""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return run
+
+
+def _record(s):
+    with _lock:
+        _accumulate(_stages, s)
+    collector = _collector.get()
+    if collector is not None:
+        collector._record(s)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'ts': round(time.time(), 3), 'stage': s.name, 'seconds': round(s.seconds, 6), 'items': s.items,
+            'rss_bytes': s.rss_bytes, 'rss_delta': s.rss_delta, 'thread': threading.current_thread().name,
+        }))
+
+
+@contextmanager
+def span(name, items=0):
+    """Ukur blok ``with``; dicatat juga kalau blok melempar exception."""
+    s = Span(name, items)
+    rss_start = current_rss()
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.seconds = time.perf_counter() - start
+        s.rss_bytes = current_rss()
+        if rss_start is not None and s.rss_bytes is not None:
+            s.rss_delta = s.rss_bytes - rss_start
+        if not s.discard:
+            _record(s)
+
+
+def iter_spans(name, iterable, count=len):
+    """Yield isi ``iterable`` dengan satu span per elemen: waktu sampai elemen itu tersedia
+    (mis. satu halaman API atau satu batch model), ``items`` = ``count(elemen)``."""
+    it = iter(iterable)
+    try:
+        while True:
+            with span(name) as s:
+                try:
+                    item = next(it)
+                except StopIteration:
+                    s.discard = True
+                    return
+                s.items = count(item)
+            yield item
+    finally:
+        close = getattr(it, 'close', None)
+        if close:
+            close()
+
+
+def snapshot():
+    """Salinan statistik semua tahap: ``{tahap: {calls, items, seconds, max_seconds, rss_bytes, rss_peak}}``."""
+    with _lock:
+        return {name: dict(stage) for name, stage in _stages.items()}
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(prefix='yt_sentiment'):
+    """Semua tahap dalam format teks Prometheus (exposition format 0.0.4)."""
+    stages = snapshot()
+    lines = []
+    series = [
+        ('stage_seconds_total', 'counter', 'Total waktu wall per tahap (detik).', 'seconds'),
+        ('stage_calls_total', 'counter', 'Jumlah span per tahap.', 'calls'),
+        ('stage_items_total', 'counter', 'Jumlah item (komentar, teks, halaman) yang diproses per tahap.', 'items'),
+        ('stage_seconds_max', 'gauge', 'Span terlama per tahap (detik).', 'max_seconds'),
+        ('stage_rss_bytes', 'gauge', 'RSS proses di akhir span terakhir tiap tahap.', 'rss_bytes'),
+    ]
+    for suffix, kind, help_text, key in series:
+        lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+        lines.append(f"# TYPE {prefix}_{suffix} {kind}")
+        for name in sorted(stages):
+            value = stages[name][key]
+            if value is not None:
+                lines.append(f'{prefix}_{suffix}{{stage="{_label(name)}"}} {value}')
+    rss = current_rss()
+    if rss is not None:
+        lines.append(f"# HELP {prefix}_process_rss_bytes RSS proses saat ini.")
+        lines.append(f"# TYPE {prefix}_process_rss_bytes gauge")
+        lines.append(f"{prefix}_process_rss_bytes {rss}")
+    return '\n'.join(lines) + '\n'
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """Layani ``/metrics`` (Prometheus) dan ``/metrics.json`` di thread daemon; kembalikan server-nya."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = prometheus_text().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path == '/metrics.json':
+                body, content_type = json.dumps(snapshot()).encode('utf-8'), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def enable_json_log(path='-'):
+    """Tulis satu baris JSON per span ke ``path`` (``-`` = stderr)."""
+    handler = logging.StreamHandler(sys.stderr) if path == '-' else logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+if os.environ.get('METRICS_LOG'):
+    enable_json_log(os.environ['METRICS_LOG'])
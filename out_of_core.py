@@ -0,0 +1,346 @@
+"""Analisis out-of-core untuk video dengan ratusan ribu komentar.
+
+Komentar diproses per chunk: dibersihkan, diklasifikasi, lalu baris hasilnya ditulis ke SQLite di
+disk (satu file per analisis) dan chunk-nya dibuang. Statistik yang dibaca UI dihitung bertahap:
+jumlah per sentimen dan per jam (``RunningAggregate``), statistik kata (``TermIndex``, kosakata
+dibatasi), komentar utama vs balasan. Di memori hanya ada agregat itu plus sampel acak
+(reservoir, ``SAMPLE_SIZE`` baris) untuk box plot, jadi RSS tidak ikut naik dengan jumlah komentar.
+
+``OutOfCoreResult`` punya antarmuka yang sama dengan ``AnalysisResult`` untuk semua yang dibaca UI,
+kecuali ``analyzed`` yang berisi sampel; export CSV dibaca ulang dari disk per chunk.
+"""
+import glob
+import os
+import random
+import sqlite3
+import time
+import uuid
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+
+import metrics
+import sentiment_core as core
+from cleaning import clean_comment
+from fetch_scheduler import new_fetch_status
+from term_index import TermIndex
+
+# Lokasi file hasil (bisa diganti lewat env OUT_OF_CORE_DIR); file lebih tua dari RESULT_MAX_AGE yang
+# tidak lagi dipakai hasil mana pun dihapus
+DEFAULT_RESULT_DIR = os.environ.get('OUT_OF_CORE_DIR', os.path.join('.cache', 'results'))
+RESULT_MAX_AGE = 24 * 60 * 60
+
+MAX_COMMENTS = 500_000
+CHUNK_SIZE = 2000
+SAMPLE_SIZE = 5000
+EXPORT_CHUNK = 50_000
+
+# Urutan baris saat export/contoh komentar (padanan sorting setelah fetch di mode biasa)
+EXPORT_ORDERS = {
+    'fetch': 'seq',
+    'reverse': 'seq DESC',
+    'likes': 'like_count DESC, seq',
+    'random': 'random()',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    seq          INTEGER PRIMARY KEY,
+    comment_id   TEXT,
+    published_at TEXT NOT NULL,
+    text         TEXT NOT NULL,
+    clean        TEXT NOT NULL,
+    sentiment    TEXT,
+    score        REAL,
+    like_count   INTEGER NOT NULL DEFAULT 0,
+    parent_id    TEXT
+);
+"""
+
+
+def new_result_path(video_id, directory=DEFAULT_RESULT_DIR, max_age=RESULT_MAX_AGE):
+    """Path file hasil baru untuk ``video_id``; sekalian bersihkan file lama di ``directory``.
+    File milik ``OutOfCoreResult`` yang masih hidup (di session atau cache hasil) tidak dihapus."""
+    os.makedirs(directory, exist_ok=True)
+    cutoff = time.time() - max_age
+    live = {os.path.abspath(os.path.splitext(path)[0]) for path in list(_live_results.keys())}
+    for old in glob.glob(os.path.join(directory, '*.sqlite3')) + glob.glob(os.path.join(directory, '*.csv')):
+        if os.path.abspath(os.path.splitext(old)[0]) in live:
+            continue
+        try:
+            if os.path.getmtime(old) < cutoff:
+                os.remove(old)
+        except OSError:
+            pass
+    return os.path.join(directory, f"{video_id}-{uuid.uuid4().hex[:8]}.sqlite3")
+
+
+# path file hasil -> OutOfCoreResult yang masih direferensikan; entri hilang sendiri begitu hasilnya
+# dibuang dari session dan cache (lalu file-nya ikut dibersihkan oleh new_result_path berikutnya)
+_live_results = weakref.WeakValueDictionary()
+
+
+class ResultStore:
+    """Baris hasil per komentar di SQLite, ditulis per chunk dengan urutan fetch (``seq``)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def append(self, rows):
+        """``rows``: tuple ``(comment_id, published_at, text, clean, sentiment, score, like_count, parent_id)``."""
+        with self._connect() as conn:
+            conn.executemany(
+                """INSERT INTO results (seq, comment_id, published_at, text, clean, sentiment, score, like_count, parent_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(self.rows + i, *row) for i, row in enumerate(rows)]
+            )
+        self.rows += len(rows)
+
+    def first_texts(self, sentiment, n, order='fetch'):
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT text FROM results WHERE sentiment = ? ORDER BY {EXPORT_ORDERS[order]} LIMIT ?", (sentiment, n)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def iter_frames(self, order='fetch', chunksize=EXPORT_CHUNK):
+        import pandas as pd
+
+        conn = self._connect()
+        try:
+            yield from pd.read_sql_query(
+                f"""SELECT published_at, text, clean, sentiment, score, like_count, parent_id
+                    FROM results ORDER BY {EXPORT_ORDERS[order]}""",
+                conn, chunksize=chunksize
+            )
+        finally:
+            conn.close()
+
+
+class Reservoir:
+    """Sampel acak seragam berukuran tetap dari stream (algoritma R)."""
+
+    def __init__(self, size, seed=None):
+        self.size = size
+        self.seen = 0
+        self.items = []
+        self._random = random.Random(seed)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+        else:
+            j = self._random.randrange(self.seen)
+            if j < self.size:
+                self.items[j] = item
+
+
+@dataclass
+class OutOfCoreResult:
+    """Agregat + sampel dari analisis out-of-core; baris lengkap ada di ``path`` (SQLite)."""
+    path: str
+    fetched: int
+    counts: dict
+    terms: TermIndex
+    tfidf_words: dict
+    timeseries: dict
+    reply_counts: dict
+    sample: object
+    first_samples: dict
+    export_order: str = 'fetch'
+    fetch_status: dict = field(default_factory=new_fetch_status)
+
+    out_of_core = True
+
+    def __post_init__(self):
+        _live_results[self.path] = self
+
+    @property
+    def partial(self):
+        return self.fetch_status['status'] != 'complete'
+
+    @property
+    def analyzed(self):
+        """Sampel acak baris yang punya label sentimen (kolom sama dengan ``AnalysisResult.table``)."""
+        return self.sample
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def percentages(self):
+        return core.sentiment_percentages(self.counts)
+
+    def samples(self, sent, n=5):
+        return self.first_samples[sent][:n]
+
+    def word_counts(self, sent):
+        return self.terms.counts[sent]
+
+    def texts_clean(self, sent):
+        texts = self.sample.loc[self.sample['sentiment'] == sent, 'vis_clean']
+        return texts[texts != ''].tolist()
+
+    def scores(self, sent):
+        return self.sample.loc[self.sample['sentiment'] == sent, 'score'].to_numpy()
+
+    def sentiment_by_reply(self):
+        return {key: dict(counts) for key, counts in self.reply_counts.items()}
+
+    def memory_usage(self):
+        """Perkiraan memori sampel dan statistik kata dalam byte (baris lengkap ada di disk)."""
+        terms = sum(len(counts) for counts in self.terms.counts.values()) + len(self.terms.totals)
+        return int(self.sample.memory_usage(deep=True).sum()) + terms * 100
+
+    def export_csv(self, path=None):
+        """Tulis semua baris (format sama dengan ``AnalysisResult.export_frame``) ke CSV per chunk.
+
+        Tanpa ``path``, CSV ditulis sekali di sebelah file hasil lalu dipakai ulang (baris hasil
+        tidak berubah lagi). File ditulis ke nama sementara lalu di-rename, jadi download yang
+        bersamaan tidak saling menimpa file yang sedang dibaca."""
+        if path is None:
+            path = os.path.splitext(self.path)[0] + '.csv'
+            if os.path.exists(path):
+                return path
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            self._write_csv(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def _write_csv(self, path):
+        import pandas as pd
+
+        header = True
+        for chunk in ResultStore(self.path).iter_frames(self.export_order):
+            pd.DataFrame({
+                "Timestamp": pd.to_datetime(chunk['published_at'], utc=True, format='ISO8601').dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "Komentar Asli": chunk['text'],
+                "Komentar Bersih": chunk['clean'],
+                "Sentimen": chunk['sentiment'].fillna("N/A (filtered)"),
+                # float32 seperti kolom score di AnalysisResult, supaya isi CSV sama persis
+                "Skor Kepercayaan": chunk['score'].astype('float32').astype('float64').fillna(0.0),
+                "Jumlah Like": chunk['like_count'],
+                "Balasan Dari": chunk['parent_id'].fillna(''),
+            }).to_csv(path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        if header:
+            open(path, 'w', encoding='utf-8').close()
+
+
+def _sample_frame(rows):
+    import numpy as np
+    import pandas as pd
+
+    return pd.DataFrame({
+        'text': [r['text'] for r in rows],
+        'clean': [r['clean'] for r in rows],
+        'vis_clean': [r['vis_clean'] for r in rows],
+        'sentiment': pd.Categorical([r['sentiment'] for r in rows], categories=core.SENTIMENTS),
+        'score': np.array([r['score'] for r in rows], dtype='float32'),
+        'timestamp': pd.to_datetime(pd.Series([r['timestamp'] for r in rows], dtype=object), utc=True, format='ISO8601'),
+        'like_count': np.array([r['like_count'] for r in rows], dtype='int32'),
+        'is_reply': np.array([r['parent_id'] is not None for r in rows], dtype=bool),
+        'parent_id': pd.Categorical([r['parent_id'] for r in rows]),
+    })
+
+
+def analyze_out_of_core(api_key, store, nlp, cache, video_id, max_comments, order_by, progress=core.no_progress,
+                        include_replies=False, on_update=None, stats=None, export_order='fetch', path=None,
+                        chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE, batch_size=64):
+    """Fetch + analisis dengan memori terbatas; mengembalikan ``OutOfCoreResult``.
+
+    ``on_update(aggregate)`` sama seperti di ``run_analysis_pipeline`` (dipanggil tiap halaman dan
+    tiap chunk). ``export_order`` salah satu kunci ``EXPORT_ORDERS``."""
+    stats = core.new_inference_stats() if stats is None else stats
+    fetch_status = new_fetch_status()
+    results = ResultStore(path or new_result_path(video_id))
+    aggregate = core.RunningAggregate()
+    terms = TermIndex(core.SENTIMENTS)
+    reply_counts = {'top_level': Counter({sent: 0 for sent in core.SENTIMENTS}),
+                    'reply': Counter({sent: 0 for sent in core.SENTIMENTS})}
+    reservoir = Reservoir(sample_size)
+
+    def _process(chunk):
+        with metrics.span('clean', len(chunk)):
+            cleaned = [clean_comment(item['text']) for item in chunk]
+        valid = [c for c in cleaned if len(c) > 10]
+        # Prediksi hanya untuk chunk ini; teks yang berulang antar chunk diambil dari cache sentimen
+        predictions = {}
+
+        def _batch_done(done, total):
+            progress(f"Menganalisis chunk: {done}/{total} • Dianalisis: {aggregate.total}/{aggregate.fetched}")
+
+        core.predict_sentiment(nlp, cache, valid, predictions, stats, progress=_batch_done, batch_size=batch_size)
+        stats['comments'] += len(valid)
+
+        rows = []
+        vis_by_clean = {}
+        with metrics.span('write_results', len(chunk)):
+            for item, cleaned_text in zip(chunk, cleaned):
+                r = predictions.get(cleaned_text) if len(cleaned_text) > 10 else None
+                label = score = None
+                if r is not None:
+                    label, score = r['label'].lower(), float(r['score'])
+                    vis = vis_by_clean.get(cleaned_text)
+                    if vis is None:
+                        vis = vis_by_clean[cleaned_text] = core.clean_for_visualization(cleaned_text)
+                    aggregate.add(label, item['timestamp'])
+                    terms.add(label, vis)
+                    reply_counts['reply' if item.get('is_reply') else 'top_level'][label] += 1
+                    reservoir.add({**item, 'clean': cleaned_text, 'vis_clean': vis, 'sentiment': label, 'score': score,
+                                   'parent_id': item.get('parent_id')})
+                rows.append((item.get('comment_id'), item['timestamp'], item['text'], cleaned_text, label, score,
+                             item['like_count'], item.get('parent_id')))
+            results.append(rows)
+
+    pages = core.prefetch(core.iter_comment_pages(api_key, store, video_id, max_comments, order_by, include_replies,
+                                                  fetch_status), name=f"fetch-{video_id}")
+    chunk = []
+    try:
+        for page in pages:
+            chunk.extend(page)
+            aggregate.fetched += len(page)
+            if len(chunk) >= chunk_size:
+                _process(chunk)
+                chunk = []
+            progress(f"Mengambil komentar: {aggregate.fetched}/{max_comments} • Dianalisis: {aggregate.total}")
+            if on_update:
+                on_update(aggregate)
+        _process(chunk)
+        aggregate.complete = True
+        if on_update:
+            on_update(aggregate)
+    finally:
+        pages.close()
+    stats['cache_hit_rate'] = cache.hit_rate if cache is not None else 0.0
+
+    progress("Menyelesaikan visualisasi...")
+    with metrics.span('tfidf', len(terms.totals)):
+        tfidf_words = terms.tfidf_words()
+    with metrics.span('timeseries', aggregate.total):
+        timeseries = aggregate.timeseries()
+    return OutOfCoreResult(
+        path=results.path,
+        fetched=aggregate.fetched,
+        counts=aggregate.counts,
+        terms=terms,
+        tfidf_words=tfidf_words,
+        timeseries=timeseries,
+        reply_counts=reply_counts,
+        sample=_sample_frame(reservoir.items),
+        first_samples={sent: results.first_texts(sent, 5, export_order) for sent in core.SENTIMENTS},
+        export_order=export_order,
+        fetch_status=fetch_status,
+    )
@@ -0,0 +1,214 @@
+"""Laporan PDF hasil analisis: ringkasan angka, pie, top kata, TF-IDF, box plot, tren dan word cloud.
+
+Grafik Plotly dirender ke PNG lewat satu proses kaleido yang tetap hidup (``PlotlyScope``), bukan
+satu proses baru per grafik; semua grafik satu laporan dirender berurutan dalam satu sesi scope.
+PNG disimpan di cache dengan kunci hash isi grafik (JSON figure + ukuran), jadi grafik yang sama
+(mis. laporan video yang sama dari sesi lain) tidak dirender ulang. PDF yang sudah jadi disimpan
+per kunci hasil analisis + resolusi tren, sehingga download ulang analisis yang sama langsung
+selesai tanpa membangun grafik lagi.
+
+``build_report`` memblok selama render. Di aplikasi (Streamlit >= 1.52) dipanggil dari callable
+``download_button``, yang baru dijalankan saat tombol diklik dan di luar script run; di versi
+lama PDF dibuat di thread script setelah tombol "Siapkan Laporan" diklik.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import charts
+import metrics
+import sentiment_core as core
+from result_cache import SingleFlightCache
+
+# Ukuran render (px) per jenis grafik; scale 2 supaya tetap tajam saat dicetak
+FIGURE_SIZES = {'wide': (900, 450), 'third': (600, 400)}
+FIGURE_SCALE = 2
+FIGURE_CACHE_TTL = 60 * 60
+REPORT_CACHE_TTL = 15 * 60
+
+_figure_cache = SingleFlightCache(ttl=FIGURE_CACHE_TTL, max_entries=256, max_bytes=128 * 2**20, size_of=len)
+_report_cache = SingleFlightCache(ttl=REPORT_CACHE_TTL, max_entries=16, max_bytes=128 * 2**20, size_of=len)
+_scope = None
+_scope_lock = threading.Lock()
+
+
+def _get_scope():
+    """``PlotlyScope`` bersama (proses kaleido/chromium); dibuat sekali saat pertama dipakai.
+    Dipanggil dengan ``_scope_lock`` dipegang."""
+    global _scope
+    if _scope is None:
+        import plotly
+        from kaleido.scopes.plotly import PlotlyScope
+
+        # plotly.js dari paket plotly yang terpasang, supaya versinya cocok dengan JSON figure
+        plotlyjs = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+        _scope = PlotlyScope(plotlyjs=plotlyjs if os.path.exists(plotlyjs) else None, mathjax=False)
+    return _scope
+
+
+def figure_key(fig, width, height, scale=FIGURE_SCALE):
+    payload = json.dumps([fig.to_plotly_json(), width, height, scale], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_figures(figures, keys=None, scale=FIGURE_SCALE):
+    """PNG bytes untuk tiap ``(fig, width, height)`` di ``figures``, urut sesuai input. ``keys``
+    (hasil ``figure_key``) boleh diberikan kalau sudah dihitung.
+
+    Semua grafik dirender berurutan dalam satu sesi scope kaleido; yang sudah ada di cache dilewati."""
+    keys = keys or [figure_key(fig, width, height, scale) for fig, width, height in figures]
+    pngs = []
+    # Scope kaleido tidak thread-safe, jadi satu batch memegang lock sampai selesai
+    with _scope_lock:
+        for key, (fig, width, height) in zip(keys, figures):
+            png, _ = _figure_cache.get_or_compute(key, lambda: _transform(fig, width, height, scale))
+            pngs.append(png)
+    return pngs
+
+
+def _transform(fig, width, height, scale):
+    with metrics.span('kaleido', 1):
+        return _get_scope().transform(fig, format='png', width=width, height=height, scale=scale)
+
+
+def report_figures(analysis, resolution='6h'):
+    """``{bagian: [(judul, fig, ukuran), ...]}`` dengan grafik yang sama seperti di aplikasi."""
+    sections = {'pie': [('Distribusi Sentimen', charts.pie_figure(analysis.percentages), 'wide')]}
+    sections['top_words'] = [
+        (sent, charts.top_words_figure(analysis.terms.top(sent, 10), sent), 'third')
+        for sent in core.SENTIMENTS if analysis.terms.top(sent, 10)
+    ]
+    sections['tfidf'] = [
+        (sent, charts.tfidf_figure(analysis.tfidf_words[sent], sent), 'third')
+        for sent in core.SENTIMENTS if analysis.tfidf_words[sent]
+    ]
+    sections['box'] = [('Distribusi Confidence Score', charts.box_figure(analysis.analyzed), 'wide')] if analysis.total else []
+    sections['trend'] = []
+    if analysis.timeseries:
+        frame, bucket = analysis.timeseries[resolution]
+        sections['trend'] = [('Tren Sentimen', charts.trend_figure(frame, core.format_bucket(bucket)), 'wide')]
+    return sections
+
+
+def _summary(analysis, video_info, video_id):
+    return {
+        'video_id': video_id, 'title': (video_info or {}).get('title', video_id),
+        'counts': analysis.counts, 'percentages': analysis.percentages,
+        'total': analysis.total, 'fetched': analysis.fetched,
+        'fetch_status': analysis.fetch_status['status'], 'fetch_message': analysis.fetch_status['message'],
+        'sampled': len(analysis.analyzed) if analysis.out_of_core else None,
+        'replies': analysis.sentiment_by_reply(),
+    }
+
+
+def build_report(key, analysis, video_info, video_id, resolution='6h', wordclouds=True):
+    """PDF laporan ``analysis`` sebagai bytes. ``key`` (hashable) menandai hasil analisisnya, di
+    aplikasi kunci cache analisis + id run; PDF untuk ``key`` dan setelan yang sama diambil dari
+    cache tanpa membangun grafik."""
+    def compute():
+        summary = _summary(analysis, video_info, video_id)
+        sections = report_figures(analysis, resolution)
+        sizes = [FIGURE_SIZES[size] for items in sections.values() for _, _, size in items]
+        figures = [fig for items in sections.values() for _, fig, _ in items]
+        fig_keys = [figure_key(fig, w, h) for fig, (w, h) in zip(figures, sizes)]
+        frequencies = {sent: analysis.word_counts(sent) for sent in core.SENTIMENTS} if wordclouds else {}
+        wc_futures = core.render_wordclouds_async(frequencies)
+        pngs = iter(render_figures([(fig, w, h) for fig, (w, h) in zip(figures, sizes)], fig_keys))
+        images = {name: [(title, next(pngs), size) for title, _, size in items] for name, items in sections.items()}
+        wc_images = [(sent, future.result()) for sent, future in wc_futures.items()]
+        with metrics.span('pdf', len(figures) + len(wc_images)):
+            return _write_pdf(summary, images, [(sent, png) for sent, png in wc_images if png])
+
+    pdf, _ = _report_cache.get_or_compute((key, resolution, wordclouds), compute)
+    return pdf
+
+
+def _write_pdf(summary, images, wordclouds):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image, KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    buf = BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=1.5 * cm, rightMargin=1.5 * cm,
+                            topMargin=1.5 * cm, bottomMargin=1.5 * cm,
+                            title=f"Analisis Sentimen - {summary['title']}")
+    width = doc.width
+
+    def image(png, size, max_width):
+        w, h = FIGURE_SIZES[size]
+        return Image(BytesIO(png), width=max_width, height=max_width * h / w)
+
+    def row(items, size):
+        # Grafik per sentimen berdampingan dalam satu baris
+        cell = width / 3
+        table = Table([[image(png, size, cell - 4) for _, png, _ in items]], colWidths=[cell] * len(items))
+        table.setStyle(TableStyle([('LEFTPADDING', (0, 0), (-1, -1), 2), ('RIGHTPADDING', (0, 0), (-1, -1), 2)]))
+        return table
+
+    story = [
+        Paragraph("Laporan Analisis Sentimen Komentar YouTube", styles['Title']),
+        Paragraph(escape(summary['title']), styles['Heading2']),
+        Paragraph(f"Video ID: {escape(summary['video_id'])} • dibuat {time.strftime('%Y-%m-%d %H:%M')}", styles['Normal']),
+        Spacer(1, 0.4 * cm),
+    ]
+
+    metric_rows = [['Sentimen', 'Jumlah', 'Persentase']]
+    metric_rows += [[charts.SENTIMENT_LABELS[sent], str(summary['counts'][sent]), f"{summary['percentages'][sent]}%"]
+                    for sent in charts.SENTIMENT_LABELS]
+    metric_rows.append(['Total dianalisis', str(summary['total']), f"dari {summary['fetched']} diambil"])
+    table = Table(metric_rows, colWidths=[width * 0.4, width * 0.25, width * 0.35])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2a2a2a')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#999999')),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ]))
+    story += [table, Spacer(1, 0.3 * cm)]
+
+    if summary['fetch_status'] != 'complete':
+        story.append(Paragraph(
+            f"Hasil parsial: pengambilan berhenti di {summary['fetched']} komentar ({escape(summary['fetch_message'])}).",
+            styles['Italic']))
+    n_replies = sum(summary['replies']['reply'].values())
+    if n_replies:
+        story.append(Paragraph(
+            f"Komentar utama: {sum(summary['replies']['top_level'].values())} • balasan: {n_replies}", styles['Normal']))
+
+    headings = {
+        'pie': "Distribusi Sentimen",
+        'top_words': "Top 10 Kata Paling Sering Muncul Per Sentimen",
+        'tfidf': "Kata Berpengaruh (TF-IDF) Per Sentimen",
+        'box': "Distribusi Confidence Score Per Sentimen",
+        'trend': "Tren Sentimen Over Time",
+    }
+    for name, heading in headings.items():
+        items = images.get(name)
+        if not items:
+            continue
+        # Judul bagian tidak dipisah dari grafiknya di pergantian halaman
+        block = [Paragraph(heading, styles['Heading3'])]
+        if name in ('top_words', 'tfidf'):
+            block.append(row(items, 'third'))
+        else:
+            block.append(image(items[0][1], items[0][2], width))
+        if name == 'box' and summary['sampled'] is not None:
+            block.append(Paragraph(f"Mode data besar: box plot dari sampel acak {summary['sampled']} komentar.",
+                                   styles['Italic']))
+        story += [KeepTogether(block), Spacer(1, 0.3 * cm)]
+
+    opts = core.WORDCLOUD_OPTIONS
+    for i, (sent, png) in enumerate(wordclouds):
+        block = [Paragraph("Word Cloud Per Sentimen", styles['Heading3'])] if i == 0 else []
+        block += [Paragraph(f"Sentimen: {sent.upper()}", styles['Normal']),
+                  Image(BytesIO(png), width=width * 0.8, height=width * 0.8 * opts['height'] / opts['width'])]
+        story += [KeepTogether(block), Spacer(1, 0.2 * cm)]
+
+    doc.build(story)
+    return buf.getvalue()
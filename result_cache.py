@@ -0,0 +1,126 @@
+"""Cache hasil analisis bersama untuk semua sesi dalam satu proses, dengan single-flight.
+
+Beberapa sesi yang meminta kunci yang sama pada saat bersamaan tidak menghitung ulang: sesi
+pertama menjalankan komputasi, sesi lain menunggu hasil yang sama. Entri kedaluwarsa setelah
+``ttl`` detik, dan kalau jumlah entri atau total ukurannya melewati batas, entri yang paling
+lama tidak dipakai dibuang duluan (LRU).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_TTL = float(os.environ.get('RESULT_CACHE_TTL', 15 * 60))
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_MB', 512)) * 2**20
+
+# Sumber hasil get_or_compute
+HIT, COALESCED, MISS = 'hit', 'coalesced', 'miss'
+
+
+class SingleFlightCache:
+    """``get_or_compute(key, compute)`` mengembalikan ``(nilai, sumber)``; sumber salah satu
+    ``hit`` (dari cache), ``coalesced`` (menunggu komputasi sesi lain) atau ``miss``.
+
+    ``size_of(nilai)`` dipakai untuk batas ``max_bytes``; ``cache_if(nilai)`` False berarti hasil
+    hanya dibagikan ke sesi yang sedang menunggu, tidak disimpan (mis. hasil parsial).
+
+    Exception dengan tipe di ``retry_on`` (mis. pembatalan job milik sesi pertama) tidak diteruskan
+    ke sesi yang menunggu: entri in-flight dibuang dan salah satu penunggu menghitung ulang."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 size_of=None, cache_if=None, clock=time.monotonic, retry_on=()):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_of = size_of or (lambda value: 0)
+        self.cache_if = cache_if or (lambda value: value is not None)
+        self._clock = clock
+        self.retry_on = tuple(retry_on)
+        self._entries = OrderedDict()  # key -> (nilai, waktu simpan, ukuran)
+        self._inflight = {}            # key -> Future
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        while True:
+            leader = False
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if self._clock() - entry[1] <= self.ttl:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return entry[0], HIT
+                    self._remove(key)
+                flight = self._inflight.get(key)
+                if flight is not None:
+                    self.coalesced += 1
+                else:
+                    flight = self._inflight[key] = Future()
+                    self.misses += 1
+                    leader = True
+            if leader:
+                break
+            # Sesi lain sedang menghitung kunci ini; exception-nya juga diteruskan ke sini,
+            # kecuali yang ada di retry_on: coba lagi (penunggu pertama jadi leader baru)
+            try:
+                return flight.result(), COALESCED
+            except self.retry_on:
+                continue
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            if self.cache_if(value):
+                self._store(key, value)
+        flight.set_result(value)
+        return value, MISS
+
+    def inflight(self, key):
+        with self._lock:
+            return key in self._inflight
+
+    def age(self, key):
+        """Detik sejak entri ``key`` disimpan, atau None kalau tidak ada."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return self._clock() - entry[1] if entry else None
+
+    def _store(self, key, value):
+        if key in self._entries:
+            self._remove(key)
+        size = self.size_of(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, self._clock(), size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'inflight': len(self._inflight),
+                    'hits': self.hits, 'coalesced': self.coalesced, 'misses': self.misses}
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Lokasi default cache hasil sentimen (bisa diganti lewat env SENTIMENT_CACHE_PATH)
+DEFAULT_CACHE_PATH = os.environ.get('SENTIMENT_CACHE_PATH', os.path.join('.cache', 'sentiment_cache.sqlite3'))
+DEFAULT_MAX_ENTRIES = 200_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sentiments (
+    key       TEXT PRIMARY KEY,
+    label     TEXT NOT NULL,
+    score     REAL NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sentiments_last_used ON sentiments (last_used);
+"""
+
+# Batas variabel per query SQLite (default lama 999)
+_SQL_CHUNK = 500
+
+
+class SentimentCache:
+    """Cache hasil model per teks bersih, dikunci hash(nama model + versi + teks).
+
+    Disimpan di SQLite supaya bertahan antar run dan sesi. Ukuran dibatasi
+    ``max_entries``; entri yang paling lama tidak dipakai dibuang duluan (LRU).
+    """
+
+    def __init__(self, model_name, model_version, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.model_name = model_name
+        self.model_version = model_version
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _key(self, text):
+        raw = f"{self.model_name}\0{self.model_version}\0{text}".encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM sentiments").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'size': size}
+
+    def get_many(self, texts):
+        """Kembalikan {teks: {'label', 'score'}} untuk teks yang sudah ada di cache."""
+        keys = {self._key(t): t for t in texts}
+        found = {}
+        now = time.time_ns()
+        key_list = list(keys)
+        with self._connect() as conn:
+            for i in range(0, len(key_list), _SQL_CHUNK):
+                chunk = key_list[i:i + _SQL_CHUNK]
+                marks = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, label, score FROM sentiments WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, label, score in rows:
+                    found[keys[key]] = {'label': label, 'score': score}
+                if rows:
+                    conn.executemany(
+                        "UPDATE sentiments SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _, _ in rows]
+                    )
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, results):
+        """Simpan {teks: {'label', 'score'}} lalu buang entri LRU kalau melebihi batas."""
+        if not results:
+            return
+        now = time.time_ns()
+        rows = [(self._key(t), r['label'], float(r['score']), now) for t, r in results.items()]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiments (key, label, score, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            size = conn.execute("SELECT COUNT(*) FROM sentiments").fetchone()[0]
+            if size > self.max_entries:
+                conn.execute(
+                    "DELETE FROM sentiments WHERE key IN "
+                    "(SELECT key FROM sentiments ORDER BY last_used LIMIT ?)",
+                    (size - self.max_entries,)
+                )
@@ -0,0 +1,1140 @@
+"""Logika inti analisis sentimen komentar YouTube, tanpa ketergantungan ke Streamlit.
+
+Dipakai oleh ``app.py`` (UI) dan ``batch_analyze.py`` (CLI headless). Progress
+dilaporkan lewat callable ``progress(text)`` supaya pemanggil bebas menentukan
+tampilannya (overlay, log, dsb).
+"""
+import hashlib
+import json
+import math
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import partial
+from io import BytesIO
+
+from googleapiclient.errors import HttpError
+
+import metrics
+from cleaning import clean_comment
+from fetch_scheduler import (QuotaExceeded, count_status, error_reason, execute_request, new_fetch_status,
+                             set_status)
+from term_index import TermIndex
+
+# Library berat (transformers/torch, sklearn, matplotlib, wordcloud, pandas, discovery client)
+# di-import di dalam fungsi yang memakainya, supaya import modul ini (dan first paint UI) cepat.
+
+MODEL_NAME = "w11wo/indonesian-roberta-base-sentiment-classifier"
+SENTIMENTS = ['positive', 'negative', 'neutral']
+
+# Indonesian stopwords untuk visualisasi saja
+INDO_STOPWORDS = {
+    'yang', 'dan', 'di', 'ke', 'dari', 'untuk', 'adalah', 'pada', 'atau', 'tidak',
+    'ini', 'itu', 'dengan', 'oleh', 'akan', 'telah', 'sudah', 'dapat', 'juga',
+    'lebih', 'pula', 'dalam', 'ada', 'karena', 'bagian', 'anda', 'saya', 'dia',
+    'mereka', 'kami', 'kalian', 'aku', 'kamu', 'dia', 'ia', 'nya',
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'can', 'it', 'its', 'of', 'in', 'on', 'at',
+    'to', 'as', 'by', 'or', 'but', 'if', 'because', 'so'
+}
+
+
+def no_progress(text):
+    pass
+
+
+def stderr_progress(text):
+    print(f"[{time.strftime('%H:%M:%S')}] {text}", file=sys.stderr, flush=True)
+
+
+# ================== MODEL ==================
+# pytorch   : pipeline fp32 bawaan
+# quantized : PyTorch dynamic int8 quantization untuk layer Linear (CPU)
+# onnx      : graph ONNX Runtime hasil export (butuh optimum[onnxruntime])
+BACKENDS = ('pytorch', 'quantized', 'onnx')
+DEFAULT_BACKEND = os.environ.get('SENTIMENT_BACKEND', 'pytorch')
+ONNX_EXPORT_DIR = os.environ.get('ONNX_EXPORT_DIR', os.path.join('.cache', 'onnx', MODEL_NAME.replace('/', '__')))
+
+
+def load_sentiment_model(backend=DEFAULT_BACKEND):
+    """Pipeline sentiment-analysis dengan backend pilihan. Semua backend mengembalikan
+    format yang sama: list of ``{'label', 'score'}``."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilihan: {', '.join(BACKENDS)})")
+
+    from transformers import pipeline
+
+    if backend == 'pytorch':
+        return pipeline("sentiment-analysis",
+                        model=MODEL_NAME,
+                        truncation=True, max_length=512)
+
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    if backend == 'quantized':
+        import torch
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("Backend 'onnx' butuh paket tambahan: pip install optimum[onnxruntime]") from e
+        # Export cukup sekali, run berikutnya langsung load graph dari disk
+        if os.path.isdir(ONNX_EXPORT_DIR):
+            model = ORTModelForSequenceClassification.from_pretrained(ONNX_EXPORT_DIR)
+        else:
+            model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+            model.save_pretrained(ONNX_EXPORT_DIR)
+            tokenizer.save_pretrained(ONNX_EXPORT_DIR)
+
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer,
+                    truncation=True, max_length=512)
+
+
+def model_version(nlp, backend='pytorch'):
+    # Commit hash dari hub membedakan versi model dengan nama yang sama;
+    # backend selain fp32 bisa sedikit beda hasilnya, jadi ikut jadi bagian versi
+    if hasattr(nlp, 'model_version'):
+        return nlp.model_version  # ShardedClassifier: versi dari model di worker
+    version = getattr(nlp.model.config, '_commit_hash', None) or 'unknown'
+    return version if backend == 'pytorch' else f"{version}+{backend}"
+
+
+# ================== YOUTUBE ==================
+VIDEO_ID_RE = re.compile(r'^[0-9A-Za-z_-]{11}$')
+
+
+def extract_video_id(url):
+    match = re.search(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*', url)
+    return match.group(1) if match else None
+
+
+def read_video_ids(path):
+    """Baca file daftar video; video ID diambil dari URL kalau perlu, duplikat dibuang."""
+    video_ids = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            vid = line if VIDEO_ID_RE.match(line) else extract_video_id(line)
+            if vid is None:
+                raise ValueError(f"Bukan URL/ID YouTube yang valid: {line}")
+            if vid not in video_ids:
+                video_ids.append(vid)
+    return video_ids
+
+
+# Client yang sudah di-build dipakai ulang lintas panggilan, thread dan sesi. Satu client punya
+# satu httplib2.Http (koneksi keep-alive) yang tidak thread-safe, jadi tiap client hanya dipinjam
+# satu pemakai dalam satu waktu; kalau semua sedang dipakai, dibuat client baru.
+_youtube_pool = {}
+_youtube_pool_lock = threading.Lock()
+MAX_IDLE_CLIENTS = 8
+
+
+def _build_youtube(api_key):
+    from googleapiclient.discovery import build
+
+    # Dokumen discovery bawaan library: tidak ada round-trip discovery ke Google
+    return build('youtube', 'v3', developerKey=api_key, static_discovery=True, cache_discovery=False)
+
+
+@contextmanager
+def youtube_client(api_key):
+    """Pinjam client YouTube dari pool proses; dikembalikan otomatis setelah blok selesai.
+    Kalau blok berakhir dengan exception, client dibuang (koneksinya bisa saja sudah rusak)."""
+    with _youtube_pool_lock:
+        idle = _youtube_pool.setdefault(api_key, [])
+        client = idle.pop() if idle else None
+    if client is None:
+        client = _build_youtube(api_key)
+    try:
+        yield client
+    except GeneratorExit:
+        # Generator pemakai ditutup lebih awal (mis. jatah komentar terpenuhi): bukan error
+        _release_youtube(api_key, client)
+        raise
+    _release_youtube(api_key, client)
+
+
+def _release_youtube(api_key, client):
+    with _youtube_pool_lock:
+        idle = _youtube_pool.setdefault(api_key, [])
+        if len(idle) < MAX_IDLE_CLIENTS:
+            idle.append(client)
+
+
+def fetch_video_info(api_key, video_id):
+    """Judul + thumbnail video, atau None kalau video tidak ada. HttpError/QuotaExceeded diteruskan ke pemanggil."""
+    with youtube_client(api_key) as youtube:
+        res = execute_request(youtube.videos().list(part="snippet", id=video_id), api_key)
+    if res['items']:
+        item = res['items'][0]['snippet']
+        return {'title': item['title'], 'thumbnail_url': item['thumbnails']['high']['url']}
+    return None
+
+
+def _parse_thread(item):
+    snippet = item['snippet']['topLevelComment']['snippet']
+    return {
+        'text': snippet['textDisplay'],
+        'timestamp': snippet['publishedAt'],
+        'like_count': snippet['likeCount'],
+        'comment_id': item['snippet']['topLevelComment']['id'],
+        'thread_id': item['id'],
+        'parent_id': None,
+        'is_reply': False
+    }
+
+
+def _parse_reply(item):
+    snippet = item['snippet']
+    return {
+        'text': snippet['textDisplay'],
+        'timestamp': snippet['publishedAt'],
+        'like_count': snippet['likeCount'],
+        'comment_id': item['id'],
+        'thread_id': snippet['parentId'],
+        'parent_id': snippet['parentId'],
+        'is_reply': True
+    }
+
+
+# Maks thread yang balasannya di-page bersamaan (tiap worker meminjam client sendiri dari pool)
+MAX_REPLY_WORKERS = 4
+
+
+def _fetch_replies(api_key, parent_id, limit, status=None):
+    """Balasan satu thread lewat ``comments().list(parentId=...)``, maks ``limit``."""
+    replies = []
+    next_page = None
+    with youtube_client(api_key) as youtube:
+        while len(replies) < limit:
+            res = execute_request(youtube.comments().list(
+                part="snippet",
+                parentId=parent_id,
+                maxResults=min(100, limit - len(replies)),
+                pageToken=next_page
+            ), api_key, status)
+            replies.extend(_parse_reply(item) for item in res['items'])
+            next_page = res.get('nextPageToken')
+            if not next_page: break
+    return replies[:limit]
+
+
+def iter_comment_pages(api_key, store, video_id, max_comments, order_by, include_replies=False, status=None):
+    """Generator halaman komentar (list of dict) tanpa menyentuh UI, jadi aman dipanggil dari thread lain.
+
+    Kalau kuota habis atau API error di tengah jalan, generator berhenti setelah halaman terakhir
+    yang berhasil dan ``status`` (dari ``new_fetch_status``) mencatat alasannya, jadi komentar yang
+    sudah diambil tidak hilang. Kalau belum ada komentar sama sekali, exception-nya diteruskan."""
+    status = new_fetch_status() if status is None else status
+    with youtube_client(api_key) as youtube:
+        if include_replies:
+            pages = _iter_comment_pages_with_replies(youtube, api_key, store, video_id, max_comments, order_by, status)
+        # Urutan waktu bisa dilayani dari penyimpanan lokal + ambil yang baru saja
+        elif order_by == 'time':
+            pages = _iter_comment_pages_incremental(youtube, api_key, store, video_id, max_comments, status)
+        else:
+            fetch_page = partial(_fetch_thread_page, youtube, api_key, store, video_id, order_by, status)
+            pages = _iter_resumable(store, video_id, order_by, max_comments, fetch_page, status)
+
+        try:
+            for page in metrics.iter_spans('fetch_page', pages):
+                count_status(status, 'fetched', len(page))
+                yield page
+        except (QuotaExceeded, HttpError) as e:
+            if not status['fetched']:
+                raise
+            if isinstance(e, QuotaExceeded):
+                set_status(status, status='quota_exhausted', message=str(e))
+            else:
+                set_status(status, status='error', message=f"API error {e.resp.status} {error_reason(e)}".strip())
+
+
+def _iter_resumable(store, video_id, fetch_key, max_comments, fetch_page, status):
+    """Paging dengan checkpoint per halaman: ``fetch_page(page_token, sisa)`` mengembalikan
+    ``(halaman, token berikutnya)`` dan sudah menyimpan halamannya ke ``store``.
+
+    Setelah tiap halaman, token berikutnya + id komentar yang sudah diambil dicatat. Fetch yang
+    terputus dilanjutkan dari situ: komentar lama dibaca dari disk, API hanya dipanggil untuk sisanya.
+    Checkpoint dihapus begitu fetch selesai (jatah terpenuhi atau halaman habis). Kalau kuota masih
+    habis (atau API error) saat melanjutkan, komentar checkpoint tetap di-yield dulu sebelum
+    exception-nya diteruskan, jadi pemanggil mendapat hasil parsial, bukan kosong."""
+    fetched = 0  # komentar yang sudah di-yield
+    saved = 0    # id yang sudah tercatat di checkpoint
+    next_page = None
+    first = None
+    stopped = None
+    checkpoint = store.get_checkpoint(video_id, fetch_key)
+    if checkpoint:
+        saved = checkpoint['count']
+        next_page = checkpoint['page_token']
+        if saved < max_comments and next_page:
+            # Pastikan token masih berlaku sebelum memakai hasil lama; kalau kedaluwarsa, mulai dari awal
+            try:
+                first = fetch_page(next_page, max_comments - saved)
+            except QuotaExceeded as e:
+                stopped = e
+            except HttpError as e:
+                if e.resp.status != 400:
+                    stopped = e
+                else:
+                    store.clear_checkpoint(video_id, fetch_key)
+                    saved, next_page = 0, None
+        # Komentar lama dibaca dari disk per halaman, tidak dimuat sekaligus
+        for page in store.iter_checkpoint_comments(video_id, fetch_key, min(saved, max_comments)):
+            fetched += len(page)
+            yield page
+        set_status(status, resumed=fetched)
+        if stopped is not None:
+            raise stopped
+        if fetched and not next_page:
+            store.clear_checkpoint(video_id, fetch_key)
+            return
+
+    remaining = max_comments - fetched
+    while remaining > 0:
+        page, next_page = first or fetch_page(next_page, remaining)
+        first = None
+        store.save_checkpoint(video_id, fetch_key, next_page, [c['comment_id'] for c in page], saved)
+        saved += len(page)
+        remaining -= len(page)
+        yield page
+        if not next_page: break
+    store.clear_checkpoint(video_id, fetch_key)
+
+
+def _fetch_thread_page(youtube, api_key, store, video_id, order_by, status, page_token, remaining):
+    res = execute_request(youtube.commentThreads().list(
+        part="snippet",
+        videoId=video_id,
+        maxResults=min(100, remaining),
+        pageToken=page_token,
+        order=order_by
+    ), api_key, status)
+
+    page = [_parse_thread(item) for item in res['items']][:remaining]
+    # Tetap simpan ke disk supaya komentar yang sama tidak hilang (dan bisa dipakai untuk resume)
+    store.upsert_comments(video_id, page)
+    return page, res.get('nextPageToken')
+
+
+def _iter_comment_pages_with_replies(youtube, api_key, store, video_id, max_comments, order_by, status,
+                                     max_workers=MAX_REPLY_WORKERS):
+    """Halaman thread beserta balasannya (balasan langsung setelah komentar induknya).
+
+    Balasan yang sudah ikut di respons thread dipakai langsung; thread yang balasannya lebih
+    banyak dari itu di-page lewat ``comments().list`` secara paralel (maks ``max_workers``).
+    Jatah ``max_comments`` dipakai berurutan per thread: komentar utama lalu balasannya."""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"replies-{video_id}") as pool:
+        fetch_page = partial(_fetch_thread_page_with_replies, youtube, api_key, store, video_id, order_by, status, pool)
+        yield from _iter_resumable(store, video_id, f"{order_by}+replies", max_comments, fetch_page, status)
+
+
+def _fetch_thread_page_with_replies(youtube, api_key, store, video_id, order_by, status, pool, page_token, remaining):
+    res = execute_request(youtube.commentThreads().list(
+        part="snippet,replies",
+        videoId=video_id,
+        maxResults=min(100, remaining),
+        pageToken=page_token,
+        order=order_by
+    ), api_key, status)
+
+    threads = []
+    replies = {}
+    pending = {}
+    for item in res['items']:
+        if remaining <= 0: break
+        comment = _parse_thread(item)
+        threads.append(comment)
+        remaining -= 1
+
+        embedded = [_parse_reply(r) for r in item.get('replies', {}).get('comments', [])]
+        total_replies = item['snippet'].get('totalReplyCount', 0)
+        if total_replies <= len(embedded):
+            replies[comment['comment_id']] = embedded[:remaining]
+            remaining -= len(replies[comment['comment_id']])
+        elif remaining > 0:
+            limit = min(total_replies, remaining)
+            future = pool.submit(_fetch_replies, api_key, comment['comment_id'], limit, status)
+            pending[comment['comment_id']] = (future, limit)
+            remaining -= limit
+
+    for comment_id, (future, limit) in pending.items():
+        replies[comment_id] = future.result()
+
+    page = []
+    for comment in threads:
+        page.append(comment)
+        page.extend(replies.get(comment['comment_id'], []))
+    # Balasan ikut disimpan (dengan parent_id) supaya halaman ini bisa dibaca ulang saat resume
+    store.upsert_comments(video_id, page)
+    return page, res.get('nextPageToken')
+
+
+def _unseen(page, boundary):
+    """Komentar ``page`` yang belum di-yield. Halaman keluar urut waktu menurun di ketiga langkah,
+    jadi yang lebih baru dari ``boundary`` (timestamp terakhir, id-id di timestamp itu) pasti sudah
+    lewat; id hanya perlu dicek untuk komentar dengan timestamp yang sama."""
+    last_ts, last_ids = boundary
+    if last_ts is None:
+        return page
+    return [c for c in page if c['timestamp'] < last_ts or (c['timestamp'] == last_ts and c['comment_id'] not in last_ids)]
+
+
+def _advance(boundary, page):
+    last_ts, last_ids = boundary
+    for c in page:
+        if c['timestamp'] != last_ts:
+            last_ts, last_ids = c['timestamp'], set()
+        last_ids.add(c['comment_id'])
+    return last_ts, last_ids
+
+
+def _iter_comment_pages_incremental(youtube, api_key, store, video_id, max_comments, status=None):
+    """Halaman komentar order=time: hanya yang lebih baru dari high-water mark diambil dari API,
+    sisanya dibaca dari penyimpanan lokal. Kalau rentang lokal belum cukup, lanjutkan paging
+    dari ``resume_token`` terakhir.
+
+    Duplikat antar langkah dibuang lewat batas timestamp (lihat ``_unseen``), bukan dengan
+    menyimpan semua id yang sudah di-yield, supaya memori tidak tumbuh dengan jumlah komentar.
+
+    Kalau cek komentar baru gagal (kuota habis/API error), rentang lokal tetap disajikan dan
+    exception-nya baru diteruskan setelahnya, supaya pemanggil mendapat hasil parsial."""
+    state = store.get_state(video_id) or {}
+    high_water = state.get('high_water')
+    low_water = state.get('low_water')
+    resume_token = state.get('resume_token')
+    history_complete = bool(state.get('history_complete'))
+    remaining = max_comments
+    boundary = (None, set())
+    stopped = None
+
+    try:
+        # Step 1: komentar baru di atas high-water mark
+        if high_water:
+            newest = oldest = next_page = None
+            reached_stored = False
+            while remaining > 0:
+                try:
+                    res = execute_request(youtube.commentThreads().list(
+                        part="snippet",
+                        videoId=video_id,
+                        maxResults=100,
+                        pageToken=next_page,
+                        order='time'
+                    ), api_key, status)
+                except (QuotaExceeded, HttpError) as e:
+                    stopped = e
+                    break
+
+                page = []
+                for item in res['items']:
+                    comment = _parse_thread(item)
+                    if comment['timestamp'] < high_water:
+                        reached_stored = True
+                        break
+                    page.append(comment)
+
+                store.upsert_comments(video_id, page)
+                if page:
+                    newest = newest or page[0]['timestamp']
+                    oldest = page[-1]['timestamp']
+                    page = page[:remaining]
+                    boundary = _advance(boundary, page)
+                    remaining -= len(page)
+                    yield page
+
+                next_page = res.get('nextPageToken')
+                if reached_stored or not next_page:
+                    reached_stored = True
+                    break
+
+            # Kalau step 1 terputus, state lama dipertahankan; run berikutnya mengambil ulang yang baru
+            if newest and stopped is None:
+                if reached_stored:
+                    high_water = newest
+                else:
+                    # Terlalu banyak komentar baru: ada celah dengan data lama, mulai rentang baru
+                    high_water, low_water, resume_token, history_complete = newest, oldest, next_page, False
+                store.set_state(video_id, high_water, low_water, resume_token, history_complete)
+
+            # Step 2: sisanya dari rentang yang sudah tersimpan
+            if remaining > 0:
+                for page in store.iter_comments(video_id, max_comments, low_water, page_size=100):
+                    page = _unseen(page, boundary)[:remaining]
+                    if page:
+                        boundary = _advance(boundary, page)
+                        remaining -= len(page)
+                        yield page
+                    if remaining <= 0:
+                        break
+            if stopped is not None:
+                raise stopped
+
+        # Step 3: lanjutkan paging ke komentar lebih lama sampai max_comments (atau sampai habis)
+        first_page = not high_water
+        while remaining > 0 and not history_complete and (first_page or resume_token):
+            res = execute_request(youtube.commentThreads().list(
+                part="snippet",
+                videoId=video_id,
+                maxResults=min(100, remaining),
+                pageToken=None if first_page else resume_token,
+                order='time'
+            ), api_key, status)
+
+            page = [_parse_thread(item) for item in res['items']]
+            store.upsert_comments(video_id, page)
+            if page:
+                if first_page:
+                    high_water = page[0]['timestamp']
+                low_water = page[-1]['timestamp']
+            first_page = False
+            resume_token = res.get('nextPageToken')
+            history_complete = not resume_token
+            if high_water:
+                store.set_state(video_id, high_water, low_water, resume_token, history_complete)
+
+            page = _unseen(page, boundary)[:remaining]
+            boundary = _advance(boundary, page)
+            remaining -= len(page)
+            yield page
+    except HttpError as e:
+        # Token lanjutan bisa kedaluwarsa (400); buang supaya run berikutnya mulai bersih.
+        # Error lain (kuota dll) tidak mengubah state yang sudah tersimpan per halaman, jadi run
+        # berikutnya melanjutkan dari resume_token terakhir.
+        if e.resp.status == 400:
+            store.set_state(video_id, None, None, None, False)
+        raise
+
+
+def iter_new_comments(api_key, store, video_id, since=None, seen_ids=(), max_comments=1000, status=None):
+    """Halaman komentar utama yang terbit sejak ``since`` (timestamp RFC 3339, inklusif), terbaru dulu;
+    id di ``seen_ids`` (komentar di detik ``since`` yang sudah diproses) dilewati. Tanpa ``since``
+    hasilnya ``max_comments`` komentar terbaru. Paging berhenti begitu bertemu komentar yang lebih
+    lama dari ``since``, jadi biaya kuota sebanding dengan jumlah komentar baru saja."""
+    status = new_fetch_status() if status is None else status
+    seen_ids = set(seen_ids)
+    remaining = max_comments
+    next_page = None
+    with youtube_client(api_key) as youtube:
+        while remaining > 0:
+            res = execute_request(youtube.commentThreads().list(
+                part="snippet",
+                videoId=video_id,
+                maxResults=100 if since else min(100, remaining),
+                pageToken=next_page,
+                order='time'
+            ), api_key, status)
+
+            page = []
+            reached_since = False
+            for item in res['items']:
+                comment = _parse_thread(item)
+                if since and comment['timestamp'] < since:
+                    reached_since = True
+                    break
+                if comment['comment_id'] not in seen_ids:
+                    page.append(comment)
+            page = page[:remaining]
+            store.upsert_comments(video_id, page)
+            if page:
+                remaining -= len(page)
+                count_status(status, 'fetched', len(page))
+                yield page
+
+            next_page = res.get('nextPageToken')
+            if reached_since or not next_page:
+                break
+
+
+def fetch_comments(api_key, store, video_id, max_comments, order_by, progress=no_progress, include_replies=False,
+                   status=None):
+    """Semua halaman dari ``iter_comment_pages``; ``status`` (kalau diberikan) diisi status fetch."""
+    status = new_fetch_status() if status is None else status
+    all_comments = []
+    for page in iter_comment_pages(api_key, store, video_id, max_comments, order_by, include_replies, status):
+        all_comments.extend(page)
+        progress(f"Mengambil komentar: {len(all_comments)}/{max_comments}")
+    if status['status'] == 'complete':
+        progress(f"Berhasil mengambil {len(all_comments)} komentar!")
+    else:
+        progress(f"Berhenti di {len(all_comments)} komentar: {status['message']}")
+    return all_comments
+
+
+# ================== CLEANING ==================
+def clean_for_visualization(text):
+    """Hapus stopwords dari teks untuk kepentingan visualisasi saja"""
+    words = text.split()
+    filtered = [w for w in words if w not in INDO_STOPWORDS and len(w) > 2]
+    return ' '.join(filtered)
+
+
+# ================== ANALISIS ==================
+def new_inference_stats():
+    return {'comments': 0, 'unique': 0, 'model_calls': 0, 'cache_hits': 0, 'cache_hit_rate': 0.0}
+
+
+# Batas token (jumlah komentar x panjang token terpanjang di batch) per forward pass
+MAX_BATCH_TOKENS = 8192
+MAX_BATCH_SIZE = 256
+
+
+def _bucket_batches(lengths, max_batch_tokens, max_batch_size):
+    """Kelompokkan indeks berdasarkan panjang token (pendek ke panjang). Batch ditutup kalau
+    ``jumlah x panjang terpanjang`` melewati budget token, jadi padding per batch minimal."""
+    batches = []
+    current = []
+    for idx in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Karena urut naik, komentar ini yang terpanjang di batch
+        if current and ((len(current) + 1) * lengths[idx] > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def iter_classified(nlp, texts, batch_size=64, max_batch_tokens=MAX_BATCH_TOKENS, max_batch_size=MAX_BATCH_SIZE):
+    """Klasifikasi ``texts``; yield ``(indeks, hasil)`` per batch, hasil berupa ``{'label', 'score'}``
+    seperti output pipeline. Indeks menunjuk posisi di ``texts`` supaya hasil bisa dikembalikan
+    ke urutan asli.
+
+    Untuk pipeline transformers, teks di-tokenize sekali lalu dibatch per panjang token dan
+    langsung diteruskan ke model (softmax + argmax, sama seperti pipeline sentiment-analysis).
+    Classifier yang punya ``iter_classified`` sendiri (``ShardedClassifier``) dipakai langsung;
+    classifier lain (stub, dsb) dipanggil biasa per ``batch_size``."""
+    sharded = getattr(nlp, 'iter_classified', None)
+    if sharded is not None:
+        # Waktu tunggu hasil tiap shard dari worker process
+        yield from metrics.iter_spans('model_forward', sharded(texts, batch_size=batch_size, max_batch_tokens=max_batch_tokens),
+                                      count=lambda r: len(r[0]))
+        return
+
+    tokenizer = getattr(nlp, 'tokenizer', None)
+    model = getattr(nlp, 'model', None)
+    if tokenizer is None or model is None:
+        for i in range(0, len(texts), batch_size):
+            indices = list(range(i, min(i + batch_size, len(texts))))
+            with metrics.span('model_forward', len(indices)):
+                results = nlp([texts[j] for j in indices])
+            yield indices, results
+        return
+
+    import torch
+    with metrics.span('tokenize', len(texts)):
+        encodings = tokenizer(texts, truncation=True, max_length=512)
+    lengths = [len(ids) for ids in encodings['input_ids']]
+    id2label = model.config.id2label
+    for indices in _bucket_batches(lengths, max_batch_tokens, max_batch_size):
+        with metrics.span('model_forward', len(indices)):
+            features = tokenizer.pad({k: [encodings[k][j] for j in indices] for k in encodings.keys()},
+                                     return_tensors='pt')
+            with torch.no_grad():
+                logits = model(**features).logits
+            scores, label_ids = logits.softmax(dim=-1).max(dim=-1)
+            results = [{'label': id2label[c], 'score': s} for c, s in zip(label_ids.tolist(), scores.tolist())]
+        yield indices, results
+
+
+def predict_sentiment(nlp, cache, texts, predictions, stats, progress=None, batch_size=64,
+                      max_batch_tokens=MAX_BATCH_TOKENS):
+    """Isi ``predictions`` ({teks bersih: {'label', 'score'}}) untuk teks yang belum ada.
+    Teks yang sama cukup diproses model sekali, dan yang sudah pernah dianalisis diambil dari cache.
+    ``progress(selesai, total)`` dipanggil setelah tiap batch model."""
+    unique_texts = [t for t in dict.fromkeys(texts) if t not in predictions]
+    if not unique_texts:
+        return
+    cached = cache.get_many(unique_texts) if cache is not None else {}
+    predictions.update(cached)
+    pending = [t for t in unique_texts if t not in cached]
+    stats['unique'] += len(unique_texts)
+    stats['cache_hits'] += len(cached)
+    stats['model_calls'] += len(pending)
+
+    done = 0
+    for indices, results in iter_classified(nlp, pending, batch_size=batch_size, max_batch_tokens=max_batch_tokens):
+        fresh = {pending[j]: {'label': r['label'], 'score': r['score']} for j, r in zip(indices, results)}
+        predictions.update(fresh)
+        if cache is not None:
+            cache.put_many(fresh)
+        done += len(indices)
+        if progress:
+            progress(done, len(pending))
+
+
+def sentiment_percentages(counts):
+    total = sum(counts.values())
+    return {k: round(v/total*100, 2) if total > 0 else 0 for k, v in counts.items()}
+
+
+@dataclass
+class AnalysisResult:
+    """Hasil analisis sebagai satu tabel kolumnar, satu baris per komentar yang diambil.
+
+    Kolom ``table``: ``text``, ``clean``, ``vis_clean`` (teks untuk word cloud/TF-IDF),
+    ``sentiment`` (categorical, NaN untuk komentar yang terfilter), ``score`` (float32),
+    ``timestamp`` (datetime UTC), ``like_count`` (int32), ``is_reply`` dan ``parent_id``.
+    Semua tampilan dan export diturunkan dari tabel ini; statistik kata ada di ``terms``.
+    ``fetch_status`` menandai hasil parsial (kuota habis/error di tengah fetch).
+    """
+    table: object
+    terms: TermIndex = field(default_factory=lambda: TermIndex(SENTIMENTS))
+    tfidf_words: dict = field(default_factory=lambda: {sent: [] for sent in SENTIMENTS})
+    timeseries: dict = field(default_factory=dict)
+    fetch_status: dict = field(default_factory=new_fetch_status)
+
+    # Semua baris ada di memori (lihat out_of_core.OutOfCoreResult untuk video yang sangat besar)
+    out_of_core = False
+
+    @property
+    def partial(self):
+        return self.fetch_status['status'] != 'complete'
+
+    @property
+    def analyzed(self):
+        """Baris yang lolos filter panjang dan punya label sentimen."""
+        return self.table[self.table['sentiment'].notna()]
+
+    @property
+    def fetched(self):
+        return len(self.table)
+
+    @property
+    def total(self):
+        return int(self.table['sentiment'].notna().sum())
+
+    @property
+    def counts(self):
+        counts = self.table['sentiment'].value_counts()
+        return {sent: int(counts.get(sent, 0)) for sent in SENTIMENTS}
+
+    @property
+    def percentages(self):
+        return sentiment_percentages(self.counts)
+
+    def _rows(self, sent):
+        return self.table[self.table['sentiment'] == sent]
+
+    def samples(self, sent, n=5):
+        return self._rows(sent)['text'].head(n).tolist()
+
+    def texts_clean(self, sent):
+        texts = self._rows(sent)['vis_clean']
+        return texts[texts != ''].tolist()
+
+    def word_counts(self, sent):
+        """Frekuensi kata teks visualisasi per sentimen (dari ``terms``, dihitung saat analisis)."""
+        return self.terms.counts[sent]
+
+    def scores(self, sent):
+        return self._rows(sent)['score'].to_numpy()
+
+    def sentiment_by_reply(self):
+        """Jumlah sentimen komentar utama vs balasan."""
+        analyzed = self.analyzed
+        split = {}
+        for key, rows in (('top_level', analyzed[~analyzed['is_reply']]), ('reply', analyzed[analyzed['is_reply']])):
+            counts = rows['sentiment'].value_counts()
+            split[key] = {sent: int(counts.get(sent, 0)) for sent in SENTIMENTS}
+        return split
+
+    def memory_usage(self):
+        """Perkiraan memori tabel dalam byte (termasuk isi string)."""
+        return int(self.table.memory_usage(deep=True).sum())
+
+    def export_frame(self):
+        """DataFrame per komentar (format yang sama dengan download CSV di UI)."""
+        import pandas as pd
+
+        t = self.table
+        return pd.DataFrame({
+            "Timestamp": t['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "Komentar Asli": t['text'],
+            "Komentar Bersih": t['clean'],
+            "Sentimen": t['sentiment'].astype(object).fillna("N/A (filtered)"),
+            "Skor Kepercayaan": t['score'].astype('float64').fillna(0.0),
+            "Jumlah Like": t['like_count'],
+            "Balasan Dari": t['parent_id'].astype(object).fillna(''),
+        })
+
+    def export_csv(self, path):
+        """Tulis ``export_frame`` ke ``path`` (CSV) dan kembalikan path-nya."""
+        self.export_frame().to_csv(path, index=False)
+        return path
+
+
+def build_table(comment_data, cleaned, predictions, terms=None):
+    """Tabel ``AnalysisResult`` dari komentar mentah, teks bersihnya dan hasil model per teks bersih.
+    Kalau ``terms`` diberikan, statistik kata ikut diisi dalam pass yang sama."""
+    import numpy as np
+    import pandas as pd
+
+    labels = []
+    scores = np.full(len(cleaned), np.nan, dtype='float32')
+    vis_by_clean = {}
+    vis_clean = []
+    for i, cleaned_text in enumerate(cleaned):
+        r = predictions.get(cleaned_text) if len(cleaned_text) > 10 else None
+        if r is None:
+            labels.append(None)
+            vis_clean.append('')
+            continue
+        label = r['label'].lower()
+        labels.append(label)
+        scores[i] = r['score']
+        vis = vis_by_clean.get(cleaned_text)
+        if vis is None:
+            vis = vis_by_clean[cleaned_text] = clean_for_visualization(cleaned_text)
+        vis_clean.append(vis)
+        if terms is not None:
+            terms.add(label, vis)
+
+    return pd.DataFrame({
+        'text': [item['text'] for item in comment_data],
+        'clean': cleaned,
+        'vis_clean': vis_clean,
+        'sentiment': pd.Categorical(labels, categories=SENTIMENTS),
+        'score': scores,
+        # Satu kali parse untuk semua timestamp (format RFC 3339 dari API)
+        'timestamp': pd.to_datetime(pd.Series([item['timestamp'] for item in comment_data], dtype=object),
+                                    utc=True, format='ISO8601'),
+        'like_count': np.array([item['like_count'] for item in comment_data], dtype='int32'),
+        'is_reply': np.array([item.get('is_reply', False) for item in comment_data], dtype=bool),
+        'parent_id': pd.Categorical([item.get('parent_id') for item in comment_data]),
+    })
+
+
+def analyze_sentiment(nlp, cache, comment_data, progress=no_progress, predictions=None, cleaned_by_text=None,
+                      stats=None, batch_size=64, fetch_status=None):
+    """Analisis sentimen. ``predictions``/``cleaned_by_text`` boleh berisi hasil yang sudah dihitung
+    sebelumnya (mis. dari pipeline), sehingga hanya teks yang belum ada yang masuk model.
+
+    Mengembalikan ``AnalysisResult``; ``stats`` (kalau diberikan) diisi statistik inference.
+    ``fetch_status`` (dari fetch) ikut disimpan di hasil."""
+    predictions = {} if predictions is None else predictions
+    cleaned_by_text = {} if cleaned_by_text is None else cleaned_by_text
+    stats = new_inference_stats() if stats is None else stats
+
+    cleaned = []
+    with metrics.span('clean', len(comment_data)):
+        for item in comment_data:
+            cleaned_text = cleaned_by_text.get(item['text'])
+            if cleaned_text is None:
+                cleaned_text = clean_comment(item['text'])
+            cleaned.append(cleaned_text)
+    valid = [c for c in cleaned if len(c) > 10]
+
+    if valid:
+        progress(f"Menganalisis {len(valid)} komentar...")
+
+        def _progress(done, pending_total):
+            # Update status di dalam loop
+            progress(f"Menganalisis komentar: {done}/{pending_total}")
+
+        predict_sentiment(nlp, cache, valid, predictions, stats, progress=_progress, batch_size=batch_size)
+        stats['comments'] = len(valid)
+        stats['cache_hit_rate'] = cache.hit_rate if cache is not None else 0.0
+
+    if valid:
+        progress("Menyelesaikan visualisasi...")
+    terms = TermIndex(SENTIMENTS)
+    with metrics.span('build_table', len(comment_data)):
+        table = build_table(comment_data, cleaned, predictions, terms)
+    # TF-IDF dihitung dari statistik kata yang sama (teks bersih untuk visualisasi)
+    with metrics.span('tfidf', len(terms.totals)):
+        tfidf_words = terms.tfidf_words()
+    with metrics.span('timeseries', len(table)):
+        timeseries = build_timeseries(table)
+    return AnalysisResult(table, terms, tfidf_words, timeseries,
+                          fetch_status if fetch_status is not None else new_fetch_status())
+
+
+# Resolusi tren sentimen yang bisa dipilih di UI
+TIME_RESOLUTIONS = {'1h': 'Per Jam', '6h': 'Per 6 Jam', '1D': 'Harian'}
+MAX_TIME_POINTS = 500
+
+
+def format_bucket(freq):
+    """Lebar bucket (Timedelta) dalam bahasa manusia, mis. ``6 jam`` atau ``3 hari``."""
+    hours = int(freq.total_seconds() // 3600)
+    return f"{hours // 24} hari" if hours % 24 == 0 else f"{hours} jam"
+
+
+def build_timeseries(table, max_points=MAX_TIME_POINTS):
+    """Jumlah komentar per sentimen per bucket waktu untuk tiap resolusi di ``TIME_RESOLUTIONS``.
+
+    Mengembalikan ``{resolusi: (frame, bucket)}``; ``frame`` ber-index waktu dengan satu kolom per
+    sentimen. Kalau satu resolusi menghasilkan lebih dari ``max_points`` titik (video yang sudah
+    lama), bucket diperlebar dan ``bucket`` berisi lebar sebenarnya."""
+    import pandas as pd
+
+    analyzed = table[table['sentiment'].notna()]
+    if analyzed.empty:
+        return {}
+    # Agregasi per jam sekali, resolusi lain diturunkan dari situ
+    hourly = pd.crosstab(analyzed['timestamp'].dt.floor('h'), analyzed['sentiment'].astype(str))
+    return _timeseries_from_hourly(hourly, max_points)
+
+
+def _timeseries_from_hourly(hourly, max_points=MAX_TIME_POINTS):
+    """Semua resolusi dari jumlah per jam (index waktu UTC, satu kolom per sentimen)."""
+    import pandas as pd
+
+    hourly = hourly.reindex(columns=SENTIMENTS, fill_value=0).resample('h').sum()
+    hourly.columns.name = 'sentiment'
+    cube = {}
+    for resolution in TIME_RESOLUTIONS:
+        bucket = pd.to_timedelta(resolution)
+        frame = hourly.resample(bucket).sum()
+        if len(frame) > max_points:
+            bucket = bucket * math.ceil(len(frame) / max_points)
+            frame = hourly.resample(bucket).sum()
+        frame.index.name = 'date'
+        cube[resolution] = (frame, bucket)
+    return cube
+
+
+def hour_key(timestamp):
+    """Jam UTC komentar sebagai ``YYYY-MM-DDTHH`` (bisa diurutkan sebagai string)."""
+    # Timestamp API selalu UTC ("...Z"), jadi jamnya cukup dipotong dari string
+    if timestamp.endswith('Z'):
+        return timestamp[:13]
+    return datetime.fromisoformat(timestamp).astimezone(timezone.utc).strftime('%Y-%m-%dT%H')
+
+
+class RunningAggregate:
+    """Jumlah sentimen dan jumlah per jam yang diperbarui per komentar selama pipeline berjalan.
+
+    Cukup untuk kartu ringkasan, pie dan tren tanpa membangun tabel hasil; setelah semua komentar
+    masuk, angkanya sama dengan ``AnalysisResult`` dari data yang sama."""
+
+    def __init__(self):
+        self.fetched = 0
+        self.complete = False
+        self._counts = Counter()
+        self._hourly = Counter()
+
+    def add(self, label, timestamp):
+        label = label.lower()
+        self._counts[label] += 1
+        self._hourly[(hour_key(timestamp), label)] += 1
+
+    def copy(self):
+        """Salinan untuk dibaca thread lain sementara pipeline terus menambah komentar."""
+        other = RunningAggregate()
+        other.fetched, other.complete = self.fetched, self.complete
+        other._counts, other._hourly = self._counts.copy(), self._hourly.copy()
+        return other
+
+    @property
+    def total(self):
+        return sum(self._counts.values())
+
+    @property
+    def counts(self):
+        return {sent: self._counts[sent] for sent in SENTIMENTS}
+
+    @property
+    def percentages(self):
+        return sentiment_percentages(self.counts)
+
+    def timeseries(self, max_points=MAX_TIME_POINTS):
+        """Sama dengan ``build_timeseries`` untuk komentar yang sudah masuk."""
+        import pandas as pd
+
+        if not self._hourly:
+            return {}
+        hourly = pd.Series(self._hourly).unstack(fill_value=0)
+        hourly.index = pd.to_datetime(hourly.index, format='%Y-%m-%dT%H', utc=True)
+        return _timeseries_from_hourly(hourly.sort_index(), max_points)
+
+
+def prefetch(iterable, max_pending=8, name=None):
+    """Jalankan ``iterable`` di thread terpisah dengan antrian terbatas (maks ``max_pending`` elemen di
+    depan pemanggil), jadi fetch halaman berikutnya berjalan sementara pemanggil memproses halaman ini.
+    Exception dari ``iterable`` diteruskan ke pemanggil; ``close()`` menghentikan thread-nya."""
+    items = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    done = object()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _producer():
+        try:
+            for item in iterable:
+                if not _put(item):
+                    return
+        except Exception as e:
+            _put(e)
+        finally:
+            _put(done)
+
+    producer = threading.Thread(target=metrics.bind(_producer), name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join(timeout=1)
+
+
+def run_analysis_pipeline(api_key, store, nlp, cache, video_id, max_comments, order_by, progress=no_progress,
+                          batch_size=64, max_pending_pages=8, chunk_size=256, include_replies=False,
+                          on_update=None):
+    """Ambil komentar dan jalankan model secara bersamaan.
+
+    Thread fetch memasukkan halaman ke antrian terbatas, sementara thread pemanggil
+    membersihkan dan mengklasifikasi batch begitu datanya tersedia. Hasilnya
+    ``(comment_data, precomputed)``; ``precomputed`` bisa langsung diteruskan ke
+    ``analyze_sentiment`` sehingga tidak ada teks yang diproses model dua kali. Kalau fetch
+    berhenti di tengah (kuota habis dll), komentar yang sudah diambil tetap dianalisis dan
+    ``precomputed['fetch_status']`` menjelaskan alasannya.
+
+    ``on_update(aggregate)`` (opsional) dipanggil setiap ada halaman atau batch model yang selesai
+    dengan ``RunningAggregate`` terbaru; panggilan terakhir punya ``aggregate.complete`` True.
+    """
+    fetch_status = new_fetch_status()
+    comment_data = []
+    cleaned_by_text = {}
+    predictions = {}
+    stats = new_inference_stats()
+    pending = []
+    seen = set()
+    aggregate = RunningAggregate()
+    waiting = {}  # teks bersih yang belum diklasifikasi -> timestamp komentar-komentarnya
+
+    def _resolve(texts):
+        for text in texts:
+            if text in predictions:
+                for timestamp in waiting.pop(text, ()):
+                    aggregate.add(predictions[text]['label'], timestamp)
+
+    def _classify(texts):
+        def _batch_done(done, total):
+            # Tampilan sementara ikut maju tiap batch model, bukan hanya tiap chunk
+            _resolve(texts)
+            if on_update:
+                on_update(aggregate)
+
+        predict_sentiment(nlp, cache, texts, predictions, stats, progress=_batch_done, batch_size=batch_size)
+        _resolve(texts)
+
+    pages = prefetch(iter_comment_pages(api_key, store, video_id, max_comments, order_by, include_replies, fetch_status),
+                     max_pending_pages, name=f"fetch-{video_id}")
+    try:
+        for page in pages:
+            comment_data.extend(page)
+            aggregate.fetched = len(comment_data)
+            with metrics.span('clean', len(page)):
+                for item in page:
+                    cleaned_text = cleaned_by_text.get(item['text'])
+                    if cleaned_text is None:
+                        cleaned_text = cleaned_by_text[item['text']] = clean_comment(item['text'])
+                    if len(cleaned_text) > 10:
+                        if cleaned_text in predictions:
+                            aggregate.add(predictions[cleaned_text]['label'], item['timestamp'])
+                        else:
+                            waiting.setdefault(cleaned_text, []).append(item['timestamp'])
+                            if cleaned_text not in seen:
+                                seen.add(cleaned_text)
+                                pending.append(cleaned_text)
+
+            # Kumpulkan beberapa batch dulu supaya bucketing per panjang token punya cukup pilihan
+            while len(pending) >= chunk_size:
+                _classify(pending[:chunk_size])
+                del pending[:chunk_size]
+
+            progress(f"Mengambil komentar: {len(comment_data)}/{max_comments} • Dianalisis: {len(predictions)}")
+            if on_update:
+                on_update(aggregate)
+
+        _classify(pending)
+        aggregate.complete = True
+        if on_update:
+            on_update(aggregate)
+    finally:
+        pages.close()
+
+    return comment_data, {'predictions': predictions, 'cleaned_by_text': cleaned_by_text, 'stats': stats,
+                          'fetch_status': fetch_status}
+
+
+# ================== VISUALISASI ==================
+# Gambar yang sudah dirender disimpan per hash (frekuensi + parameter), jadi rerun Streamlit
+# (mis. pindah tab) tidak menggambar ulang word cloud yang sama
+WORDCLOUD_OPTIONS = {'width': 800, 'height': 400, 'background_color': '#0f0f23', 'colormap': 'viridis',
+                     'max_words': 200, 'random_state': 42}
+MAX_WORDCLOUD_CACHE = 32
+_wordcloud_cache = OrderedDict()
+_wordcloud_lock = threading.Lock()
+_wordcloud_pool = None
+
+
+def wordcloud_key(frequencies, options):
+    payload = json.dumps([sorted(frequencies.items()), sorted(options.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_wordcloud(frequencies, **options):
+    """Word cloud dari frekuensi kata (dict kata -> jumlah) sebagai PNG bytes, atau None kalau kosong."""
+    if not frequencies: return None
+    options = {**WORDCLOUD_OPTIONS, **options}
+    key = wordcloud_key(frequencies, options)
+    with _wordcloud_lock:
+        if key in _wordcloud_cache:
+            _wordcloud_cache.move_to_end(key)
+            return _wordcloud_cache[key]
+
+    from wordcloud import WordCloud
+
+    with metrics.span('wordcloud', len(frequencies)):
+        image = WordCloud(**options).generate_from_frequencies(frequencies).to_image()
+        buf = BytesIO()
+        image.save(buf, format='PNG')
+        png = buf.getvalue()
+    with _wordcloud_lock:
+        _wordcloud_cache[key] = png
+        while len(_wordcloud_cache) > MAX_WORDCLOUD_CACHE:
+            _wordcloud_cache.popitem(last=False)
+    return png
+
+
+def render_wordclouds_async(frequencies_by_key, **options):
+    """Render beberapa word cloud paralel di worker pool; kembalikan ``{key: Future}`` (hasil PNG bytes)."""
+    global _wordcloud_pool
+    with _wordcloud_lock:
+        if _wordcloud_pool is None:
+            _wordcloud_pool = ThreadPoolExecutor(max_workers=len(SENTIMENTS), thread_name_prefix='wordcloud')
+    return {
+        key: _wordcloud_pool.submit(metrics.bind(render_wordcloud), frequencies, **options)
+        for key, frequencies in frequencies_by_key.items()
+    }
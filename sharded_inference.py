@@ -0,0 +1,131 @@
+"""Inference multi-core: teks dibagi (shard) ke beberapa worker process, masing-masing dengan
+salinan model sendiri dan jumlah thread torch yang dipatok.
+
+Dengan ``workers x threads_per_worker`` <= jumlah core, tiap proses tidak berebut thread dengan
+proses lain, dan beberapa sesi/pemakai yang memakai pool yang sama hanya mengantre shard.
+Worker dibuat dengan start method ``spawn`` (aman untuk torch dan thread Streamlit).
+
+``ShardedClassifier`` dikenali ``sentiment_core.iter_classified`` lewat method
+``iter_classified``, jadi bisa dipakai di mana pun pipeline biasa dipakai.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import sentiment_core as core
+
+DEFAULT_WORKERS = int(os.environ.get('SENTIMENT_WORKERS', '0'))  # 0 = inference di proses utama
+DEFAULT_THREADS_PER_WORKER = int(os.environ.get('SENTIMENT_THREADS_PER_WORKER', '0'))  # 0 = core / workers
+DEFAULT_SHARD_SIZE = 256
+
+# Model milik worker process (diisi initializer)
+_worker_nlp = None
+_worker_version = None
+
+
+def _init_worker(loader, backend, threads):
+    global _worker_nlp, _worker_version
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # sudah diset (mis. loader sudah menjalankan operasi paralel)
+    _worker_nlp = loader()
+    _worker_version = core.model_version(_worker_nlp, backend) if hasattr(_worker_nlp, 'model') else 'unknown'
+
+    import warmup
+    warmup.warm_up_model(_worker_nlp)
+
+
+def _classify_shard(texts, batch_size, max_batch_tokens):
+    results = [None] * len(texts)
+    for indices, batch in core.iter_classified(_worker_nlp, texts, batch_size=batch_size,
+                                               max_batch_tokens=max_batch_tokens):
+        for j, r in zip(indices, batch):
+            results[j] = {'label': r['label'], 'score': float(r['score'])}
+    return results
+
+
+def _get_worker_version():
+    return _worker_version
+
+
+def default_threads_per_worker(workers):
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class ShardedClassifier:
+    """Classifier dengan pool ``workers`` proses. ``loader`` (callable tanpa argumen yang bisa
+    di-pickle) memuat model di tiap worker; default ``load_sentiment_model(backend)``."""
+
+    def __init__(self, backend=core.DEFAULT_BACKEND, workers=None, threads_per_worker=None,
+                 shard_size=DEFAULT_SHARD_SIZE, loader=None):
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(self.workers)
+        self.shard_size = shard_size
+        loader = loader or partial(core.load_sentiment_model, backend)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(loader, backend, self.threads_per_worker),
+        )
+        self._version = None
+
+    @property
+    def model_version(self):
+        """Versi model (dari worker, sekaligus menunggu minimal satu worker siap)."""
+        if self._version is None:
+            self._version = self._pool.submit(_get_worker_version).result()
+        return self._version
+
+    def iter_classified(self, texts, batch_size=64, max_batch_tokens=core.MAX_BATCH_TOKENS):
+        """Yield ``(indeks, hasil)`` per shard, sesuai urutan shard; indeks menunjuk posisi di
+        ``texts`` supaya hasil bisa dikembalikan ke urutan asli (seperti ``__call__``).
+
+        Shard dibuat dari teks yang sudah diurutkan per panjang (karakter), jadi tiap worker
+        mendapat teks dengan panjang mirip dan padding per batch tetap kecil."""
+        if not texts:
+            return
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        # Input kecil tetap dibagi ke semua worker
+        size = max(1, min(self.shard_size, math.ceil(len(texts) / self.workers)))
+        shards = [order[i:i + size] for i in range(0, len(order), size)]
+        futures = [
+            self._pool.submit(_classify_shard, [texts[j] for j in shard], batch_size, max_batch_tokens)
+            for shard in shards
+        ]
+        try:
+            for shard, future in zip(shards, futures):
+                yield shard, future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def __call__(self, texts):
+        results = [None] * len(texts)
+        for indices, batch in self.iter_classified(list(texts)):
+            for j, r in zip(indices, batch):
+                results[j] = r
+        return results
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_classifier(backend=core.DEFAULT_BACKEND, workers=DEFAULT_WORKERS, threads_per_worker=None):
+    """Pipeline biasa kalau ``workers`` 0, selain itu ``ShardedClassifier`` dengan ``workers`` proses."""
+    if not workers:
+        return core.load_sentiment_model(backend)
+    return ShardedClassifier(backend, workers=workers, threads_per_worker=threads_per_worker or DEFAULT_THREADS_PER_WORKER)
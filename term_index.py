@@ -0,0 +1,97 @@
+"""Statistik kata per sentimen: frekuensi, document frequency dan TF-IDF.
+
+Dibangun sekali per analisis dalam satu pass atas teks visualisasi (``add`` per komentar), lalu
+UI hanya membaca dari index ini. Kosakata dibatasi ``max_vocab``: kalau terlampaui, kata dengan
+frekuensi total terendah dibuang, jadi memori tetap terbatas di 50k+ komentar sementara kata
+yang sering muncul (yang ditampilkan) tetap akurat.
+
+``tfidf_words`` mereplikasi ``TfidfVectorizer(max_features=...)`` sklearn yang dulu dipakai
+(satu dokumen gabungan per sentimen, smooth idf, norm l2); ``tfidf_words_reference`` menyimpan
+implementasi lama sebagai acuan.
+"""
+import heapq
+import math
+from collections import Counter
+
+MAX_VOCAB = 50_000
+
+
+class TermIndex:
+    """Frekuensi kata per kategori (sentimen) yang dibangun secara streaming."""
+
+    def __init__(self, categories, max_vocab=MAX_VOCAB):
+        self.categories = list(categories)
+        self.max_vocab = max_vocab
+        self.counts = {cat: Counter() for cat in self.categories}
+        self.totals = Counter()
+        self.documents = Counter()  # jumlah komentar (dengan teks) per kategori
+        self.pruned_terms = 0
+
+    def add(self, category, text):
+        """Tambahkan satu teks (kata dipisah spasi) ke kategori ``category``."""
+        words = text.split()
+        if not words:
+            return
+        self.documents[category] += 1
+        self.counts[category].update(words)
+        self.totals.update(words)
+        if len(self.totals) > self.max_vocab:
+            self._prune()
+
+    def _prune(self):
+        # Sisakan separuh kosakata dengan frekuensi tertinggi supaya pruning tidak terjadi tiap add
+        keep = {term for term, _ in heapq.nlargest(self.max_vocab // 2, self.totals.items(), key=lambda x: x[1])}
+        dropped = [term for term in self.totals if term not in keep]
+        for term in dropped:
+            del self.totals[term]
+            for counts in self.counts.values():
+                counts.pop(term, None)
+        self.pruned_terms += len(dropped)
+
+    def top(self, category, n=10):
+        return self.counts[category].most_common(n)
+
+    def document_frequency(self, term):
+        """Jumlah kategori yang memuat ``term`` (dokumen = satu kategori, seperti TF-IDF di UI)."""
+        return sum(1 for counts in self.counts.values() if term in counts)
+
+    def tfidf_words(self, max_features=20):
+        """``{kategori: [(kata, skor), ...]}`` terurut skor menurun, atau list kosong kalau ada
+        kategori tanpa teks (sama seperti perilaku lama)."""
+        if not all(self.counts.values()):
+            return {cat: [] for cat in self.categories}
+
+        import numpy as np
+
+        # max_features: kata dengan frekuensi total tertinggi. Sama seperti sklearn, argsort dijalankan
+        # atas kosakata yang terurut alfabet supaya kata yang seri terpilih dengan cara yang sama
+        terms = sorted(self.totals)
+        totals = np.fromiter((self.totals[term] for term in terms), dtype=np.int64, count=len(terms))
+        vocab = sorted(terms[i] for i in (-totals).argsort()[:max_features])
+        n_docs = len(self.categories)
+        idf = {term: math.log((1 + n_docs) / (1 + self.document_frequency(term))) + 1 for term in vocab}
+
+        result = {}
+        for cat in self.categories:
+            weights = [(term, self.counts[cat][term] * idf[term]) for term in vocab]
+            norm = math.sqrt(sum(w * w for _, w in weights)) or 1.0
+            result[cat] = sorted(((term, w / norm) for term, w in weights), key=lambda x: x[1], reverse=True)
+        return result
+
+
+def tfidf_words_reference(texts_by_category, max_features=20):
+    """Implementasi lama (sklearn ``TfidfVectorizer`` atas dokumen gabungan), untuk cek regresi."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    categories = list(texts_by_category)
+    tfidf = TfidfVectorizer(max_features=max_features)
+    tfidf_docs = [' '.join(texts_by_category[cat]) for cat in categories]
+    if not all(doc.strip() for doc in tfidf_docs):
+        return {cat: [] for cat in categories}
+    tfidf.fit(tfidf_docs)
+    feature_names = tfidf.get_feature_names_out()
+    result = {}
+    for i, cat in enumerate(categories):
+        scores_vec = tfidf.transform([tfidf_docs[i]]).toarray()[0]
+        result[cat] = sorted([(feature_names[j], scores_vec[j]) for j in range(len(scores_vec))], key=lambda x: x[1], reverse=True)
+    return result
@@ -0,0 +1,24 @@
+import pandas as pd
+
+import cleaning
+from benchmarks.corpus import make_corpus
+
+
+def test_regression_corpus_matches_reference():
+    assert cleaning.verify_against_reference() == []
+
+
+def test_synthetic_corpus_matches_reference():
+    texts = [c['text'] for c in make_corpus(2000)]
+    assert cleaning.verify_against_reference(texts) == []
+
+
+def test_clean_many_matches_clean_comment():
+    texts = cleaning.REGRESSION_CORPUS * 2
+    expected = [cleaning.clean_comment_reference(t) for t in texts]
+    assert cleaning.clean_many(texts) == expected
+
+    series = pd.Series(texts, index=range(10, 10 + len(texts)), name='text')
+    result = cleaning.clean_many(series)
+    assert list(result) == expected
+    assert result.index.equals(series.index)
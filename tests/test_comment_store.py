@@ -0,0 +1,199 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import fetch_scheduler
+import sentiment_core as core
+from comment_store import CommentStore
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _comment(i, seconds, prefix='c'):
+    ts = (START + timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return {'comment_id': f'{prefix}{i}', 'thread_id': f'{prefix}{i}', 'timestamp': ts,
+            'text': f'komentar {prefix}{i}', 'like_count': i}
+
+
+class FakeYouTube:
+    """``commentThreads().list`` atas daftar komentar di memori; ``fail_on`` = nomor panggilan
+    yang ditolak API karena kuota habis."""
+
+    def __init__(self, comments=()):
+        self.comments = list(comments)
+        self.calls = 0
+        self.fail_on = set()
+
+    def commentThreads(self):
+        return self
+
+    def list(self, **kwargs):
+        return _Request(self, kwargs)
+
+    def respond(self, kwargs):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            resp = httplib2.Response({'status': 403})
+            raise HttpError(resp, json.dumps({'error': {'errors': [{'reason': 'quotaExceeded'}]}}).encode())
+        key = (lambda c: c['timestamp']) if kwargs['order'] == 'time' else (lambda c: c['like_count'])
+        ordered = sorted(self.comments, key=key, reverse=True)
+        start = int(kwargs.get('pageToken') or 0)
+        end = start + kwargs['maxResults']
+        items = [{'id': c['comment_id'], 'snippet': {'totalReplyCount': 0, 'topLevelComment': {
+            'id': c['comment_id'],
+            'snippet': {'textDisplay': c['text'], 'publishedAt': c['timestamp'], 'likeCount': c['like_count']}}}}
+            for c in ordered[start:end]]
+        return {'items': items, **({'nextPageToken': str(end)} if end < len(ordered) else {})}
+
+
+class _Request:
+    def __init__(self, youtube, kwargs):
+        self.youtube = youtube
+        self.kwargs = kwargs
+
+    def execute(self):
+        return self.youtube.respond(self.kwargs)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CommentStore(str(tmp_path / 'comments.sqlite3'))
+
+
+@pytest.fixture
+def youtube(tmp_path, monkeypatch):
+    fake = FakeYouTube()
+    monkeypatch.setattr(core, '_build_youtube', lambda api_key: fake)
+    monkeypatch.setattr(core, '_youtube_pool', {})
+    monkeypatch.setattr(fetch_scheduler, '_default_tracker', fetch_scheduler.QuotaTracker(str(tmp_path / 'quota.sqlite3')))
+    return fake
+
+
+def _reset_quota(tmp_path, monkeypatch):
+    # Kuota hari berikutnya: catatan lokal baru
+    monkeypatch.setattr(fetch_scheduler, '_default_tracker',
+                        fetch_scheduler.QuotaTracker(str(tmp_path / 'quota-next.sqlite3')))
+
+
+def _fetch(store, max_comments, order, status=None):
+    return core.fetch_comments('key', store, 'vid', max_comments, order, status=status)
+
+
+def _assert_time_ordered(comments):
+    ids = [c['comment_id'] for c in comments]
+    assert len(ids) == len(set(ids))
+    timestamps = [c['timestamp'] for c in comments]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_iter_comments_pages_newest_first_without_replies(store):
+    comments = [_comment(i, i) for i in range(250)]
+    store.upsert_comments('vid', comments + [dict(_comment(0, 999, 'r'), parent_id='c0')])
+    pages = list(store.iter_comments('vid', 1000, page_size=100))
+    assert [len(p) for p in pages] == [100, 100, 50]
+    loaded = [c for page in pages for c in page]
+    assert [c['comment_id'] for c in loaded] == [f'c{i}' for i in reversed(range(250))]
+
+
+def test_time_order_fetches_only_comments_above_high_water(store, youtube):
+    youtube.comments = [_comment(i, i // 3) for i in range(300)]  # tiga komentar per detik
+    first = _fetch(store, 150, 'time')
+    assert len(first) == 150
+    state = store.get_state('vid')
+    assert state['high_water'] == first[0]['timestamp'] and state['low_water'] == first[-1]['timestamp']
+
+    # Komentar baru, sebagian dengan timestamp yang sama dengan high-water lama
+    youtube.comments += [_comment(i, 99 + i // 3, 'n') for i in range(20)]
+    calls = youtube.calls
+    second = _fetch(store, 1000, 'time')
+    _assert_time_ordered(second)
+    assert len(second) == 320
+    # Satu halaman komentar baru + dua halaman lanjutan dari resume_token
+    assert youtube.calls - calls == 3
+    assert store.get_state('vid')['history_complete']
+
+    calls = youtube.calls
+    third = _fetch(store, 1000, 'time')
+    _assert_time_ordered(third)
+    assert {c['comment_id'] for c in third} == {c['comment_id'] for c in youtube.comments}
+    assert youtube.calls - calls == 1
+
+
+def test_time_order_resumes_after_interrupted_fetch(store, youtube, tmp_path, monkeypatch):
+    youtube.comments = [_comment(i, i) for i in range(450)]
+    youtube.fail_on = {3}
+    status = fetch_scheduler.new_fetch_status()
+    partial = _fetch(store, 450, 'time', status)
+    assert len(partial) == 200 and status['status'] == 'quota_exhausted'
+    assert store.get_state('vid')['resume_token'] == '200'
+
+    _reset_quota(tmp_path, monkeypatch)
+    calls = youtube.calls
+    resumed = _fetch(store, 450, 'time')
+    _assert_time_ordered(resumed)
+    assert len(resumed) == 450
+    # Cek komentar baru, lalu hanya halaman yang belum diambil
+    assert youtube.calls - calls == 4
+
+
+def test_time_order_serves_stored_range_when_quota_exhausted(store, youtube):
+    youtube.comments = [_comment(i, i) for i in range(300)]
+    first = _fetch(store, 150, 'time')
+    youtube.comments += [_comment(i, 400 + i, 'n') for i in range(10)]
+    youtube.fail_on = {youtube.calls + 1}
+
+    status = fetch_scheduler.new_fetch_status()
+    stored = _fetch(store, 1000, 'time', status)
+    assert [c['comment_id'] for c in stored] == [c['comment_id'] for c in first]
+    assert status['status'] == 'quota_exhausted'
+    # State lama tidak berubah: komentar baru diambil di run berikutnya
+    assert store.get_state('vid')['high_water'] == first[0]['timestamp']
+
+
+def test_checkpoint_records_only_new_ids(store):
+    comments = [_comment(i, i) for i in range(250)]
+    store.upsert_comments('vid', comments)
+    store.save_checkpoint('vid', 'relevance', '100', [c['comment_id'] for c in comments[:100]])
+    store.save_checkpoint('vid', 'relevance', '200', [c['comment_id'] for c in comments[100:200]], start=100)
+    assert store.get_checkpoint('vid', 'relevance') == {'page_token': '200', 'count': 200}
+    pages = list(store.iter_checkpoint_comments('vid', 'relevance', 200))
+    assert [c['comment_id'] for page in pages for c in page] == [c['comment_id'] for c in comments[:200]]
+    store.clear_checkpoint('vid', 'relevance')
+    assert store.get_checkpoint('vid', 'relevance') is None
+
+
+def test_relevance_fetch_resumes_from_checkpoint(store, youtube, tmp_path, monkeypatch):
+    youtube.comments = [_comment(i, i) for i in range(450)]
+    youtube.fail_on = {3}
+    status = fetch_scheduler.new_fetch_status()
+    partial = _fetch(store, 450, 'relevance', status)
+    assert len(partial) == 200 and status['status'] == 'quota_exhausted'
+    assert store.get_checkpoint('vid', 'relevance')['count'] == 200
+
+    _reset_quota(tmp_path, monkeypatch)
+    calls = youtube.calls
+    status = fetch_scheduler.new_fetch_status()
+    resumed = _fetch(store, 450, 'relevance', status)
+    assert [c['comment_id'] for c in resumed] == [f'c{i}' for i in reversed(range(450))]
+    assert status['resumed'] == 200 and status['status'] == 'complete'
+    # Dua halaman pertama dibaca dari disk, API hanya untuk sisanya
+    assert youtube.calls - calls == 3
+    assert store.get_checkpoint('vid', 'relevance') is None
+
+
+def test_relevance_rerun_with_quota_still_exhausted_returns_checkpoint(store, youtube):
+    youtube.comments = [_comment(i, i) for i in range(450)]
+    youtube.fail_on = {3}
+    _fetch(store, 450, 'relevance')
+
+    # Hari yang sama: catatan kuota lokal masih habis, API tidak dipanggil sama sekali
+    calls = youtube.calls
+    status = fetch_scheduler.new_fetch_status()
+    rerun = _fetch(store, 450, 'relevance', status)
+    assert [c['comment_id'] for c in rerun] == [f'c{i}' for i in reversed(range(250, 450))]
+    assert status['status'] == 'quota_exhausted' and status['resumed'] == 200
+    assert youtube.calls == calls
+    assert store.get_checkpoint('vid', 'relevance')['count'] == 200
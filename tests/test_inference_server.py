@@ -0,0 +1,88 @@
+import socket
+import time
+
+import pytest
+
+from comment_store import CommentStore
+from inference_server import MicroBatcher, SentimentService, start_server
+
+
+class FakeModel:
+    """Mencatat jumlah teks per panggilan model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(len(texts))
+        return [{'label': 'negative' if 'jelek' in t else 'positive', 'score': 0.9} for t in texts]
+
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+
+def test_flushes_when_batch_is_full(model):
+    # max_wait sangat panjang: hasil hanya bisa cepat kalau batch penuh langsung dikirim
+    batcher = MicroBatcher(model, max_batch=8, max_wait_ms=10_000)
+    try:
+        t0 = time.monotonic()
+        futures = [batcher.submit([f"bagus {i}a", f"jelek {i}b"]) for i in range(4)]
+        results = [f.result(timeout=5) for f in futures]
+        assert time.monotonic() - t0 < 5
+    finally:
+        batcher.close()
+    assert model.calls == [8]
+    assert [r['label'] for r in results[0]] == ['positive', 'negative']
+    assert batcher.stats()['requests_per_batch'] == 4
+
+
+def test_flushes_partial_batch_at_deadline(model):
+    batcher = MicroBatcher(model, max_batch=64, max_wait_ms=50)
+    try:
+        t0 = time.monotonic()
+        first = batcher.submit(["bagus 1"])
+        second = batcher.submit(["jelek 2", "bagus 1"])
+        assert second.result(timeout=5)[0]['label'] == 'negative'
+        elapsed = time.monotonic() - t0
+        assert first.result(timeout=5)[0]['label'] == 'positive'
+    finally:
+        batcher.close()
+    assert elapsed >= 0.04
+    # Dua request dalam satu jendela jadi satu batch; teks duplikat hanya sekali ke model
+    assert model.calls == [2]
+    assert batcher.stats()['batches'] == 1
+
+
+def test_model_error_reaches_every_request():
+    def broken(texts):
+        raise RuntimeError('model gagal')
+
+    batcher = MicroBatcher(broken, max_batch=4, max_wait_ms=10)
+    try:
+        futures = [batcher.submit(["a"]), batcher.submit(["b"])]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+        assert batcher.classify([]) == []
+    finally:
+        batcher.close()
+
+
+@pytest.mark.parametrize('length', ['abc', '-1'])
+def test_invalid_content_length_is_rejected_and_closes_connection(model, tmp_path, length):
+    batcher = MicroBatcher(model, max_batch=8, max_wait_ms=10)
+    server = start_server(SentimentService(batcher, store=CommentStore(str(tmp_path / 'c.db'))), 0)
+    try:
+        with socket.create_connection(('127.0.0.1', server.server_port), timeout=5) as sock:
+            sock.sendall(f"POST /classify HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n".encode())
+            response = b''
+            while chunk := sock.recv(4096):
+                response += chunk
+    finally:
+        server.shutdown()
+        batcher.close()
+    assert response.startswith(b'HTTP/1.1 400')
+    assert 'Content-Length tidak valid' in response.decode('utf-8')
+    assert model.calls == []
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from jobs import CANCELLED, DONE, FAILED, QUEUED, JobCancelled, JobManager, QueueFull
+from result_cache import SingleFlightCache
+
+
+def _wait(job, timeout=5):
+    """Tunggu sampai job tidak aktif lagi."""
+    deadline = time.monotonic() + timeout
+    while job.active:
+        assert time.monotonic() < deadline, f"job masih {job.state}"
+        time.sleep(0.01)
+
+
+def blocking(job, release, value='hasil'):
+    # Seperti pipeline: laporan progress berkala, pembatalan berhenti di laporan berikutnya
+    while not release.wait(0.01):
+        job.report("jalan")
+    job.report("selesai")
+    return value
+
+
+@pytest.fixture
+def manager():
+    return JobManager(max_workers=1, max_queued=2)
+
+
+def test_same_key_is_deduplicated(manager):
+    release = threading.Event()
+    a = manager.submit(blocking, release, key='vid', viewer='s1')
+    b = manager.submit(blocking, release, key='vid', viewer='s2')
+    c = manager.submit(blocking, release, key='lain', viewer='s1')
+    assert a is b
+    assert c is not a
+    assert manager.viewers(a) == 2
+    release.set()
+    _wait(a)
+    _wait(c)
+    assert a.state == DONE and a.result == 'hasil'
+
+
+def test_cancelled_job_is_not_reused(manager):
+    release = threading.Event()
+    a = manager.submit(blocking, release, key='vid')
+    assert manager.cancel(a.id)
+    b = manager.submit(blocking, release, key='vid')
+    assert b is not a
+    _wait(a)
+    assert a.state == CANCELLED
+    release.set()
+    _wait(b)
+    assert b.state == DONE
+
+
+def test_cancel_queued_job_never_runs(manager):
+    release = threading.Event()
+    running = manager.submit(blocking, release, key='a')
+    calls = []
+    queued = manager.submit(lambda job: calls.append(1), key='b')
+    assert queued.state == QUEUED
+    assert manager.queue_position(queued) == 1
+    assert manager.cancel(queued.id)
+    assert queued.state == CANCELLED
+    release.set()
+    _wait(running)
+    assert calls == []
+
+
+def test_detach_cancels_only_without_other_viewers(manager):
+    release = threading.Event()
+    job = manager.submit(blocking, release, key='vid', viewer='s1')
+    manager.attach(job.id, 's2')
+    assert manager.detach(job.id, 's1') is False
+    assert not job.cancel_requested
+    assert manager.detach(job.id, 's2') is True
+    _wait(job)
+    assert job.state == CANCELLED
+
+
+def test_queue_limit_and_failure(manager):
+    release = threading.Event()
+    jobs = [manager.submit(blocking, release, key=key) for key in 'abc']
+    with pytest.raises(QueueFull):
+        manager.submit(blocking, release, key='d')
+    release.set()
+    for job in jobs:
+        _wait(job)
+
+    def boom(job):
+        raise RuntimeError('gagal')
+    job = manager.submit(boom)
+    _wait(job)
+    assert job.state == FAILED and isinstance(job.error, RuntimeError)
+
+
+def test_resubmit_after_cancel_does_not_inherit_cancellation():
+    manager = JobManager(max_workers=2)
+    cache = SingleFlightCache(retry_on=(JobCancelled,))
+    started, release = threading.Event(), threading.Event()
+
+    def analysis(job, value):
+        def compute():
+            started.set()
+            while not release.wait(0.01):
+                job.report("jalan")
+            return value
+        return cache.get_or_compute('vid', compute)[0]
+
+    cancelled = manager.submit(analysis, 'lama', key='vid')
+    assert started.wait(5)
+    manager.cancel(cancelled.id)
+    # Job lama masih berjalan sampai laporan berikutnya; job baru menunggu entri cache yang sama
+    resubmitted = manager.submit(analysis, 'baru', key='vid')
+    assert resubmitted is not cancelled
+    _wait(cancelled)
+    release.set()
+    _wait(resubmitted)
+    assert cancelled.state == CANCELLED
+    assert resubmitted.state == DONE and resubmitted.result == 'baru'
@@ -0,0 +1,58 @@
+import zlib
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+import sentiment_core as core
+from benchmarks.corpus import make_corpus
+
+
+def fake_model(texts):
+    results = []
+    for text in texts:
+        h = zlib.crc32(text.encode('utf-8'))
+        results.append({'label': core.SENTIMENTS[h % 3].upper(), 'score': 0.5 + (h % 500) / 1000})
+    return results
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    comments = make_corpus(3000)
+
+    def pages(api_key, store, video_id, max_comments, order_by, include_replies=False, status=None):
+        for i in range(0, len(comments), 100):
+            yield comments[i:i + 100]
+
+    monkeypatch.setattr(core, 'iter_comment_pages', pages)
+    updates = []
+    comment_data, precomputed = core.run_analysis_pipeline(
+        None, None, fake_model, None, 'vid', len(comments), 'relevance', chunk_size=64,
+        on_update=lambda aggregate: updates.append(aggregate.copy()))
+    result = core.analyze_sentiment(fake_model, None, comment_data, **precomputed)
+    return updates, result
+
+
+def test_final_aggregate_counts_match_result(pipeline):
+    updates, result = pipeline
+    final = updates[-1]
+    assert final.complete and not any(u.complete for u in updates[:-1])
+    assert final.fetched == result.fetched
+    assert final.counts == result.counts
+    assert final.total == result.total
+    assert final.percentages == result.percentages
+
+
+@pytest.mark.parametrize('max_points', [core.MAX_TIME_POINTS, 20])
+def test_final_aggregate_timeseries_match_result(pipeline, max_points):
+    updates, result = pipeline
+    live = updates[-1].timeseries(max_points)
+    # max_points bawaan: bandingkan langsung dengan AnalysisResult.timeseries; yang kecil memaksa bucket melebar
+    expected = result.timeseries
+    if max_points != core.MAX_TIME_POINTS:
+        expected = core.build_timeseries(result.table, max_points)
+    assert set(live) == set(expected) == set(core.TIME_RESOLUTIONS)
+    for resolution in core.TIME_RESOLUTIONS:
+        live_frame, live_bucket = live[resolution]
+        frame, bucket = expected[resolution]
+        assert live_bucket == bucket
+        assert_frame_equal(live_frame, frame)
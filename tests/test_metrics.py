@@ -0,0 +1,51 @@
+import threading
+
+import metrics
+import sentiment_core as core
+
+
+def test_collectors_in_concurrent_jobs_see_only_their_own_spans():
+    both_started = threading.Barrier(2)
+    results = {}
+
+    def job(name, n):
+        with metrics.Collector() as collector:
+            both_started.wait(5)
+            for _ in range(n):
+                with metrics.span(f'stage_{name}', items=1):
+                    pass
+                with metrics.span('shared', items=1):
+                    pass
+        results[name] = collector.snapshot()
+
+    threads = [threading.Thread(target=job, args=('a', 3)), threading.Thread(target=job, args=('b', 5))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(results['a']) == {'stage_a', 'shared'}
+    assert set(results['b']) == {'stage_b', 'shared'}
+    assert results['a']['shared']['calls'] == 3
+    assert results['b']['shared']['calls'] == 5
+    assert metrics.snapshot()['shared']['calls'] >= 8
+
+
+def test_prefetch_thread_records_into_callers_collector():
+    pages = metrics.iter_spans('test_prefetch_page', iter([[1, 2], [3]]))
+    with metrics.Collector() as collector:
+        assert list(core.prefetch(pages)) == [[1, 2], [3]]
+    stage = collector.snapshot()['test_prefetch_page']
+    assert stage['calls'] == 2
+    assert stage['items'] == 3
+
+
+def test_spans_outside_collector_are_not_counted():
+    collector = metrics.Collector()
+    with metrics.span('test_outside'):
+        pass
+    with collector:
+        pass
+    with metrics.span('test_outside'):
+        pass
+    assert collector.snapshot() == {}
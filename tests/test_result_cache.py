@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from result_cache import COALESCED, HIT, MISS, SingleFlightCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = SingleFlightCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'hasil'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+                 for _ in range(4)]
+    for t in followers:
+        t.start()
+    # Tunggu semua follower benar-benar menunggu Future yang sama sebelum leader selesai
+    while cache.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == [COALESCED] * 4 + [MISS]
+    assert all(value == 'hasil' for value, _ in results)
+    assert cache.get_or_compute('k', compute) == ('hasil', HIT)
+
+
+def test_exception_reaches_waiters_and_is_not_cached():
+    cache = SingleFlightCache()
+
+    def fail():
+        raise ValueError('gagal')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('k', fail)
+    assert not cache.inflight('k')
+    assert cache.get_or_compute('k', lambda: 1) == (1, MISS)
+
+
+def test_cache_if_false_is_not_stored():
+    cache = SingleFlightCache(cache_if=lambda value: value != 'parsial')
+    assert cache.get_or_compute('k', lambda: 'parsial') == ('parsial', MISS)
+    assert cache.get_or_compute('k', lambda: 'lengkap') == ('lengkap', MISS)
+    assert cache.get_or_compute('k', lambda: 'lain') == ('lengkap', HIT)
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=10, clock=clock)
+    cache.get_or_compute('k', lambda: 1)
+    clock.now = 10
+    assert cache.get_or_compute('k', lambda: 2) == (1, HIT)
+    assert cache.age('k') == 10
+    clock.now = 10.5
+    assert cache.get_or_compute('k', lambda: 2) == (2, MISS)
+
+
+def test_lru_eviction_by_entries():
+    cache = SingleFlightCache(max_entries=2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    cache.get_or_compute('a', lambda: 0)  # 'a' jadi yang terakhir dipakai
+    cache.get_or_compute('c', lambda: 3)
+    assert cache.age('b') is None
+    assert cache.get_or_compute('a', lambda: 0) == (1, HIT)
+    assert cache.get_or_compute('c', lambda: 0) == (3, HIT)
+
+
+def test_lru_eviction_by_bytes():
+    cache = SingleFlightCache(max_bytes=10, size_of=len)
+    cache.get_or_compute('a', lambda: 'x' * 4)
+    cache.get_or_compute('b', lambda: 'x' * 4)
+    cache.get_or_compute('c', lambda: 'x' * 4)
+    assert cache.age('a') is None
+    assert cache.stats()['bytes'] == 8
+    # Nilai yang lebih besar dari batas tidak disimpan sama sekali
+    cache.get_or_compute('d', lambda: 'x' * 11)
+    assert cache.age('d') is None
+    assert cache.stats()['entries'] == 2
+
+
+class Cancelled(Exception):
+    pass
+
+
+def test_retry_on_exception_lets_a_waiter_recompute():
+    cache = SingleFlightCache(retry_on=(Cancelled,))
+    started, release = threading.Event(), threading.Event()
+
+    def cancelled_compute():
+        started.set()
+        release.wait(5)
+        raise Cancelled()
+
+    results, errors = [], []
+
+    def leader():
+        try:
+            cache.get_or_compute('k', cancelled_compute)
+        except Cancelled:
+            errors.append('leader')
+
+    first = threading.Thread(target=leader)
+    first.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', lambda: 'baru')))
+    waiter.start()
+    while cache.stats()['coalesced'] < 1:
+        time.sleep(0.01)
+    release.set()
+    first.join(5)
+    waiter.join(5)
+
+    # Pembatalan hanya sampai ke leader; penunggu menghitung ulang sebagai leader baru
+    assert errors == ['leader']
+    assert results == [('baru', MISS)]
+    assert cache.get_or_compute('k', lambda: 'lain') == ('baru', HIT)
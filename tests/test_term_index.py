@@ -0,0 +1,44 @@
+import pytest
+
+import cleaning
+import sentiment_core as core
+from benchmarks.corpus import make_corpus
+from term_index import TermIndex, tfidf_words_reference
+
+
+def _texts_by_sentiment(n):
+    texts = {sent: [] for sent in core.SENTIMENTS}
+    for i, comment in enumerate(make_corpus(n)):
+        text = core.clean_for_visualization(cleaning.clean_comment(comment['text']))
+        if text:
+            texts[core.SENTIMENTS[i % len(core.SENTIMENTS)]].append(text)
+    return texts
+
+
+def _index(texts_by_category, **kwargs):
+    terms = TermIndex(list(texts_by_category), **kwargs)
+    for cat, texts in texts_by_category.items():
+        for text in texts:
+            terms.add(cat, text)
+    return terms
+
+
+@pytest.mark.parametrize('max_features', [5, 20])
+def test_tfidf_matches_sklearn_reference(max_features):
+    texts = _texts_by_sentiment(1500)
+    expected = tfidf_words_reference(texts, max_features)
+    actual = _index(texts).tfidf_words(max_features)
+    for sent in core.SENTIMENTS:
+        assert [w for w, _ in actual[sent]] == [w for w, _ in expected[sent]]
+        assert [s for _, s in actual[sent]] == pytest.approx([s for _, s in expected[sent]])
+
+
+def test_empty_category_gives_empty_lists_like_reference():
+    texts = {'positive': ['bagus sekali'], 'negative': [], 'neutral': ['biasa saja']}
+    assert _index(texts).tfidf_words() == tfidf_words_reference(texts) == {cat: [] for cat in texts}
+
+
+def test_top_counts_words():
+    terms = _index({'positive': ['mantap keren', 'mantap'], 'negative': ['jelek']})
+    assert terms.top('positive', 1) == [('mantap', 2)]
+    assert terms.document_frequency('mantap') == 1
@@ -0,0 +1,46 @@
+import pytest
+
+import sentiment_core as core
+
+
+@pytest.fixture
+def built(monkeypatch):
+    clients = []
+
+    def build(api_key):
+        clients.append(object())
+        return clients[-1]
+
+    monkeypatch.setattr(core, '_build_youtube', build)
+    monkeypatch.setattr(core, '_youtube_pool', {})
+    return clients
+
+
+def test_client_is_reused_after_normal_exit(built):
+    with core.youtube_client('key') as first:
+        pass
+    with core.youtube_client('key') as second:
+        assert second is first
+    assert len(built) == 1
+
+
+def test_client_is_dropped_after_exception(built):
+    with pytest.raises(ConnectionError):
+        with core.youtube_client('key'):
+            raise ConnectionError()
+    assert core._youtube_pool['key'] == []
+    with core.youtube_client('key') as client:
+        assert client is built[-1]
+    assert len(built) == 2
+
+
+def test_client_is_reused_when_generator_closes_early(built):
+    def pages():
+        with core.youtube_client('key'):
+            yield 1
+            yield 2
+
+    gen = pages()
+    next(gen)
+    gen.close()
+    assert core._youtube_pool['key'] == built
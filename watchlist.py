@@ -0,0 +1,324 @@
+"""Pantau sentimen sekumpulan video secara berkala (watch-list) tanpa Streamlit.
+
+Contoh:
+    python watchlist.py brand_videos.txt --interval 900 --window-hours 24 --threshold 0.4
+
+``brand_videos.txt`` formatnya sama dengan ``batch_analyze.py``. Tiap poll hanya mengambil komentar
+utama yang terbit sejak poll terakhir (``order=time``, paging berhenti di komentar lama), hanya
+komentar baru itu yang masuk model, lalu jumlahnya ditambahkan ke deret waktu per jam per video di
+SQLite (``--db``). Riwayat tidak pernah diproses ulang.
+
+Setelah tiap poll, porsi komentar negatif dalam ``--window-hours`` terakhir (menurut waktu terbit)
+dibandingkan dengan ``--threshold``. Alert dikirim sekali saat porsi naik melewati batas dan sekali
+lagi saat turun kembali; alert dicatat di database, ditulis ke stderr dan, kalau ``--webhook``
+diisi, dikirim sebagai POST JSON.
+
+Poll yang gagal di tengah (kuota habis, error API) tidak menggeser penanda poll terakhir, jadi
+komentar yang terlewat diambil lagi di poll berikutnya.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import urllib.request
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+
+import metrics
+import sentiment_core as core
+from comment_store import CommentStore
+from fetch_scheduler import QuotaExceeded, new_fetch_status
+from sentiment_cache import SentimentCache
+from sharded_inference import DEFAULT_WORKERS, load_classifier
+
+# Lokasi default database watch-list (bisa diganti lewat env WATCHLIST_DB_PATH)
+DEFAULT_WATCH_PATH = os.environ.get('WATCHLIST_DB_PATH', os.path.join('.cache', 'watchlist.sqlite3'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watch_state (
+    video_id        TEXT PRIMARY KEY,
+    last_comment_at TEXT,
+    last_ids        TEXT NOT NULL DEFAULT '[]',
+    last_polled_at  TEXT,
+    polls           INTEGER NOT NULL DEFAULT 0,
+    alerting        INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sentiment_series (
+    video_id  TEXT NOT NULL,
+    hour      TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    comments  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (video_id, hour, sentiment)
+);
+
+CREATE TABLE IF NOT EXISTS watch_alerts (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id       TEXT NOT NULL,
+    created_at     TEXT NOT NULL,
+    kind           TEXT NOT NULL,
+    negative_share REAL NOT NULL,
+    comments       INTEGER NOT NULL,
+    window_hours   REAL NOT NULL,
+    threshold      REAL NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class WatchStore:
+    """Penanda poll terakhir, deret waktu sentimen per jam dan riwayat alert per video."""
+
+    def __init__(self, path=DEFAULT_WATCH_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_state(self, video_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM watch_state WHERE video_id = ?", (video_id,)).fetchone()
+        if not row:
+            return {'video_id': video_id, 'last_comment_at': None, 'last_ids': [], 'last_polled_at': None,
+                    'polls': 0, 'alerting': False}
+        state = dict(row)
+        state['last_ids'] = json.loads(state['last_ids'])
+        state['alerting'] = bool(state['alerting'])
+        return state
+
+    def record_poll(self, video_id, hourly, last_comment_at, last_ids):
+        """Tambahkan ``hourly`` ({(jam, sentimen): jumlah}) ke deret waktu dan geser penanda poll,
+        dalam satu transaksi supaya komentar tidak terhitung dua kali."""
+        with self._connect() as conn:
+            conn.executemany(
+                """INSERT INTO sentiment_series (video_id, hour, sentiment, comments) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(video_id, hour, sentiment) DO UPDATE SET comments = comments + excluded.comments""",
+                [(video_id, hour, sent, n) for (hour, sent), n in hourly.items()]
+            )
+            conn.execute(
+                """INSERT INTO watch_state (video_id, last_comment_at, last_ids, last_polled_at, polls)
+                   VALUES (?, ?, ?, ?, 1)
+                   ON CONFLICT(video_id) DO UPDATE SET
+                       last_comment_at = excluded.last_comment_at, last_ids = excluded.last_ids,
+                       last_polled_at = excluded.last_polled_at, polls = polls + 1""",
+                (video_id, last_comment_at, json.dumps(last_ids), _now())
+            )
+
+    def window_counts(self, video_id, start_hour):
+        """Jumlah per sentimen untuk jam >= ``start_hour`` (format ``core.hour_key``)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT sentiment, SUM(comments) AS n FROM sentiment_series
+                   WHERE video_id = ? AND hour >= ? GROUP BY sentiment""",
+                (video_id, start_hour)
+            ).fetchall()
+        counts = {sent: 0 for sent in core.SENTIMENTS}
+        counts.update((r['sentiment'], r['n']) for r in rows)
+        return counts
+
+    def series(self, video_id):
+        """Deret waktu per jam: DataFrame ber-index waktu UTC, satu kolom per sentimen."""
+        import pandas as pd
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT hour, sentiment, comments FROM sentiment_series WHERE video_id = ? ORDER BY hour", (video_id,)
+            ).fetchall()
+        frame = pd.DataFrame([dict(r) for r in rows], columns=['hour', 'sentiment', 'comments'])
+        frame = frame.pivot_table(index='hour', columns='sentiment', values='comments', aggfunc='sum', fill_value=0)
+        frame = frame.reindex(columns=core.SENTIMENTS, fill_value=0)
+        frame.index = pd.to_datetime(frame.index, format='%Y-%m-%dT%H', utc=True)
+        frame.index.name = 'date'
+        return frame
+
+    def set_alerting(self, video_id, alerting, kind, negative_share, comments, window_hours, threshold):
+        with self._connect() as conn:
+            conn.execute("UPDATE watch_state SET alerting = ? WHERE video_id = ?", (int(alerting), video_id))
+            conn.execute(
+                """INSERT INTO watch_alerts (video_id, created_at, kind, negative_share, comments, window_hours, threshold)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (video_id, _now(), kind, negative_share, comments, window_hours, threshold)
+            )
+
+    def alerts(self, video_id=None, limit=50):
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT * FROM watch_alerts {'WHERE video_id = ?' if video_id else ''}
+                    ORDER BY id DESC LIMIT ?""",
+                (video_id, limit) if video_id else (limit,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def post_webhook(url, payload, timeout=10):
+    """Kirim ``payload`` sebagai JSON; error jaringan tidak menghentikan poll."""
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout):
+            return True
+    except OSError as e:
+        core.stderr_progress(f"webhook gagal: {e}")
+        return False
+
+
+def check_alert(watch_store, video_id, window_hours, threshold, min_comments, now=None, notify=None):
+    """Bandingkan porsi negatif di jendela waktu dengan ``threshold``; kembalikan
+    ``(porsi, jumlah komentar, jenis alert atau None)``."""
+    now = now or datetime.now(timezone.utc)
+    start_hour = core.hour_key((now - timedelta(hours=window_hours)).strftime('%Y-%m-%dT%H:%M:%SZ'))
+    counts = watch_store.window_counts(video_id, start_hour)
+    total = sum(counts.values())
+    share = counts['negative'] / total if total else 0.0
+    alerting = watch_store.get_state(video_id)['alerting']
+
+    kind = None
+    if not alerting and total >= min_comments and share >= threshold:
+        kind = 'negative_high'
+    elif alerting and share < threshold:
+        kind = 'recovered'
+    if kind:
+        watch_store.set_alerting(video_id, kind == 'negative_high', kind, share, total, window_hours, threshold)
+        if notify:
+            notify({'video_id': video_id, 'kind': kind, 'negative_share': round(share, 4), 'comments': total,
+                    'window_hours': window_hours, 'threshold': threshold, 'at': _now()})
+    return share, total, kind
+
+
+def poll_video(api_key, store, watch_store, nlp, cache, video_id, backfill=500, max_new=2000, stats=None,
+               batch_size=64):
+    """Satu poll: ambil komentar baru sejak poll terakhir, klasifikasi, tambahkan ke deret waktu.
+    Mengembalikan ringkasan poll. Exception fetch diteruskan tanpa menggeser penanda poll."""
+    stats = core.new_inference_stats() if stats is None else stats
+    state = watch_store.get_state(video_id)
+    since = state['last_comment_at']
+    status = new_fetch_status()
+    new = []
+    for page in core.iter_new_comments(api_key, store, video_id, since=since, seen_ids=state['last_ids'],
+                                       max_comments=max_new if since else backfill, status=status):
+        new.extend(page)
+
+    with metrics.span('clean', len(new)):
+        cleaned = [core.clean_comment(item['text']) for item in new]
+    predictions = {}
+    core.predict_sentiment(nlp, cache, [c for c in cleaned if len(c) > 10], predictions, stats, batch_size=batch_size)
+
+    hourly = Counter()
+    counts = Counter({sent: 0 for sent in core.SENTIMENTS})
+    for item, cleaned_text in zip(new, cleaned):
+        r = predictions.get(cleaned_text) if len(cleaned_text) > 10 else None
+        if r is not None:
+            label = r['label'].lower()
+            hourly[(core.hour_key(item['timestamp']), label)] += 1
+            counts[label] += 1
+
+    # Penanda baru: komentar terbaru + semua id di detik yang sama (komentar lain di detik itu
+    # mungkin belum terlihat, jadi poll berikutnya mulai lagi dari detik ini)
+    last_comment_at, last_ids = since, state['last_ids']
+    if new:
+        last_comment_at = new[0]['timestamp']
+        last_ids = [c['comment_id'] for c in new if c['timestamp'] == last_comment_at]
+        if last_comment_at == since:
+            last_ids = state['last_ids'] + last_ids
+    watch_store.record_poll(video_id, hourly, last_comment_at, last_ids)
+    return {'video_id': video_id, 'new_comments': len(new), 'analyzed': sum(counts.values()),
+            **{f'{sent}_new': counts[sent] for sent in core.SENTIMENTS},
+            'quota_used': status['quota_used'],
+            # Jatah per poll habis sebelum mencapai poll sebelumnya: komentar di antaranya terlewat
+            'gap': bool(since) and len(new) >= max_new}
+
+
+def poll_all(video_ids, api_key, store, watch_store, nlp, cache, window_hours=24, threshold=0.4, min_comments=20,
+             backfill=500, max_new=2000, progress=core.stderr_progress, notify=None, series_dir=None):
+    """Poll semua video sekali; kembalikan list ringkasan (satu dict per video)."""
+    stats = core.new_inference_stats()
+    summary = []
+    for vid in video_ids:
+        try:
+            row = poll_video(api_key, store, watch_store, nlp, cache, vid, backfill, max_new, stats)
+        except (QuotaExceeded, HttpError) as e:
+            progress(f"{vid}: poll gagal ({e}); dicoba lagi di poll berikutnya")
+            summary.append({'video_id': vid, 'status': 'error', 'error': str(e)})
+            continue
+        share, total, kind = check_alert(watch_store, vid, window_hours, threshold, min_comments, notify=notify)
+        row.update(status='ok', negative_share=round(share, 4), window_comments=total, alert=kind or '')
+        summary.append(row)
+        progress(f"{vid}: +{row['new_comments']} komentar baru • negatif {window_hours:g} jam terakhir "
+                 f"{share:.0%} (n={total})" + (f" • ALERT {kind}" if kind else "")
+                 + (f" • {max_new}+ komentar baru, sebagian terlewat" if row['gap'] else ""))
+        if series_dir:
+            os.makedirs(series_dir, exist_ok=True)
+            watch_store.series(vid).to_csv(os.path.join(series_dir, f"series_{vid}.csv"))
+    progress(f"Poll selesai: {stats['model_calls']} teks lewat model, {stats['cache_hits']} dari cache")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pantau sentimen komentar daftar video YouTube secara berkala.")
+    parser.add_argument('input', help="File berisi URL atau video ID, satu per baris")
+    parser.add_argument('--interval', type=float, default=900, help="Detik antar poll (default: 900)")
+    parser.add_argument('--once', action='store_true', help="Poll sekali lalu keluar (mis. dari cron)")
+    parser.add_argument('--window-hours', type=float, default=24, help="Jendela waktu porsi negatif (default: 24)")
+    parser.add_argument('--threshold', type=float, default=0.4, help="Batas porsi negatif untuk alert (default: 0.4)")
+    parser.add_argument('--min-comments', type=int, default=20,
+                        help="Minimal komentar di jendela sebelum alert bisa terpicu (default: 20)")
+    parser.add_argument('--backfill', type=int, default=500, help="Komentar terbaru yang diambil di poll pertama (default: 500)")
+    parser.add_argument('--max-new', type=int, default=2000, help="Maks komentar baru per video per poll (default: 2000)")
+    parser.add_argument('--db', default=DEFAULT_WATCH_PATH, help="Database watch-list (default: env WATCHLIST_DB_PATH)")
+    parser.add_argument('--series-dir', help="Tulis deret waktu per video (series_<video_id>.csv) ke folder ini tiap poll")
+    parser.add_argument('--webhook', help="URL yang menerima alert sebagai POST JSON")
+    parser.add_argument('--api-key', default=os.environ.get('YOUTUBE_API_KEY'), help="YouTube API key (default: env YOUTUBE_API_KEY)")
+    parser.add_argument('--backend', choices=core.BACKENDS, default=core.DEFAULT_BACKEND, help="Backend inference model")
+    parser.add_argument('--inference-workers', type=int, default=DEFAULT_WORKERS,
+                        help="Jumlah proses inference (0 = di proses ini; default: env SENTIMENT_WORKERS)")
+    parser.add_argument('--quiet', action='store_true', help="Jangan tampilkan progress")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("API key belum diisi (--api-key atau env YOUTUBE_API_KEY)")
+
+    video_ids = core.read_video_ids(args.input)
+    progress = core.no_progress if args.quiet else core.stderr_progress
+
+    def notify(alert):
+        core.stderr_progress(f"ALERT {alert['video_id']}: {alert['kind']} • negatif {alert['negative_share']:.0%} "
+                             f"dari {alert['comments']} komentar dalam {alert['window_hours']:g} jam")
+        if args.webhook:
+            post_webhook(args.webhook, alert)
+
+    nlp = load_classifier(args.backend, args.inference_workers)
+    cache = SentimentCache(core.MODEL_NAME, core.model_version(nlp, args.backend))
+    store = CommentStore()
+    watch_store = WatchStore(args.db)
+    try:
+        while True:
+            started = time.monotonic()
+            summary = poll_all(video_ids, args.api_key, store, watch_store, nlp, cache, args.window_hours,
+                               args.threshold, args.min_comments, args.backfill, args.max_new, progress, notify,
+                               args.series_dir)
+            if args.once:
+                return 0 if any(row['status'] == 'ok' for row in summary) else 1
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if hasattr(nlp, 'close'):
+            nlp.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())